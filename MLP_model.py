@@ -5,38 +5,66 @@ Using Top 10 Stocks, Macroeconomic Data, and News Sentiment
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import logging
-from pymongo import MongoClient
+import os
+from datetime import datetime
+from pathlib import Path
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.neural_network import MLPClassifier
 from sklearn.metrics import accuracy_score, classification_report, log_loss
-from mongoDB_setup import connect_mongo
+from storage_backend import get_storage
+from data_cache import load_collection
+from feature_store import FEATURE_STORE, TEST_START, TEST_END
+from feature_registry import model_features
 
 
-#Set up logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# Model Features & Target
+FEATURES = model_features()
+TARGET = "Price_Direction"
+
+# Trained model bundle (model + scaler + feature list), loaded by the streaming predictor
+MODEL_PATH = Path(os.getenv("MODEL_PATH", "models/mlp_model.joblib"))
 
 
 # Function to Fetch Data from MongoDB
-def fetch_data():
+def fetch_data(fields=None, start=None, end=None, query=None):
     """
     Fetches feature-engineered data from MongoDB.
+    Args:
+        - fields: Optional list of columns to project (e.g. FEATURES + ["Date", TARGET])
+        - start, end: Optional inclusive Date bounds, applied by the server using the Date index
+        - query: Optional extra filter
+
     Returns:
         - Pandas DataFrame containing the dataset.
     """
-    db = connect_mongo()
-    collection = db["feature_engineering"]
+    storage = get_storage()
 
+    # Streamed with a projection and served from the local Parquet cache unless the collection changed
     logging.info("Fetching data from MongoDB...")
-    data = pd.DataFrame(list(collection.find()))
-
-    # Drop `_id` column if present
-    data.drop(columns=["_id"], errors="ignore", inplace=True)
+    data = load_collection(storage, FEATURE_STORE, fields=fields, start=start, end=end, query=query)
     return data
 
 
+# Function to Fetch the Train and Test Windows Separately
+def fetch_train_test(fields=None, train_start=None):
+    """
+    Fetches only the training window (train_start .. TEST_START) and the test window
+    (TEST_START .. TEST_END) instead of the whole collection.
+    Args:
+        - fields: Optional list of columns to project
+        - train_start: Optional first training date (None = from the beginning)
+
+    Returns:
+        - train_data: Training DataFrame
+        - test_data: Testing DataFrame
+    """
+    train_data = fetch_data(fields, start=train_start, query={"Date": {"$lt": TEST_START}})
+    test_data = fetch_data(fields, start=TEST_START, end=TEST_END)
+    return train_data, test_data
+
+
 # Function to Handle Missing Features
 def handle_missing_features(data, features):
     """
@@ -66,30 +94,30 @@ def split_data(data):
         - train_data: Training DataFrame
         - test_data: Testing DataFrame
     """
-    test_start = "2024-02-01"
-    test_end = "2024-03-31"
-
-    train_data = data[data["Date"] < test_start]
-    test_data = data[(data["Date"] >= test_start) & (data["Date"] <= test_end)]
+    train_data = data[data["Date"] < TEST_START]
+    test_data = data[(data["Date"] >= TEST_START) & (data["Date"] <= TEST_END)]
 
     return train_data, test_data
 
 
 # Function to Standardize Data
-def standardize_data(X_train, X_test):
+def standardize_data(X_train, X_test, return_scaler=False):
     """
     Standardizes the dataset using StandardScaler.
     Args:
         - X_train: Training feature set
         - X_test: Testing feature set
+        - return_scaler: Also return the fitted scaler (needed to save the model for inference)
 
     Returns:
-        - Scaled X_train and X_test
+        - Scaled X_train and X_test (and the scaler)
     """
     scaler = StandardScaler()
     X_train = scaler.fit_transform(X_train)
     X_test = scaler.transform(X_test)
 
+    if return_scaler:
+        return X_train, X_test, scaler
     return X_train, X_test
 
 
@@ -145,11 +173,47 @@ def evaluate_model(model, X_train, y_train, X_test, y_test):
     return train_acc, test_acc, train_loss, test_loss
 
 
+# Function to Save the Trained Model
+def save_model(model, scaler, path=MODEL_PATH, features=FEATURES):
+    """
+    Saves the model, its input scaler and feature order as one joblib bundle.
+    Args:
+        - model: Trained MLP model
+        - scaler: StandardScaler fitted on the training features
+        - path: Bundle file
+        - features: Feature columns in model input order
+
+    Returns:
+        - Path of the bundle
+    """
+    import joblib
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump({"model": model, "scaler": scaler, "features": list(features),
+                 "trained_at": datetime.now()}, path)
+    logging.info(f"Model saved to {path}")
+    return path
+
+
+# Function to Load a Saved Model
+def load_model(path=MODEL_PATH):
+    """Loads a bundle written by save_model (dictionary with model, scaler, features, trained_at)."""
+    import joblib
+
+    bundle = joblib.load(path)
+    logging.info(f"Loaded model trained at {bundle['trained_at']:%Y-%m-%d %H:%M} from {path}")
+    return bundle
+
+
 # Function to Plot Model Performance
 def plot_performance(model, train_acc, test_acc, train_loss, test_loss):
     """
     Plots Training vs Validation Accuracy & Loss and Test Accuracy & Loss.
     """
+    # Imported here so training-only runs never load matplotlib
+    import matplotlib.pyplot as plt
+
     val_losses = model.validation_scores_
     train_losses = model.loss_curve_
 
@@ -185,39 +249,24 @@ def plot_performance(model, train_acc, test_acc, train_loss, test_loss):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
     logging.info("Starting MLP Model Training Pipeline...")
 
-    # Fetch Data
-    data = fetch_data()
-
-    # Define Features & Target
-    FEATURES = [
-        "Normalized_SP500_Adj_Close", "Normalized_GDP", "Normalized_Inflation",
-        "Normalized_Interest_Rate", "Normalized_AAPL_Adj_Close", "Normalized_MSFT_Adj_Close",
-        "Normalized_AMZN_Adj_Close", "Normalized_NVDA_Adj_Close", "Normalized_GOOGL_Adj_Close",
-        "Normalized_GOOG_Adj_Close", "Normalized_TSLA_Adj_Close", "Normalized_BRK-B_Adj_Close",
-        "Normalized_META_Adj_Close", "Normalized_XOM_Adj_Close", "Rolling_Mean_7",
-        "Rolling_Mean_30", "Rolling_Volatility_30", "Lag_1", "Lag_3", "Lag_7",
-        "Normalized_Avg_News_Sentiment"
-    ]
-    TARGET = "Price_Direction"
-
-    # Handle Missing Features
-    data = handle_missing_features(data, FEATURES)
-
-    # Drop NaN values
-    data.dropna(inplace=True)
-
-    # Split Data into Train & Test
-    train_data, test_data = split_data(data)
+    # Fetch only the model columns, train and test windows read separately by the server
+    train_data, test_data = fetch_train_test(FEATURES + ["Date", TARGET])
+
+    # Handle Missing Features & Drop NaN values
+    train_data = handle_missing_features(train_data, FEATURES).dropna()
+    test_data = handle_missing_features(test_data, FEATURES).dropna()
     X_train, y_train = train_data[FEATURES], train_data[TARGET]
     X_test, y_test = test_data[FEATURES], test_data[TARGET]
 
     # Standardize Data
-    X_train, X_test = standardize_data(X_train, X_test)
+    X_train, X_test, scaler = standardize_data(X_train, X_test, return_scaler=True)
 
     # Train MLP Model
     mlp_model = train_mlp(X_train, y_train)
+    save_model(mlp_model, scaler)
 
     # Evaluate Model
     train_acc, test_acc, train_loss, test_loss = evaluate_model(mlp_model, X_train, y_train, X_test, y_test)
@@ -0,0 +1,89 @@
+"""
+Checkpoints for Resumable Acquisition Runs
+Records completed (source, key, shard, page) units in MongoDB so an interrupted run can resume
+without redoing finished work
+"""
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+# Make the project root importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from bulk_writer import bulk_write_batches
+from schema_setup import ensure_collection
+
+
+# Collection holding the checkpoints of every acquisition script
+CHECKPOINT_COLLECTION = "acquisition_checkpoints"
+
+
+class CheckpointStore:
+    """
+    Completed units of one source (e.g. "nyt", "yfinance", "fred"):
+        - Kind "done": a unit (key, shard, page) whose data is stored
+        - Kind "plan": how a unit of work was planned (e.g. the hit count / shards of a news window),
+          so a resumed run does not have to ask the API again
+    """
+
+    def __init__(self, db, source):
+        self.collection = ensure_collection(db, CHECKPOINT_COLLECTION)
+        self.source = source
+        self._done = set()
+        self._plans = {}
+
+    def load(self):
+        """Reads the checkpoints of the source (resume mode). Returns self."""
+        for doc in self.collection.find({"Source": self.source}, {"_id": 0}):
+            if doc["Kind"] == "done":
+                self._done.add((doc["Key"], doc["Shard"], doc["Page"]))
+            else:
+                self._plans[(doc["Key"], doc["Shard"])] = doc.get("Plan")
+        print(f"Resuming '{self.source}': {len(self._done)} completed units, {len(self._plans)} planned windows.")
+        return self
+
+    def reset(self):
+        """Forgets the checkpoints of the source (fresh run; stored data is kept)."""
+        self.collection.delete_many({"Source": self.source})
+        self._done.clear()
+        self._plans.clear()
+
+    def is_done(self, key, shard, page=0):
+        return (key, shard, page) in self._done
+
+    def plan(self, key, shard):
+        """Returns the stored plan of a unit, or None."""
+        return self._plans.get((key, shard))
+
+    def save_plan(self, key, shard, plan):
+        self._plans[(key, shard)] = plan
+        self.collection.update_one(
+            {"Source": self.source, "Kind": "plan", "Key": key, "Shard": shard, "Page": 0},
+            {"$set": {"Plan": plan, "Updated_At": datetime.now(timezone.utc).replace(tzinfo=None)}},
+            upsert=True,
+        )
+
+    def mark_done(self, units):
+        """Records (key, shard, page) units as completed. Call only after their data is stored."""
+        units = [unit for unit in dict.fromkeys(units) if unit not in self._done]
+        if not units:
+            return
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        bulk_write_batches(self.collection, (
+            UpdateOne({"Source": self.source, "Kind": "done", "Key": key, "Shard": shard, "Page": page},
+                      {"$set": {"Completed_At": now}}, upsert=True)
+            for key, shard, page in units
+        ), label=CHECKPOINT_COLLECTION)
+        self._done.update(units)
+
+
+# Function to Open the Checkpoints of a Run
+def open_checkpoints(db, source, resume=False):
+    """Returns the CheckpointStore of a source: loaded in resume mode, cleared otherwise."""
+    store = CheckpointStore(db, source)
+    if resume:
+        return store.load()
+    store.reset()
+    return store
@@ -0,0 +1,172 @@
+"""
+On-Disk HTTP Response Cache for the API Acquisition Scripts
+Responses are stored by a hash of endpoint + normalized params (API keys excluded).
+Closed historical ranges never expire; open-ended ranges expire after a TTL and are
+revalidated with conditional requests (ETag / Last-Modified) where the API supports them.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import pandas as pd
+
+
+# Cache location and policy (override with environment variables)
+CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", ".cache/http"))
+CACHE_ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+DEFAULT_TTL = float(os.getenv("HTTP_CACHE_TTL", str(6 * 3600)))           # seconds, open-ended ranges
+SETTLE_DAYS = int(os.getenv("HTTP_CACHE_SETTLE_DAYS", "7"))                # ranges ending earlier are closed
+
+# Parameters that never go into the cache key (credentials)
+SECRET_PARAMS = {"api_key", "api-key", "apikey", "token", "access_token"}
+
+
+# Function to Decide Whether a Date Range Can Still Change
+def is_closed_range(end, settle_days=SETTLE_DAYS):
+    """
+    Returns True when a range ending at `end` ('YYYY-MM-DD' or 'YYYYMMDD') lies in the past
+    (by more than `settle_days`), so its response can be cached without expiry.
+    """
+    if end is None:
+        return False
+    end = pd.Timestamp(str(end))
+    return end < pd.Timestamp.today().normalize() - pd.Timedelta(days=settle_days)
+
+
+class CachedResponse:
+    """A response served from the cache or from the network."""
+
+    def __init__(self, status, body, headers=None, from_cache=False):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class ResponseCache:
+    """
+    Content-addressed response store: <key>.body holds the raw body, <key>.json its metadata
+    (url, params without secrets, expiry, ETag / Last-Modified validators).
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=DEFAULT_TTL, enabled=CACHE_ENABLED):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.enabled = enabled
+
+    @staticmethod
+    def normalize_params(params):
+        """Sorted params with the credentials removed and every value as a string."""
+        return sorted((str(k), str(v)) for k, v in (params or {}).items() if str(k).lower() not in SECRET_PARAMS)
+
+    def key(self, url, params):
+        """Hash of the endpoint and its normalized params."""
+        spec = f"{url}?{urlencode(self.normalize_params(params))}"
+        return hashlib.sha256(spec.encode()).hexdigest()
+
+    def _paths(self, key):
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def lookup(self, url, params):
+        """
+        Returns (meta, body) of the cached response, or (None, None) if nothing is cached.
+        meta["fresh"] tells whether it can be used without asking the server.
+        """
+        if not self.enabled:
+            return None, None
+        meta_path, body_path = self._paths(self.key(url, params))
+        if not (meta_path.exists() and body_path.exists()):
+            return None, None
+        meta = json.loads(meta_path.read_text())
+        meta["fresh"] = meta["expires_at"] is None or meta["expires_at"] > time.time()
+        return meta, body_path.read_bytes()
+
+    @staticmethod
+    def conditional_headers(meta):
+        """Validators for a conditional request (the server answers 304 if nothing changed)."""
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(self, url, params, body, headers=None, closed=False):
+        """Stores a 200 response; closed historical ranges never expire."""
+        if not self.enabled:
+            return
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        meta = {
+            "url": url, "params": self.normalize_params(params), "stored_at": time.time(),
+            "expires_at": None if closed else time.time() + self.ttl,
+            "etag": headers.get("etag"), "last_modified": headers.get("last-modified"),
+        }
+        self._write(self.key(url, params), meta, body)
+
+    def refresh(self, url, params, meta, closed=False):
+        """Extends the expiry of an entry after the server confirmed it is unchanged (HTTP 304)."""
+        if not self.enabled:
+            return
+        meta = {k: v for k, v in meta.items() if k != "fresh"}
+        meta["expires_at"] = None if closed else time.time() + self.ttl
+        meta_path, _ = self._paths(self.key(url, params))
+        self._atomic_write(meta_path, json.dumps(meta).encode())
+
+    def _write(self, key, meta, body):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = self._paths(key)
+        self._atomic_write(body_path, body)
+        self._atomic_write(meta_path, json.dumps(meta).encode())
+
+    @staticmethod
+    def _atomic_write(path, data):
+        # Concurrent runs / threads never read a half-written file
+        tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+
+# Shared cache used by the acquisition scripts
+default_cache = ResponseCache()
+
+
+# Function to GET a URL through the Cache
+def cached_get(url, params, closed=False, cache=None, timeout=30, session=None, before_request=None):
+    """
+    GET with the response cache (synchronous, requests).
+    Args:
+        - url: Endpoint
+        - params: Query parameters (credentials are sent but not part of the cache key)
+        - closed: The request covers a closed historical range (cached without expiry)
+        - cache: ResponseCache (default: the shared on-disk cache)
+        - timeout: Request timeout in seconds
+        - session: Optional requests.Session
+        - before_request: Optional callable run before a network request (e.g. a rate limiter's
+          acquire), so responses served from the cache cost no quota
+
+    Returns:
+        - CachedResponse (status 200 from cache or network, or the error status of the server)
+    """
+    import requests
+
+    cache = cache or default_cache
+    meta, body = cache.lookup(url, params)
+    if meta and meta["fresh"]:
+        return CachedResponse(200, body, from_cache=True)
+
+    if before_request is not None:
+        before_request()
+    response = (session or requests).get(url, params=params, headers=cache.conditional_headers(meta), timeout=timeout)
+    if response.status_code == 304 and meta:
+        cache.refresh(url, params, meta, closed)
+        return CachedResponse(200, body, from_cache=True)
+    if response.status_code == 200:
+        cache.store(url, params, response.content, response.headers, closed)
+    return CachedResponse(response.status_code, response.content, dict(response.headers))
@@ -0,0 +1,245 @@
+"""
+Concurrent FRED Macro Acquisition Engine
+Fetches any number of FRED series in a thread pool under one rate limiter, aligns their mixed
+frequencies onto a daily index in one vectorized pass and stores a compact wide panel
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Make the project root importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from acquisition_storage.http_cache import cached_get, is_closed_range
+from acquisition_storage.rate_limit import ThreadTokenBucket, backoff_delay
+
+
+# FRED API settings (override with environment variables; FRED allows 120 requests per minute)
+FRED_URL = os.getenv("FRED_BASE_URL", "https://api.stlouisfed.org/fred/series/observations")
+REQUESTS_PER_MINUTE = float(os.getenv("FRED_REQUESTS_PER_MINUTE", "120"))
+MAX_WORKERS = int(os.getenv("FRED_WORKERS", "8"))
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Series stored by default, with the column names the feature pipeline reads
+DEFAULT_SERIES = {
+    "CPIAUCSL": "Inflation",
+    "GDP": "GDP",
+    "FEDFUNDS": "Interest_Rate",
+}
+
+
+# Function to Read a Series List File
+def load_series(path):
+    """
+    Reads series from a text file: one "SERIES_ID" or "SERIES_ID,Column" per line ('#' comments).
+    Returns:
+        - Dictionary {series_id: column name} (the series ID when no name is given)
+    """
+    series = {}
+    for line in Path(path).read_text().splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        series_id, _, column = (part.strip() for part in line.partition(","))
+        series[series_id] = column or DEFAULT_SERIES.get(series_id, series_id)
+    return series
+
+
+# Function to Fetch One FRED Series
+def fetch_series(series_id, start, end, api_key, limiter=None, base_url=FRED_URL, max_retries=MAX_RETRIES):
+    """
+    Downloads the observations of one series (through the HTTP cache, paced by the limiter).
+    Args:
+        - series_id: FRED series ID
+        - start, end: Observation range 'YYYY-MM-DD'
+        - api_key: FRED API key (not part of the cache key)
+        - limiter: Optional ThreadTokenBucket shared by all requests
+        - base_url: Observations endpoint
+        - max_retries: Retries after HTTP 429 / 5xx
+
+    Returns:
+        - Float Series indexed by observation date, or None on failure
+    """
+    params = {"series_id": series_id, "observation_start": start, "observation_end": end,
+              "api_key": api_key, "file_type": "json"}
+    for attempt in range(max_retries + 1):
+        response = cached_get(base_url, params, closed=is_closed_range(end),
+                              before_request=limiter.acquire if limiter is not None else None)
+        if response.status == 200:
+            observations = response.json().get("observations", [])
+            # Missing observations are reported as "."
+            values = pd.to_numeric([obs["value"] for obs in observations], errors="coerce")
+            dates = pd.to_datetime([obs["date"] for obs in observations])
+            return pd.Series(values, index=dates, name=series_id, dtype="float64").dropna()
+        if response.status not in RETRY_STATUSES or attempt == max_retries:
+            print(f"Error fetching {series_id}: {response.status}")
+            return None
+
+        retry_after = response.headers.get("Retry-After")
+        delay = float(retry_after) if retry_after and str(retry_after).isdigit() else backoff_delay(attempt)
+        if response.status == 429 and limiter is not None:
+            limiter.penalize(delay)
+        else:
+            time.sleep(delay)
+    return None
+
+
+# Function to Fetch Many Series Concurrently
+def fetch_panel(series, start, end, api_key, max_workers=MAX_WORKERS, requests_per_minute=REQUESTS_PER_MINUTE,
+                base_url=FRED_URL):
+    """
+    Fetches every series in a thread pool; one token bucket keeps the total request rate under the quota.
+    Args:
+        - series: Dictionary {series_id: column name} (or a list of series IDs)
+        - start, end: Observation range 'YYYY-MM-DD'
+        - api_key: FRED API key
+        - max_workers: Requests in flight
+        - requests_per_minute: API quota
+        - base_url: Observations endpoint
+
+    Returns:
+        - raw: Dictionary {column name: Series} of the fetched series
+        - summary: Dictionary (series, fetched, failed series IDs, seconds, slowest request seconds)
+    """
+    series = series if isinstance(series, dict) else {series_id: series_id for series_id in series}
+    limiter = ThreadTokenBucket(requests_per_minute / 60, capacity=min(max_workers, 10))
+    started = time.perf_counter()
+    raw, failed, durations = {}, [], []
+
+    def timed_fetch(series_id):
+        began = time.perf_counter()
+        result = fetch_series(series_id, start, end, api_key, limiter, base_url)
+        return result, time.perf_counter() - began
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(timed_fetch, series_id): series_id for series_id in series}
+        for future in as_completed(futures):
+            series_id = futures[future]
+            try:
+                result, seconds = future.result()
+            except Exception as e:
+                print(f"Error fetching {series_id}: {e}")
+                result, seconds = None, 0.0
+            durations.append(seconds)
+            if result is None or result.empty:
+                failed.append(series_id)
+            else:
+                raw[series[series_id]] = result
+
+    summary = {"series": len(series), "fetched": len(raw), "failed": sorted(failed),
+               "seconds": time.perf_counter() - started, "slowest": max(durations, default=0.0)}
+    return raw, summary
+
+
+# Function to Align Mixed-Frequency Series on One Daily Index
+def align_panel(raw, start, end, fill="bfill", dtype="float64"):
+    """
+    Aligns daily / weekly / monthly / quarterly series onto a continuous daily index in one pass:
+    one outer join of all series, one reindex and one fill over the whole panel.
+    Args:
+        - raw: Dictionary {column name: Series indexed by date}
+        - start, end: Daily range (inclusive)
+        - fill: "bfill" (backfill first, then forward-fill: the stored macroeco layout) or
+          "ffill" (as-of: each day takes the last published observation)
+        - dtype: Column dtype; "float32" halves the frame for in-memory analysis, but the stored
+          panel stays float64 (BSON doubles are 8 bytes either way, and 5.33 would come back as 5.329999923706055)
+
+    Returns:
+        - DataFrame with Date and one column per series
+    """
+    dates = pd.date_range(start=start, end=end, freq="D", name="Date")
+    if not raw:
+        return pd.DataFrame({"Date": dates})
+    wide = pd.concat(raw, axis=1).sort_index()
+    wide = wide.reindex(wide.index.union(dates))
+    wide = wide.bfill().ffill() if fill == "bfill" else wide.ffill().bfill()
+    wide = wide.reindex(dates).astype(dtype)
+    return wide.rename_axis("Date").reset_index()
+
+
+# Suffix of the complete copy a rewrite swaps in (while it exists, the swap is unfinished)
+REWRITE_SUFFIX = "__rewrite"
+
+
+# Function to Finish an Interrupted Rewrite
+def finish_rewrite(collection):
+    """
+    Swaps in the complete copy left by rewrite_collection, if there is one: the collection is dropped,
+    recreated with its layout and indexes, filled from the copy, and the copy is dropped last. A run
+    that stops midway leaves the copy, so the next call starts the swap again.
+    Returns:
+        - Number of documents restored (0 when no rewrite was pending)
+    """
+    from bulk_writer import bulk_insert
+    from schema_setup import ensure_collection
+
+    db, name = collection.database, collection.name
+    copy_name = name + REWRITE_SUFFIX
+    if copy_name not in db.list_collection_names():
+        return 0
+    db.drop_collection(name)
+    written = bulk_insert(ensure_collection(db, name), db[copy_name].find({}, {"_id": 0}))["inserted"]
+    db.drop_collection(copy_name)
+    return written
+
+
+# Function to Replace the Content of a Collection
+def rewrite_collection(collection, documents):
+    """
+    Replaces the documents of a collection without a window where rows are lost: the new content is
+    written to a staging collection, renamed to '<name>__rewrite' once complete (atomic), then swapped
+    in by finish_rewrite. Time-series collections (macroeco) cannot be renamed over or range-deleted,
+    hence the copy instead of renaming the staging collection over the target as feature_store does.
+    Returns:
+        - Number of documents written
+    """
+    from bulk_writer import bulk_insert
+
+    db = collection.database
+    staging = db[collection.name + "__staging"]
+    staging.drop()
+    bulk_insert(staging, documents)
+    staging.rename(collection.name + REWRITE_SUFFIX, dropTarget=True)
+    return finish_rewrite(collection)
+
+
+# Function to Store the Wide Panel
+def store_panel(collection, panel):
+    """
+    Stores one document per date with every series as a field. Idempotent: dates already stored with
+    the same values are skipped and new dates are inserted. When stored dates change (a new
+    observation backfills the days before it, or a series was added), the collection is rewritten
+    through a complete copy (see rewrite_collection); stored fields the panel lacks are kept.
+    Returns:
+        - Dictionary (inserted: new dates, changed: stored dates whose values changed)
+    """
+    finish_rewrite(collection)
+    if panel.empty:
+        return {"inserted": 0, "changed": 0}
+    panel = panel.assign(Date=pd.to_datetime(panel["Date"]))
+    first, last = panel["Date"].min().to_pydatetime(), panel["Date"].max().to_pydatetime()
+    stored = {pd.Timestamp(doc["Date"]): doc
+              for doc in collection.find({"Date": {"$gte": first, "$lte": last}}, {"_id": 0})}
+
+    new = panel.set_index("Date")
+    common = new.index[new.index.isin(list(stored))]
+    before = pd.DataFrame([stored[date] for date in common], index=common).reindex(columns=new.columns)
+    same = np.isclose(before.to_numpy(dtype="float64"), new.loc[common].to_numpy(dtype="float64"),
+                      rtol=1e-12, atol=0, equal_nan=True).all(axis=1)
+    changed = common[~same]
+    inserted = new.index.difference(common)
+
+    if len(changed):
+        rows = ({**stored.get(pd.Timestamp(row["Date"]), {}), **row} for row in panel.to_dict("records"))
+        kept = collection.find({"$or": [{"Date": {"$lt": first}}, {"Date": {"$gt": last}}]}, {"_id": 0})
+        rewrite_collection(collection, chain(kept, rows))
+    elif len(inserted):
+        collection.insert_many(panel[panel["Date"].isin(inserted)].to_dict("records"))
+    return {"inserted": len(inserted), "changed": len(changed)}
@@ -0,0 +1,272 @@
+"""
+Async NY Times Article Search Crawler
+Concurrent requests paced by a shared token bucket (the API quota), with bounded retries
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import aiohttp
+
+# Make the project root importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from acquisition_storage.http_cache import default_cache, is_closed_range
+from acquisition_storage.rate_limit import TokenBucket, backoff_delay
+
+
+# NY Times API details (override with environment variables, e.g. NYT_BASE_URL for the local stub server)
+API_KEY = os.getenv("NYT_API_KEY", os.getenv("API_KEY", "Add your details"))
+BASE_URL = os.getenv("NYT_BASE_URL", "https://api.nytimes.com/svc/search/v2/articlesearch.json")
+
+# Article Search quota: 5 requests per minute (500 per day)
+REQUESTS_PER_MINUTE = float(os.getenv("NYT_REQUESTS_PER_MINUTE", "5"))
+BURST = int(os.getenv("NYT_BURST", "1"))
+CONCURRENCY = int(os.getenv("NYT_CONCURRENCY", "4"))
+MAX_RETRIES = int(os.getenv("NYT_MAX_RETRIES", "6"))
+REQUEST_TIMEOUT = float(os.getenv("NYT_REQUEST_TIMEOUT", "30"))
+
+# The API returns 10 articles per page and serves pages 0..100 of a query, so one query reaches
+# at most PAGE_CEILING articles; windows with more hits are split into date shards
+PAGE_SIZE = 10
+MAX_PAGE = 100
+PAGE_CEILING = (MAX_PAGE + 1) * PAGE_SIZE
+SHARD_FILL = 0.8   # target share of the ceiling per shard (headroom for uneven news density)
+
+# Status codes that are retried with backoff (quota exceeded, transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# Function to Fetch One Page of Search Results
+async def fetch_page(session, limiter, keyword, from_date, to_date, page=0, max_retries=MAX_RETRIES,
+                     base_url=BASE_URL, cache=None):
+    """
+    Fetches one page of NY Times search results, retrying 429/5xx responses with backoff.
+    Pages already in the response cache are served without a request (and without a token).
+    Args:
+        - session: aiohttp ClientSession
+        - limiter: TokenBucket shared by all requests
+        - keyword: Search keyword
+        - from_date, to_date: Date range in YYYYMMDD format
+        - page: Page number
+        - max_retries: Retries before the page is given up
+        - base_url: Article Search endpoint
+        - cache: ResponseCache (default: the shared on-disk cache)
+
+    Returns:
+        - The "response" object of the API ({"docs": [...], "meta": {...}}), or None on failure.
+    """
+    params = {"q": keyword, "begin_date": from_date, "end_date": to_date, "page": page, "api-key": API_KEY}
+
+    # Historical windows never change: cached without expiry, open-ended ones are revalidated after a TTL
+    cache = cache or default_cache
+    closed = is_closed_range(to_date)
+    meta, body = cache.lookup(base_url, params)
+    if meta and meta["fresh"]:
+        return json.loads(body).get("response", {})
+
+    # Bounded loop instead of recursion: a storm of 429s ends after max_retries attempts
+    for attempt in range(max_retries + 1):
+        await limiter.acquire()
+        try:
+            async with session.get(base_url, params=params, headers=cache.conditional_headers(meta)) as response:
+                if response.status == 304 and meta:
+                    cache.refresh(base_url, params, meta, closed)
+                    return json.loads(body).get("response", {})
+                if response.status == 200:
+                    content = await response.read()
+                    cache.store(base_url, params, content, response.headers, closed)
+                    return json.loads(content).get("response", {})
+                if response.status not in RETRY_STATUSES:
+                    print(f"Error fetching data for '{keyword}', page {page}: {response.status} - {await response.text()}")
+                    return None
+                retry_after = response.headers.get("Retry-After")
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            retry_after, status = None, type(e).__name__
+
+        if attempt == max_retries:
+            break
+        delay = float(retry_after) if retry_after and retry_after.isdigit() else backoff_delay(attempt)
+        print(f"'{keyword}' page {page}: {status}, retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+        if status == 429:
+            # Quota exceeded: pause the shared bucket so every concurrent request backs off,
+            # the retry then waits in acquire()
+            limiter.penalize(delay)
+        else:
+            await asyncio.sleep(delay)
+
+    print(f"Giving up on '{keyword}', page {page} after {max_retries} retries.")
+    return None
+
+
+# Function to Split a Date Window into Shards
+def split_window(from_date, to_date, parts):
+    """
+    Splits the inclusive window [from_date, to_date] (YYYYMMDD) into `parts` consecutive
+    windows of (nearly) equal length, at most one per day.
+    """
+    begin = datetime.strptime(from_date, "%Y%m%d")
+    days = (datetime.strptime(to_date, "%Y%m%d") - begin).days + 1
+    parts = max(1, min(parts, days))
+    bounds = [begin + timedelta(days=days * i // parts) for i in range(parts + 1)]
+    return [(bounds[i].strftime("%Y%m%d"), (bounds[i + 1] - timedelta(days=1)).strftime("%Y%m%d"))
+            for i in range(parts)]
+
+
+# Function to Crawl Many Keywords Concurrently
+async def crawl(keywords, from_date, to_date, on_page, pages=None, concurrency=CONCURRENCY,
+                requests_per_minute=REQUESTS_PER_MINUTE, burst=BURST, base_url=BASE_URL, checkpoints=None):
+    """
+    Crawls every keyword over [from_date, to_date] with full coverage: page 0 of a window gives its
+    hit count, windows with more hits than the API can page through are split into date shards
+    (recursively), and the pages of every shard are queued. `concurrency` workers drain the queue,
+    all paced by one token bucket, so the crawl time is set by the quota.
+    With a CheckpointStore, window plans (hits / shards) are saved as they are made and pages whose
+    data is stored are skipped, so a resumed crawl only requests the missing pages.
+    Args:
+        - keywords: List of search keywords
+        - from_date, to_date: Date range in YYYYMMDD format
+        - on_page: Callback on_page(keyword, page, docs, unit) called as each page arrives;
+          unit = (keyword, shard, page) is the checkpoint key to mark once the docs are stored.
+          An awaitable result is awaited (e.g. NewsIngestor.add_async, which stores off the loop)
+        - pages: Optional maximum pages per shard (None = every page)
+        - concurrency: Requests in flight
+        - requests_per_minute, burst: API quota
+        - base_url: Article Search endpoint (e.g. the local stub server)
+        - checkpoints: Optional CheckpointStore (resume mode)
+
+    Returns:
+        - Summary dictionary (hits, shards, pages, requests queued, seconds).
+    """
+    start = time.perf_counter()
+    limiter = TokenBucket(requests_per_minute / 60, burst)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    queue = asyncio.Queue()
+    summary = {"hits": 0, "shards": 0, "pages": 0, "splits": 0, "truncated": 0, "skipped": 0}
+
+    for keyword in keywords:
+        print(f"Fetching NY Times news for keyword: '{keyword}'")
+        queue.put_nowait((keyword, from_date, to_date, 0))
+
+    def plan_window(keyword, begin, end, hits):
+        # Too many hits to page through: probe smaller windows instead (sized so each shard
+        # should fit under the ceiling; denser periods are split again)
+        if hits > PAGE_CEILING and begin != end:
+            return {"hits": hits, "shards": split_window(begin, end, math.ceil(hits / (PAGE_CEILING * SHARD_FILL)))}
+        return {"hits": hits, "shards": None}
+
+    def expand(keyword, begin, end, plan, have_first_page):
+        """Queues the shards or the pages of a planned window. Returns True for a leaf window."""
+        shard = f"{begin}-{end}"
+        if plan["shards"]:
+            summary["splits"] += 1
+            for shard_begin, shard_end in plan["shards"]:
+                queue.put_nowait((keyword, shard_begin, shard_end, 0))
+            return False
+        hits = plan["hits"]
+        if hits > PAGE_CEILING:
+            summary["truncated"] += hits - PAGE_CEILING
+            print(f"'{keyword}' {begin}: {hits} hits on a single day, only {PAGE_CEILING} reachable.")
+
+        last_page = min(math.ceil(hits / PAGE_SIZE), MAX_PAGE + 1, pages or MAX_PAGE + 1)
+        for next_page in range(0 if not have_first_page else 1, last_page):
+            if checkpoints is not None and checkpoints.is_done(keyword, shard, next_page):
+                summary["skipped"] += 1
+                continue
+            queue.put_nowait((keyword, begin, end, next_page, False))
+        summary["hits"] += hits
+        summary["shards"] += 1
+        eta = queue.qsize() / (requests_per_minute / 60)
+        print(f"'{keyword}' {shard}: {hits} hits, {last_page} pages "
+              f"({queue.qsize()} requests queued, ~{eta / 60:.1f} min at {requests_per_minute:g}/min)")
+        return True
+
+    async def handle(session, keyword, begin, end, page, probe=True):
+        # probe: page 0 of a window not planned yet (its hit count decides shards / pages)
+        shard = f"{begin}-{end}"
+        if page == 0 and probe and checkpoints is not None:
+            plan = checkpoints.plan(keyword, shard)
+            if plan is not None:
+                # Planned by an earlier run: no probe request, only the pages still missing
+                expand(keyword, begin, end, plan, have_first_page=False)
+                return
+        if checkpoints is not None and checkpoints.is_done(keyword, shard, page):
+            summary["skipped"] += 1
+            return
+
+        result = await fetch_page(session, limiter, keyword, begin, end, page, base_url=base_url)
+        if result is None:
+            return
+        docs = result.get("docs", [])
+        summary["pages"] += 1
+
+        if page == 0 and probe:
+            plan = plan_window(keyword, begin, end, (result.get("meta") or {}).get("hits", len(docs)))
+            if checkpoints is not None:
+                checkpoints.save_plan(keyword, shard, plan)
+            if not expand(keyword, begin, end, plan, have_first_page=True):
+                return
+
+        stored = on_page(keyword, page, docs, (keyword, shard, page))
+        if inspect.isawaitable(stored):
+            await stored
+
+    async def worker(session):
+        while True:
+            job = await queue.get()
+            try:
+                await handle(session, *job)
+            except Exception as e:
+                print(f"Error crawling {job}: {e}")
+            finally:
+                queue.task_done()
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        workers = [asyncio.create_task(worker(session)) for _ in range(concurrency)]
+        await queue.join()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+# Function to Run the Crawler from Synchronous Code
+def run_crawl(keywords, from_date, to_date, on_page, **kwargs):
+    """Runs `crawl` in a new event loop (see crawl for the arguments)."""
+    return asyncio.run(crawl(keywords, from_date, to_date, on_page, **kwargs))
+
+
+if __name__ == "__main__":
+    # Crawl against the local stub server: python acquisition_storage/nyt_crawler.py --stub
+    parser = argparse.ArgumentParser(description="Crawl NY Times search results (articles are counted, not stored).")
+    parser.add_argument("keywords", nargs="*", default=["S&P 500", "Inflation", "Economy"])
+    parser.add_argument("--pages", type=int, default=None, help="maximum pages per date shard (default: all)")
+    parser.add_argument("--from-date", default="20170401")
+    parser.add_argument("--to-date", default="20240401")
+    parser.add_argument("--rpm", type=float, default=REQUESTS_PER_MINUTE, help="requests per minute")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--stub", action="store_true", help="start the local stub server and crawl it")
+    args = parser.parse_args()
+
+    base_url = BASE_URL
+    if args.stub:
+        from acquisition_storage.nyt_stub_server import start_stub_server
+        server, base_url = start_stub_server(hits_per_day=3)
+
+    counts = {}
+    summary = run_crawl(args.keywords, args.from_date, args.to_date,
+                        lambda keyword, page, docs, unit: counts.update({keyword: counts.get(keyword, 0) + len(docs)}),
+                        pages=args.pages, concurrency=args.concurrency, requests_per_minute=args.rpm,
+                        base_url=base_url)
+    print(f"Fetched {sum(counts.values())} of {summary['hits']} articles for {len(counts)} keywords in "
+          f"{summary['shards']} shards, {summary['pages']} pages, {summary['seconds']:.1f}s")
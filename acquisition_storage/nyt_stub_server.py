@@ -0,0 +1,167 @@
+"""
+Local Stub of the NY Times Article Search API
+Serves deterministic fake articles (and optional 429s / latency) so the crawler can be run offline
+
+Usage: python acquisition_storage/nyt_stub_server.py --port 8765 --rpm 300
+       NYT_BASE_URL=http://127.0.0.1:8765/svc/search/v2/articlesearch.json python acquisition_storage/acquisition_news.py
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+SEARCH_PATH = "/svc/search/v2/articlesearch.json"
+PAGE_SIZE = 10
+
+
+class StubState:
+    """Settings and request counters shared by the handler threads."""
+
+    def __init__(self, hits=37, rpm=None, latency=0.0, hits_per_day=None, period=60.0, retry_after=None):
+        self.hits = hits          # Articles per keyword (or callable(keyword, begin, end) -> hits)
+        if hits_per_day is not None:
+            # Hits proportional to the window length (for the date-sharded crawl)
+            self.hits = lambda keyword, begin, end: round(hits_per_day * (
+                (datetime.strptime(end, "%Y%m%d") - datetime.strptime(begin, "%Y%m%d")).days + 1))
+        self.rpm = rpm            # Server-side quota per period; requests above it get HTTP 429
+        self.latency = latency    # Seconds added to every response
+        self.period = period      # Quota window in seconds (one minute, like the API; shorter in tests)
+        self.retry_after = retry_after  # Fixed Retry-After of a 429 (default: seconds until the quota frees up)
+        self.requests = 0
+        self.throttled = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._window = []
+
+    def allow(self):
+        """
+        Counts a request and checks it against the quota (sliding window of `period` seconds).
+        Returns None if the request is allowed, else the Retry-After seconds of the 429.
+        """
+        with self._lock:
+            self.requests += 1
+            if self.rpm is None:
+                return None
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < self.period]
+            if len(self._window) >= self.rpm:
+                self.throttled += 1
+                if self.retry_after is not None:
+                    return self.retry_after
+                # rpm=0 throttles every request (a 429 storm)
+                return math.ceil(self.period - (now - self._window[0])) if self._window else math.ceil(self.period)
+            self._window.append(now)
+            return None
+
+
+# Function to Build the Fake Articles of One Page
+def fake_articles(keyword, begin, end, page, hits):
+    """Deterministic articles for a keyword, spread evenly over [begin, end]."""
+    begin = datetime.strptime(begin, "%Y%m%d")
+    end = datetime.strptime(end, "%Y%m%d")
+    span = max((end - begin).days, 1)
+    docs = []
+    for i in range(page * PAGE_SIZE, min((page + 1) * PAGE_SIZE, hits)):
+        digest = hashlib.sha1(f"{keyword}|{begin:%Y%m%d}|{i}".encode()).hexdigest()[:12]
+        pub_date = begin + timedelta(days=(i * 7919) % span)
+        docs.append({
+            "headline": {"main": f"{keyword} headline {i}"},
+            "abstract": f"Abstract {i} about {keyword}, markets rally on strong earnings.",
+            "web_url": f"https://www.nytimes.com/stub/{digest}.html",
+            "pub_date": pub_date.strftime("%Y-%m-%dT%H:%M:%S+0000"),
+            "section_name": "Business Day",
+        })
+    return docs
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers Article Search requests from the StubState of the server."""
+
+    def do_GET(self):
+        state = self.server.state
+        url = urlparse(self.path)
+        if url.path != SEARCH_PATH:
+            return self._send(404, {"fault": "not found"})
+        if state.latency:
+            time.sleep(state.latency)
+        retry_after = state.allow()
+        if retry_after is not None:
+            return self._send(429, {"fault": {"faultstring": "Rate limit quota violation"}},
+                              {"Retry-After": str(retry_after)})
+
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        keyword = params.get("q", "")
+        begin, end = params.get("begin_date", "20170401"), params.get("end_date", "20240401")
+        page = int(params.get("page", 0))
+        hits = state.hits(keyword, begin, end) if callable(state.hits) else state.hits
+        if page > 100:
+            return self._send(400, {"fault": "page must be <= 100"})
+
+        docs = fake_articles(keyword, begin, end, page, hits)
+        body = {"status": "OK", "response": {"docs": docs, "meta": {"hits": hits, "offset": page * PAGE_SIZE}}}
+
+        # Conditional requests: unchanged content is answered with 304 and an empty body
+        etag = '"' + hashlib.sha1(json.dumps(body).encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            state.not_modified += 1
+            return self._send(304, None, {"ETag": etag})
+        self._send(200, body, {"ETag": etag})
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # keep crawler output readable
+
+
+# Function to Start the Stub Server in a Background Thread
+def start_stub_server(port=0, hits=37, rpm=None, latency=0.0, hits_per_day=None, period=60.0, retry_after=None):
+    """
+    Starts the stub server on localhost.
+    Args:
+        - port: TCP port (0 = any free port)
+        - hits: Articles per keyword
+        - rpm: Optional requests-per-minute quota (HTTP 429 above it)
+        - latency: Seconds added to every response
+        - hits_per_day: Optional articles per day of the requested window (overrides hits)
+        - period: Seconds of the quota window (rpm requests per period)
+        - retry_after: Optional fixed Retry-After of the 429 responses
+
+    Returns:
+        - (server, base_url); call server.shutdown() to stop it. server.state holds the counters.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(hits, rpm, latency, hits_per_day, period, retry_after)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}{SEARCH_PATH}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the NY Times Article Search API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--hits", type=int, default=37, help="articles per keyword")
+    parser.add_argument("--rpm", type=int, default=None, help="requests per minute before HTTP 429")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--hits-per-day", type=float, default=None,
+                        help="articles per day of the requested window (overrides --hits)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    server.state = StubState(args.hits, args.rpm, args.latency, args.hits_per_day)
+    print(f"Serving stub Article Search on http://127.0.0.1:{args.port}{SEARCH_PATH}")
+    server.serve_forever()
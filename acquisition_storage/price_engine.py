@@ -0,0 +1,259 @@
+"""
+Batched Multi-Ticker Price Acquisition Engine
+Downloads any ticker list in thread-pooled chunks, reshapes it to one long (Date, Ticker) frame
+of trading sessions and bulk-upserts the result
+"""
+
+import logging
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Make the project root importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from bulk_writer import bulk_upsert
+from trading_calendar import densify, sessions
+from watermark import latest_dates
+
+
+# Price fields stored per (Date, Ticker)
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+# Defaults for the engine (tickers per download request, downloads in flight)
+CHUNK_SIZE = 50
+MAX_WORKERS = 4
+
+# Checkpoint shard holding the planned download windows of a run (keyed by collection name)
+PLAN_SHARD = "download-plan"
+
+
+class PriceSource:
+    """
+    Interface of a price source.
+    fetch() returns a long DataFrame with columns Date, Ticker and PRICE_FIELDS (trading days only).
+    """
+
+    def fetch(self, tickers, start, end):
+        """Returns prices of `tickers` for start <= Date < end ('YYYY-MM-DD')."""
+        raise NotImplementedError
+
+
+class YFinanceSource(PriceSource):
+    """Yahoo Finance through yfinance: one multi-ticker request per chunk."""
+
+    def __init__(self, retries=2):
+        self.retries = retries
+
+    def fetch(self, tickers, start, end):
+        import yfinance as yf
+
+        for attempt in range(self.retries + 1):
+            try:
+                # auto_adjust=False keeps the "Adj Close" column the feature pipeline reads;
+                # threads=False because the engine already runs chunks in parallel
+                wide = yf.download(list(tickers), start=start, end=end, group_by="column",
+                                   auto_adjust=False, threads=False, progress=False)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logging.warning(f"Download of {len(tickers)} tickers failed ({e}), retrying...")
+                time.sleep(2 ** attempt)
+        return wide_to_long(wide, tickers)
+
+
+class FixtureSource(PriceSource):
+    """
+    Local stand-in for yfinance: reads a long CSV/Parquet file (Date, Ticker, PRICE_FIELDS),
+    or, without a file, generates a deterministic random walk per ticker on NYSE sessions.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._data = None
+        if path is not None:
+            reader = pd.read_parquet if str(path).endswith(".parquet") else pd.read_csv
+            self._data = reader(path)
+            self._data["Date"] = pd.to_datetime(self._data["Date"])
+
+    def fetch(self, tickers, start, end):
+        if self._data is not None:
+            data = self._data
+            mask = data["Ticker"].isin(tickers) & (data["Date"] >= start) & (data["Date"] < end)
+            return data.loc[mask, ["Date", "Ticker"] + PRICE_FIELDS].reset_index(drop=True)
+
+        dates = sessions(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        frames = []
+        for ticker in tickers:
+            # Seeded by ticker so every run (and every chunking) returns the same prices
+            rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(dates))))
+            frames.append(pd.DataFrame({
+                "Date": dates, "Ticker": ticker,
+                "Open": close * (1 + rng.normal(0, 0.003, len(dates))),
+                "High": close * 1.01, "Low": close * 0.99, "Close": close, "Adj Close": close * 0.98,
+                "Volume": rng.integers(1_000_000, 50_000_000, len(dates)).astype(float),
+            }))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["Date", "Ticker"] + PRICE_FIELDS)
+
+
+# Function to Reshape a yfinance Result into a Long Frame
+def wide_to_long(wide, tickers):
+    """
+    Reshapes the (field, ticker) column MultiIndex of a multi-ticker download into rows.
+    Args:
+        - wide: DataFrame indexed by Date
+        - tickers: Requested tickers (used when a single-ticker result has flat columns)
+
+    Returns:
+        - Long DataFrame with columns Date, Ticker and PRICE_FIELDS
+    """
+    if wide.empty:
+        return pd.DataFrame(columns=["Date", "Ticker"] + PRICE_FIELDS)
+    if not isinstance(wide.columns, pd.MultiIndex):
+        wide = pd.concat({tickers[0]: wide}, axis=1).swaplevel(axis=1)
+    wide.columns = wide.columns.set_names(["Price", "Ticker"])
+
+    long = wide.stack(level="Ticker", future_stack=True)
+    long = long.dropna(how="all").rename_axis(["Date", "Ticker"]).reset_index()
+    long.columns = [str(col) for col in long.columns]
+    long["Date"] = pd.to_datetime(long["Date"]).dt.tz_localize(None)
+    return long.reindex(columns=["Date", "Ticker"] + PRICE_FIELDS)
+
+
+# Function to Split a Ticker List into Chunks
+def chunked(tickers, size):
+    """Yields consecutive chunks of at most `size` tickers."""
+    for i in range(0, len(tickers), size):
+        yield tickers[i:i + size]
+
+
+# Function to Download, Fill and Store Prices for Many Tickers
+def acquire_prices(collection, tickers, start, end, source=None, incremental=False, lookback_days=7,
+                   chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS, checkpoints=None, calendar_days=False):
+    """
+    Downloads prices in thread-pooled chunks and upserts them by (Ticker, Date) as each chunk arrives.
+    Args:
+        - collection: pymongo Collection with a unique (Ticker, Date) index
+        - tickers: List of ticker symbols (any number)
+        - start, end: Date range 'YYYY-MM-DD' for a full run (end is exclusive, like yfinance)
+        - source: PriceSource (default YFinanceSource)
+        - incremental: Only fetch from a week before each ticker's latest stored Date, up to today
+        - lookback_days: Days re-downloaded and re-upserted before the watermark in incremental mode
+        - chunk_size: Tickers per download request
+        - max_workers: Downloads in flight
+        - checkpoints: Optional CheckpointStore; the download window of every ticker is planned once
+          and saved, tickers already stored for their planned window are skipped and every stored
+          chunk is marked, so an interrupted run resumes with the same windows (incremental
+          watermarks and today's end date move once chunks are stored or the day changes)
+        - calendar_days: Store one row per calendar day (legacy: gaps backfilled, then forward-filled)
+          instead of trading sessions only; consumers densify with trading_calendar.densify
+
+    Returns:
+        - Summary dictionary (tickers, missing tickers, skipped, rows, upserted, modified, errors, seconds)
+    """
+    source = source or YFinanceSource()
+    started = time.perf_counter()
+    tickers = list(dict.fromkeys(tickers))
+
+    # Plan the download window of every ticker; a resumed run reuses the saved plan of the same request
+    request = {"start": start, "end": None if incremental else end, "incremental": incremental,
+               "lookback_days": lookback_days}
+    plan = checkpoints.plan(collection.name, PLAN_SHARD) if checkpoints is not None else None
+    if plan is None or plan["request"] != request:
+        if incremental:
+            from watermark import open_end_date
+
+            end = open_end_date()
+        plan = {"request": request, "end": end, "starts": []}
+    end = plan["end"]
+    starts = dict(plan["starts"])
+    unplanned = [ticker for ticker in tickers if ticker not in starts]
+    if unplanned:
+        watermarks = latest_dates(collection, "Ticker", query={"Ticker": {"$in": unplanned}}) if incremental else {}
+        for ticker in unplanned:
+            watermark = watermarks.get(ticker)
+            starts[ticker] = start if watermark is None else (watermark - pd.Timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+        if checkpoints is not None:
+            # (ticker, start) pairs: tickers are not safe as document field names
+            checkpoints.save_plan(collection.name, PLAN_SHARD, dict(plan, starts=list(starts.items())))
+
+    # Group tickers by download window so each request shares one start date
+    windows = {}
+    skipped = 0
+    for ticker in tickers:
+        fetch_start = starts[ticker]
+        if checkpoints is not None and checkpoints.is_done(ticker, f"{fetch_start}-{end}"):
+            skipped += 1
+            continue
+        windows.setdefault(fetch_start, []).append(ticker)
+
+    jobs = [(fetch_start, chunk) for fetch_start, group in windows.items() for chunk in chunked(group, chunk_size)]
+    summary = {"tickers": len(tickers), "missing": [], "skipped": skipped,
+               "rows": 0, "upserted": 0, "modified": 0, "errors": 0}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(source.fetch, chunk, fetch_start, end): (fetch_start, chunk) for fetch_start, chunk in jobs}
+        for future in as_completed(futures):
+            fetch_start, chunk = futures[future]
+            try:
+                prices = future.result()
+            except Exception as e:
+                logging.error(f"Download failed for {len(chunk)} tickers ({chunk[0]}..{chunk[-1]}): {e}")
+                summary["missing"] += chunk
+                continue
+
+            summary["missing"] += sorted(set(chunk) - set(prices["Ticker"].unique()))
+            if calendar_days:
+                # Full runs fill up to the requested end (inclusive, as before); incremental runs
+                # stop at each ticker's last trading day
+                filled = densify(prices, fetch_start, None if incremental else end, by="Ticker", method="bfill")
+                filled = filled[["Date", "Ticker"] + [col for col in filled.columns if col not in ("Date", "Ticker")]]
+            else:
+                filled = prices.drop_duplicates(subset=["Ticker", "Date"], keep="last")
+            # The lookback rows before the watermark are upserted too (the (Ticker, Date) upsert is
+            # idempotent), so prices revised since the last run are corrected
+            if filled.empty:
+                mark_chunk(checkpoints, chunk, fetch_start, end)
+                continue
+
+            # Date stays a native datetime (stored as a BSON date) so range queries use the (Ticker, Date) index
+            result = bulk_upsert(collection, filled.to_dict("records"), keys=("Ticker", "Date"),
+                                 label=f"{chunk[0]}..{chunk[-1]}")
+            summary["rows"] += len(filled)
+            for key in ("upserted", "modified", "errors"):
+                summary[key] += result[key]
+            if not result["errors"]:
+                mark_chunk(checkpoints, chunk, fetch_start, end)
+
+    summary["seconds"] = time.perf_counter() - started
+    logging.info(f"{summary['tickers']} tickers, {summary['rows']} rows stored in {summary['seconds']:.1f}s "
+                 f"({summary['tickers'] / max(summary['seconds'], 1e-9):.1f} tickers/s), "
+                 f"{len(summary['missing'])} tickers without data")
+    return summary
+
+
+# Function to Checkpoint the Tickers of a Stored Chunk
+def mark_chunk(checkpoints, chunk, fetch_start, end):
+    """Marks every ticker of a stored chunk done for its download window (no-op without checkpoints)."""
+    if checkpoints is not None:
+        checkpoints.mark_done([(ticker, f"{fetch_start}-{end}", 0) for ticker in chunk])
+
+
+# Function to Read a Ticker List File
+def load_tickers(path):
+    """Reads tickers from a text file (one per line) or a CSV with a Symbol/Ticker column."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        frame = pd.read_csv(path)
+        column = next(col for col in frame.columns if col.lower() in ("symbol", "ticker"))
+        symbols = frame[column]
+    else:
+        symbols = pd.Series(path.read_text().split())
+    # Yahoo uses '-' for share classes (BRK.B -> BRK-B)
+    return symbols.astype(str).str.strip().str.replace(".", "-", regex=False).tolist()
@@ -0,0 +1,82 @@
+"""
+Rate Limiting & Retry Helpers for the API Crawlers
+A token bucket shared by all concurrent requests, and bounded exponential backoff with jitter
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second are added up to `capacity`.
+    Every request takes one token, so the request rate never exceeds the API quota
+    however many requests run concurrently.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        # The lock makes waiters queue up in order instead of all waking at the same refill
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def penalize(self, seconds):
+        """Empties the bucket for `seconds` (e.g. after an HTTP 429 with Retry-After)."""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class ThreadTokenBucket(TokenBucket):
+    """Thread-safe token bucket for thread-pooled (synchronous) clients, same pacing as TokenBucket."""
+
+    def __init__(self, rate, capacity=1):
+        super().__init__(rate, capacity)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and takes it."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        with self._lock:
+            super().penalize(seconds)
+
+
+# Function to Compute a Backoff Delay
+def backoff_delay(attempt, base=2.0, cap=120.0):
+    """
+    Exponential backoff with full jitter.
+    Args:
+        - attempt: Retry number (0 for the first retry)
+        - base: Delay of the first retry in seconds
+        - cap: Maximum delay in seconds
+
+    Returns:
+        - Delay in seconds, uniform in [0, min(cap, base * 2**attempt)].
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,238 @@
+"""
+Deduplicated, Batched Sentiment Ingestion for News Articles
+Articles are merged by URL, texts are scored once (memoized by hash) in process-pool batches,
+and stored with flat numeric sentiment fields in one upsert per URL: repeat sightings only add their keyword
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+# Make the project root importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from bulk_writer import bulk_write_batches
+
+
+# Scoring settings (override with environment variables)
+SCORE_WORKERS = int(os.getenv("SENTIMENT_WORKERS", str(os.cpu_count() or 1)))
+SCORE_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "256"))   # texts per pool task
+INLINE_THRESHOLD = 500   # fewer new texts than this are scored in-process (pool start-up costs more)
+FLUSH_SIZE = 500         # distinct articles buffered before they are scored and stored
+
+# One VADER analyzer per process (created on first use, also inside pool workers)
+_analyzer = None
+
+
+def _get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+# Function to Score a Batch of Texts (runs in the pool workers)
+def score_batch(texts):
+    """Returns the VADER polarity scores of every text."""
+    analyzer = _get_analyzer()
+    return [analyzer.polarity_scores(text) for text in texts]
+
+
+# Function to Hash a Text for the Score Cache
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class SentimentScorer:
+    """
+    VADER scorer with a score cache keyed by text hash: every distinct text is scored once,
+    new texts are scored in batches across a process pool.
+    """
+
+    def __init__(self, workers=SCORE_WORKERS, batch_size=SCORE_BATCH_SIZE):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.cache = {}
+        self.scored = 0
+        self._pool = None
+
+    def score(self, texts):
+        """
+        Scores texts, reusing cached scores.
+        Args:
+            - texts: List of strings
+
+        Returns:
+            - List of score dictionaries, in the order of `texts`.
+        """
+        hashes = [text_hash(text) for text in texts]
+        missing = {}
+        for text, digest in zip(texts, hashes):
+            if digest not in self.cache:
+                missing.setdefault(digest, text)
+
+        if missing:
+            pending = list(missing.values())
+            if self.workers > 1 and len(pending) >= INLINE_THRESHOLD:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+                scores = [score for batch in self._pool.map(score_batch, batches) for score in batch]
+            else:
+                scores = score_batch(pending)
+            self.cache.update(zip(missing.keys(), scores))
+            self.scored += len(pending)
+
+        return [self.cache[digest] for digest in hashes]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# Function to Flatten the Scores of an Article
+def flat_sentiment(title_scores, abstract_scores):
+    """
+    Returns the numeric sentiment fields stored on each article (read by the news_daily pipeline):
+    compound / pos / neg of title and abstract, and their compound average.
+    """
+    fields = {}
+    for prefix, scores in (("Title", title_scores), ("Abstract", abstract_scores)):
+        for key in ("compound", "pos", "neg"):
+            fields[f"{prefix}_{key.capitalize()}"] = float(scores.get(key, 0.0))
+    fields["Sentiment_Compound"] = (fields["Title_Compound"] + fields["Abstract_Compound"]) / 2
+    return fields
+
+
+# Function to Parse One API Article
+def parse_article(article):
+    """Returns the stored fields of an NY Times article (without sentiment), or None without a URL."""
+    url = article.get("web_url") or article.get("uri")
+    if not url:
+        return None
+    pub_date = datetime.strptime(article["pub_date"], "%Y-%m-%dT%H:%M:%S%z")
+    return {
+        "Date": datetime(pub_date.year, pub_date.month, pub_date.day),  # native BSON date (day resolution)
+        "Title": (article.get("headline") or {}).get("main"),
+        "Abstract": article.get("abstract"),
+        "URL": url,
+        "Source": "New York Times",
+        "Section": article.get("section_name"),
+    }
+
+
+class NewsIngestor:
+    """
+    Buffers crawled articles, merges them by URL, scores only articles not stored yet and
+    upserts one document per URL (SearchKeywords collects every keyword that found it).
+    With a CheckpointStore, the crawl units of the buffer are marked done after each flush.
+    From the async crawler use add_async: a full buffer is then scored and written on a worker
+    thread, so the event loop keeps serving requests meanwhile.
+    """
+
+    def __init__(self, collection, scorer=None, flush_size=FLUSH_SIZE, checkpoints=None):
+        self.collection = collection
+        self.scorer = scorer or SentimentScorer()
+        self.flush_size = flush_size
+        self.checkpoints = checkpoints
+        self.pending = {}     # URL -> parsed article
+        self.keywords = {}    # URL -> keywords seen in this buffer
+        self.units = []       # crawl units whose articles are in this buffer
+        self.dates = set()    # days whose articles or keywords changed (to refresh news_daily)
+        self.summary = {"seen": 0, "new": 0, "repeat": 0, "errors": 0}
+        self._flush_lock = asyncio.Lock()   # one buffer written at a time (add_async)
+
+    def add(self, keyword, articles, unit=None):
+        """
+        Buffers the articles of one search page (flushes when the buffer is full).
+        `unit` is the checkpoint key of the page, marked done once its articles are stored.
+        """
+        self._buffer(keyword, articles, unit)
+        if len(self.pending) >= self.flush_size:
+            self.flush()
+
+    async def add_async(self, keyword, articles, unit=None):
+        """add() for the async crawl callback: a full buffer is written with asyncio.to_thread."""
+        self._buffer(keyword, articles, unit)
+        if len(self.pending) >= self.flush_size:
+            buffer = self._take()
+            async with self._flush_lock:
+                await asyncio.to_thread(self._write, *buffer)
+
+    def _buffer(self, keyword, articles, unit):
+        for article in articles:
+            self.summary["seen"] += 1
+            try:
+                parsed = parse_article(article)
+            except Exception as e:
+                print(f"Error processing article: {e}")
+                continue
+            if parsed is None:
+                continue
+            self.pending.setdefault(parsed["URL"], parsed)
+            self.keywords.setdefault(parsed["URL"], []).append(keyword)
+        if unit is not None:
+            self.units.append(unit)
+
+    def _take(self):
+        """Hands over the buffer (articles, keywords, units) and starts an empty one."""
+        buffer = (self.pending, self.keywords, self.units)
+        self.pending, self.keywords, self.units = {}, {}, []
+        return buffer
+
+    def flush(self):
+        """Scores the new articles of the buffer and writes the buffer with one bulk upsert."""
+        self._write(*self._take())
+
+    def _write(self, pending, keywords, units):
+        if not pending:
+            self._mark_units(units)
+            return
+        urls = list(pending)
+        stored = {doc["URL"] for doc in self.collection.find({"URL": {"$in": urls}}, {"URL": 1, "_id": 0})}
+        new = [pending[url] for url in urls if url not in stored]
+
+        # Title and abstract of all new articles scored in one call (cached / pooled)
+        texts = [article["Title"] or "" for article in new] + [article["Abstract"] or "" for article in new]
+        scores = self.scorer.score(texts)
+
+        operations = []
+        for i, article in enumerate(new):
+            found_by = keywords[article["URL"]]
+            document = dict(article, SearchKeyword=found_by[0], **flat_sentiment(scores[i], scores[len(new) + i]))
+            operations.append(UpdateOne(
+                {"URL": article["URL"]},
+                {"$setOnInsert": document, "$addToSet": {"SearchKeywords": {"$each": found_by}}},
+                upsert=True,
+            ))
+        for url in stored:
+            # Repeat sighting: only the keyword list changes
+            operations.append(UpdateOne({"URL": url}, {"$addToSet": {"SearchKeywords": {"$each": keywords[url]}}}))
+
+        result = bulk_write_batches(self.collection, operations, label="news_data")
+        self.dates.update(article["Date"] for article in pending.values())
+        self.summary["new"] += len(new)
+        self.summary["repeat"] += len(stored)
+        self.summary["errors"] += result["errors"]
+        print(f"Stored {len(new)} new articles, {len(stored)} repeat sightings "
+              f"({self.scorer.scored} texts scored so far, {len(self.scorer.cache)} cached).")
+        if not result["errors"]:
+            self._mark_units(units)
+
+    def _mark_units(self, units):
+        # A buffer with write errors keeps its units unmarked, so a resumed crawl fetches them again
+        if self.checkpoints is not None and units:
+            self.checkpoints.mark_done(units)
+
+    def close(self):
+        """Flushes the remaining buffer and stops the scoring pool. Returns the summary."""
+        self.flush()
+        self.scorer.close()
+        return self.summary
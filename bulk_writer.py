@@ -0,0 +1,110 @@
+"""
+Batched MongoDB Writer
+Groups per-record writes into unordered bulk operations shared by the acquisition scripts
+"""
+
+import logging
+import os
+import time
+from itertools import islice
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from feature_store import META_COLLECTION
+
+
+# Operations sent per bulk_write call (override with the BULK_BATCH_SIZE environment variable)
+DEFAULT_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+
+
+# Function to Run Operations in Unordered Batches
+def bulk_write_batches(collection, operations, batch_size=DEFAULT_BATCH_SIZE, label=None):
+    """
+    Sends write operations to MongoDB in unordered batches and logs per-batch throughput.
+    Args:
+        - collection: pymongo Collection
+        - operations: Iterable of pymongo write operations (UpdateOne, InsertOne, ...)
+        - batch_size: Number of operations per bulk_write call
+        - label: Optional name used in log messages (defaults to the collection name)
+
+    Returns:
+        - Dictionary with inserted/upserted/modified/matched counts, error count and elapsed seconds.
+    """
+    label = label or collection.name
+    summary = {"batches": 0, "inserted": 0, "upserted": 0, "modified": 0, "matched": 0, "errors": 0, "seconds": 0.0}
+    iterator = iter(operations)
+
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+
+        start = time.perf_counter()
+        try:
+            result = collection.bulk_write(batch, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            # Unordered: the rest of the batch is still applied, only the failing operations are reported
+            result = e.details
+            for error in result.get("writeErrors", [])[:3]:
+                logging.error(f"[{label}] Bulk write error at op {error.get('index')}: {error.get('errmsg')}")
+        elapsed = time.perf_counter() - start
+
+        errors = len(result.get("writeErrors", []))
+        summary["batches"] += 1
+        summary["inserted"] += result.get("nInserted", 0)
+        summary["upserted"] += result.get("nUpserted", 0)
+        summary["modified"] += result.get("nModified", 0)
+        summary["matched"] += result.get("nMatched", 0)
+        summary["errors"] += errors
+        summary["seconds"] += elapsed
+
+        logging.info(
+            f"[{label}] Batch {summary['batches']}: {len(batch)} ops in {elapsed:.2f}s "
+            f"({len(batch) / max(elapsed, 1e-9):.0f} ops/s), {errors} errors"
+        )
+
+    return summary
+
+
+# Function to Upsert Records Matched on Key Fields
+def bulk_upsert(collection, records, keys, batch_size=DEFAULT_BATCH_SIZE, label=None):
+    """
+    Inserts or updates records matched on `keys`, in unordered batches.
+    Args:
+        - collection: pymongo Collection
+        - records: Iterable of dicts
+        - keys: Field names that identify a record (e.g. ("Ticker", "Date"))
+        - batch_size: Number of records per bulk_write call
+        - label: Optional name used in log messages
+
+    Returns:
+        - Summary dictionary from bulk_write_batches.
+    """
+    operations = (
+        UpdateOne({key: record[key] for key in keys}, {"$set": record}, upsert=True)
+        for record in records
+    )
+    summary = bulk_write_batches(collection, operations, batch_size, label)
+    # Documents changed in place keep the count and latest Date: bump the write counter the
+    # Parquet cache stamps collections with (feature_store.write_count)
+    if summary["modified"] and collection.name != META_COLLECTION:
+        collection.database[META_COLLECTION].update_one({"Name": collection.name}, {"$inc": {"Writes": 1}}, upsert=True)
+    return summary
+
+
+# Function to Insert Records in Unordered Batches
+def bulk_insert(collection, records, batch_size=DEFAULT_BATCH_SIZE, label=None):
+    """
+    Inserts records in unordered batches. Duplicate-key errors are reported, not raised.
+    Args:
+        - collection: pymongo Collection
+        - records: Iterable of dicts
+        - batch_size: Number of records per bulk_write call
+        - label: Optional name used in log messages
+
+    Returns:
+        - Summary dictionary from bulk_write_batches.
+    """
+    operations = (InsertOne(record) for record in records)
+    return bulk_write_batches(collection, operations, batch_size, label)
@@ -0,0 +1,146 @@
+"""
+Local Parquet Cache for MongoDB Collections
+Keeps a columnar copy of each collection on disk so reruns skip the Atlas round-trip
+(works with any storage backend from storage_backend.py)
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from feature_store import current_version, write_count
+from storage_backend import date_range_query
+
+
+# Cache location (override with the DATA_CACHE_DIR environment variable)
+CACHE_DIR = Path(os.getenv("DATA_CACHE_DIR", ".cache/collections"))
+
+# Set DATA_CACHE=0 to always read straight from MongoDB
+CACHE_ENABLED = os.getenv("DATA_CACHE", "1") != "0"
+
+
+# Function to encode a Date value for the JSON metadata file
+def _encode_date(value):
+    """Stores a Date value together with its type so it can be queried again later."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    return {"type": "str", "value": str(value)}
+
+
+# Function to decode a Date value from the JSON metadata file
+def _decode_date(value):
+    """Restores a Date value stored by _encode_date in its original type."""
+    if value is None:
+        return None
+    if value["type"] == "datetime":
+        return datetime.fromisoformat(value["value"])
+    return value["value"]
+
+
+# Function to Compute the Version Stamp of a Collection
+def collection_stamp(storage, name, date_col="Date", query=None):
+    """
+    Computes the version stamp of a collection (or of the documents matching a query).
+    Args:
+        - storage: StorageBackend
+        - name: Collection name
+        - date_col: Name of the date field
+        - query: Optional filter, e.g. a date range
+
+    Returns:
+        - Dictionary with the document count, the latest Date value, the published version
+          (collections swapped in by feature_store.publish_features) and the write counter
+          (upserts that changed stored documents in place).
+    """
+    count = storage.count(name, query)
+    max_date = storage.latest(name, date_col, query)
+    return {"count": count, "max_date": _encode_date(max_date), "version": current_version(storage, name),
+            "writes": write_count(storage, name)}
+
+
+# Function to Build the Cache Key of a Collection + Projection + Filter
+def _cache_key(name, fields, query):
+    """Each projection / date range of a collection is cached separately."""
+    if fields is None and not query:
+        return name
+    spec = json.dumps({"fields": fields, "query": query}, sort_keys=True, default=str)
+    digest = hashlib.sha1(spec.encode()).hexdigest()[:10]
+    return f"{name}-{digest}"
+
+
+# Function to Write a Collection to the Cache
+def _write_cache(key, df, stamp):
+    """Writes the DataFrame and its stamp to disk. Skips caching if the data is not serializable."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    data_path = CACHE_DIR / f"{key}.parquet"
+    meta_path = CACHE_DIR / f"{key}.json"
+
+    try:
+        df.to_parquet(data_path, index=False)
+    except (ValueError, TypeError) as e:
+        logging.warning(f"Could not cache '{key}' as Parquet: {e}")
+        meta_path.unlink(missing_ok=True)
+        return
+
+    meta_path.write_text(json.dumps({"key": key, "stamp": stamp}))
+
+
+# Function to Read a Collection Through the Cache
+def load_collection(storage, name, fields=None, start=None, end=None, query=None, date_col="Date",
+                    use_cache=CACHE_ENABLED):
+    """
+    Returns a collection as a DataFrame, served from the local cache when it is up to date.
+    Args:
+        - storage: StorageBackend (see storage_backend.get_storage)
+        - name: Collection name
+        - fields: Optional list of fields to project (cached separately per projection)
+        - start, end: Optional inclusive date bounds, evaluated by the server
+        - query: Optional extra filter (e.g. {"Ticker": {"$in": [...]}}, or {"Date": {"$lt": ...}})
+        - date_col: Name of the date field used for the version stamp
+        - use_cache: Set False to bypass the cache
+
+    Returns:
+        - Pandas DataFrame with `_id` removed and Date parsed to datetime64.
+    """
+    query = date_range_query(query, start, end, date_col)
+    if not use_cache:
+        return storage.read_frame(name, fields, query=query, date_col=date_col)
+
+    key = _cache_key(name, fields, query)
+    data_path = CACHE_DIR / f"{key}.parquet"
+    meta_path = CACHE_DIR / f"{key}.json"
+    stamp = collection_stamp(storage, name, date_col, query)
+
+    cached_stamp = None
+    if meta_path.exists() and data_path.exists():
+        cached_stamp = json.loads(meta_path.read_text())["stamp"]
+
+    # Collection unchanged -> serve straight from disk
+    if cached_stamp == stamp:
+        logging.info(f"Loading '{name}' from local cache...")
+        return pd.read_parquet(data_path)
+
+    # Only new documents were appended after the cached max Date (same published version, nothing
+    # rewritten in place) -> fetch just the tail
+    if (cached_stamp and cached_stamp["max_date"] and stamp["count"] > cached_stamp["count"]
+            and cached_stamp.get("version") == stamp["version"] and cached_stamp.get("writes") == stamp["writes"]):
+        cached_max = _decode_date(cached_stamp["max_date"])
+        tail_query = {"$and": [query, {date_col: {"$gt": cached_max}}]} if query else {date_col: {"$gt": cached_max}}
+        tail = storage.read_frame(name, fields, date_col=date_col, query=tail_query)
+        if len(tail) == stamp["count"] - cached_stamp["count"]:
+            logging.info(f"Refreshing '{name}' cache with {len(tail)} new documents...")
+            df = pd.concat([pd.read_parquet(data_path), tail], ignore_index=True)
+            _write_cache(key, df, stamp)
+            return df
+
+    logging.info(f"Fetching '{name}' from {type(storage).__name__}...")
+    df = storage.read_frame(name, fields, query=query, date_col=date_col)
+    _write_cache(key, df, stamp)
+    return df
@@ -1,31 +1,27 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-import seaborn as sns
 import logging
-from pymongo import MongoClient
-from mongoDB_setup import connect_mongo
-
-
-# Set up logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+from storage_backend import get_storage
+from data_cache import load_collection
 
 
 def visualize_data():
     """Fetches data from MongoDB, processes it, and generates visualizations."""
-    db = connect_mongo()
+    # Plotly is imported only when plots are actually drawn (it dominates the import time)
+    import plotly.graph_objects as go
+
+    storage = get_storage()
 
     # Function to fetch data
-    def fetch_data(collection_name):
-        """Fetches data from MongoDB and converts it to a DataFrame."""
-        return pd.DataFrame(list(db[collection_name].find()))
+    def fetch_data(collection_name, fields=None):
+        """Fetches data from MongoDB (through the local cache) and converts it to a DataFrame."""
+        return load_collection(storage, collection_name, fields=fields)
 
     logging.info("Fetching data from MongoDB SP500 Database...")
-    sp500_data = fetch_data("sp500_data")
-    macroeco_data = fetch_data("macroeco")
-    news_data = fetch_data("news_data")
-    top10_data = fetch_data("Top10_stocks")
+    sp500_data = fetch_data("sp500_data", ["Date", "Adj_Close"])
+    macroeco_data = fetch_data("macroeco", ["Date", "GDP", "Inflation", "Interest_Rate"])
+    news_data = fetch_data("news_daily", ["Date", "Avg_News_Sentiment"])   # one document per day
+    top10_data = fetch_data("Top10_stocks", ["Date", "Ticker", "Adj Close"])
 
     # Convert Date to Proper Format
     for df in [sp500_data, macroeco_data, news_data, top10_data]:
@@ -59,14 +55,7 @@ def visualize_data():
         macroeco_data[f"Normalized_{col}"] = normalize_series(macroeco_data[col])
 
     # Normalize News Sentiment
-    if "Sentiment" in news_data.columns:
-        news_data["Title_Sentiment"] = news_data["Sentiment"].apply(
-            lambda x: x.get("TitleSentiment", {}).get("compound", 0) if isinstance(x, dict) else 0
-        )
-        news_data["Abstract_Sentiment"] = news_data["Sentiment"].apply(
-            lambda x: x.get("AbstractSentiment", {}).get("compound", 0) if isinstance(x, dict) else 0
-        )
-        news_data["Avg_News_Sentiment"] = (news_data["Title_Sentiment"] + news_data["Abstract_Sentiment"]) / 2
+    if "Avg_News_Sentiment" in news_data.columns:
         news_data["Normalized_News_Sentiment"] = normalize_series(news_data["Avg_News_Sentiment"])
 
     # Merge Data for Visualization
@@ -141,4 +130,5 @@ def visualize_data():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
     visualize_data()
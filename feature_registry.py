@@ -0,0 +1,248 @@
+"""
+Declarative Feature Registry
+Features are declared as (name, kind, source column, window) and computed together in one fused,
+vectorized pass over a 2-D array with cumulative-sum and sliding-window kernels
+"""
+
+import argparse
+import logging
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Kinds of feature the engine computes (window = rows, span for ewma, horizon for forward_return)
+KINDS = ("standardize", "rolling_mean", "rolling_std", "rolling_min", "rolling_max", "lag",
+         "return", "zscore", "ewma", "forward_return")
+
+
+class FeatureSpec(NamedTuple):
+    """
+    One declared feature:
+        - name: Output column
+        - kind: One of KINDS
+        - column: Source column it is computed from
+        - window: Rows of the window / lag / horizon, or the EWMA span (None for standardize)
+        - model: Whether the MLP reads it (model features keep their registry order)
+    """
+    name: str
+    kind: str
+    column: str
+    window: Optional[int] = None
+    model: bool = True
+
+
+# Top 10 stocks used as features
+TOP10_STOCK_NAMES = ["AAPL", "MSFT", "AMZN", "NVDA", "GOOGL", "GOOG", "TSLA", "BRK-B", "META", "XOM"]
+
+
+# Function to Declare the Features of the Feature Table
+def default_registry(tickers=TOP10_STOCK_NAMES):
+    """Returns the FeatureSpecs of the published feature table, model features in the input order of the MLP."""
+    return [
+        FeatureSpec("Normalized_SP500_Adj_Close", "standardize", "Adj_Close"),
+        FeatureSpec("Normalized_GDP", "standardize", "GDP"),
+        FeatureSpec("Normalized_Inflation", "standardize", "Inflation"),
+        FeatureSpec("Normalized_Interest_Rate", "standardize", "Interest_Rate"),
+        *[FeatureSpec(f"Normalized_{ticker}_Adj_Close", "standardize", f"{ticker}_Adj_Close") for ticker in tickers],
+        FeatureSpec("Rolling_Mean_7", "rolling_mean", "Adj_Close", 7),
+        FeatureSpec("Rolling_Mean_30", "rolling_mean", "Adj_Close", 30),
+        FeatureSpec("Rolling_Volatility_30", "rolling_std", "Adj_Close", 30),
+        FeatureSpec("Lag_1", "lag", "Adj_Close", 1),
+        FeatureSpec("Lag_3", "lag", "Adj_Close", 3),
+        FeatureSpec("Lag_7", "lag", "Adj_Close", 7),
+        FeatureSpec("Normalized_Avg_News_Sentiment", "standardize", "Avg_News_Sentiment"),
+        # Stored but not model inputs
+        FeatureSpec("Normalized_Adj_Close", "standardize", "Adj_Close", model=False),
+        FeatureSpec("Future_Return_7", "forward_return", "Adj_Close", 7, model=False),
+    ]
+
+
+REGISTRY = default_registry()
+
+
+# Function to List the Model Features
+def model_features(registry=REGISTRY):
+    """Returns the names of the features the MLP reads, in registry order."""
+    return [spec.name for spec in registry if spec.model]
+
+
+# Function to Derive the Normalization of the Standardized Features
+def normalization_params(feature_table, features, registry=REGISTRY):
+    """
+    Returns {feature: (raw column, mean, std)} for the Normalized_* features, as fitted by
+    build_features over the whole feature table (population std, like StandardScaler).
+    The raw column is the one the registry declares, else the name without its prefix.
+    """
+    columns = {spec.name: spec.column for spec in registry if spec.kind == "standardize"}
+    params = {}
+    for feature in features:
+        if not feature.startswith("Normalized_"):
+            continue
+        column = columns.get(feature, feature[len("Normalized_"):])
+        if column in feature_table.columns:
+            values = pd.to_numeric(feature_table[column], errors="coerce")
+            params[feature] = (column, float(values.mean()), float(values.std(ddof=0)))
+    return params
+
+
+# Function to Declare a Grid of Candidate Features
+def candidate_features(columns, windows=(5, 10, 20, 60, 120, 250),
+                       kinds=("rolling_mean", "rolling_std", "rolling_min", "rolling_max", "lag", "return", "zscore", "ewma")):
+    """Returns one FeatureSpec per (kind, column, window), named '<column>_<kind>_<window>' (for feature search)."""
+    return [FeatureSpec(f"{column}_{kind}_{window}", kind, column, window, model=False)
+            for kind in kinds for column in columns for window in windows]
+
+
+def _shift(values, periods):
+    """Shifts rows down (positive) or up (negative), padding with NaN."""
+    shifted = np.full_like(values, np.nan)
+    if periods > 0:
+        shifted[periods:] = values[:-periods]
+    elif periods < 0:
+        shifted[:periods] = values[-periods:]
+    else:
+        shifted[:] = values
+    return shifted
+
+
+class WindowKernels:
+    """
+    Shared intermediates of one pass over a (rows, columns) array, e.g. source columns or a
+    dates x tickers panel, each computed once for all columns: column-centred cumulative sums
+    (window sums / sums of squares for any window), and per-window results reused across kinds.
+    """
+
+    def __init__(self, values):
+        self.values = values
+        # Centring keeps the sums of squares small, so variances do not lose precision
+        with np.errstate(all="ignore"):
+            self.center = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else np.zeros(values.shape[1])
+        valid = np.isfinite(values)
+        centred = np.where(valid, values - self.center, 0.0)
+        zero = np.zeros((1, values.shape[1]))
+        self.cumsum = np.vstack([zero, np.cumsum(centred, axis=0)])
+        self.cumsum_sq = np.vstack([zero, np.cumsum(centred * centred, axis=0)])
+        # A window with a missing value is NaN (like pandas rolling), not poisoned from there on
+        self.cumcount = np.vstack([zero, np.cumsum(valid, axis=0)])
+        self._cache = {}
+
+    def _memo(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def _window_sum(self, cumsum, window):
+        out = np.zeros_like(self.values)
+        if window <= len(self.values):
+            out[window - 1:] = cumsum[window:] - cumsum[:-window]
+        return out
+
+    def _complete_sum(self, cumsum, window):
+        """Window sums, NaN where the window is not full of valid values."""
+        complete = self._memo(("complete", window), lambda: self._window_sum(self.cumcount, window) == window)
+        return np.where(complete, self._window_sum(cumsum, window), np.nan)
+
+    def mean(self, window):
+        return self._memo(("mean", window), lambda: self._complete_sum(self.cumsum, window) / window + self.center)
+
+    def std(self, window):
+        def compute():
+            sums = self._complete_sum(self.cumsum, window)
+            squares = self._complete_sum(self.cumsum_sq, window)
+            # Sample standard deviation (ddof=1, like pandas rolling std)
+            return np.sqrt(np.maximum(squares - sums * sums / window, 0) / (window - 1))
+        return self._memo(("std", window), compute)
+
+    def extreme(self, window, func):
+        def compute():
+            out = np.full_like(self.values, np.nan)
+            if window <= len(self.values):
+                # Strided (n - window + 1, columns, window) view: no copy of the windows
+                out[window - 1:] = func(sliding_window_view(self.values, window, axis=0), axis=-1)
+            return out
+        return self._memo((func.__name__, window), compute)
+
+    def ewma(self, span):
+        return self._memo(("ewma", span), lambda: pd.DataFrame(self.values).ewm(span=span).mean().to_numpy())
+
+    def block(self, kind, window=None):
+        """Returns the (rows, columns) result of one kind and window, computed once per pass."""
+        values = self.values
+        if kind == "standardize":
+            return self.standardize()
+        if kind == "rolling_mean":
+            return self.mean(window)
+        if kind == "rolling_std":
+            return self.std(window)
+        if kind == "rolling_min":
+            return self.extreme(window, np.min)
+        if kind == "rolling_max":
+            return self.extreme(window, np.max)
+        if kind == "ewma":
+            return self.ewma(window)
+        if kind == "lag":
+            return self._memo(("lag", window), lambda: _shift(values, window))
+        if kind == "return":
+            return self._memo(("return", window), lambda: (values - self.block("lag", window)) / self.block("lag", window))
+        if kind == "zscore":
+            return self._memo(("zscore", window), lambda: (values - self.mean(window)) / self.std(window))
+        return self._memo(("forward_return", window), lambda: (_shift(values, -window) - values) / values)
+
+    def standardize(self):
+        # Population std over the whole column, as StandardScaler fits it (unit scale when constant)
+        def compute():
+            std = np.nanstd(self.values, axis=0)
+            return (self.values - np.nanmean(self.values, axis=0)) / np.where(std == 0, 1.0, std)
+        return self._memo(("standardize",), compute)
+
+
+# Function to Compute Declared Features in One Pass
+def compute_features(df, specs=REGISTRY):
+    """
+    Computes every spec whose source column is in df, in one vectorized pass: the source columns are
+    stacked into one 2-D float array and each kernel (window sums, strided min/max, shifts) runs once
+    per window for all columns together.
+    Args:
+        - df: DataFrame with the source columns, one row per period in time order
+        - specs: FeatureSpecs (default: the registry)
+
+    Returns:
+        - DataFrame of the features (index of df, registry order); leading rows without a full window are NaN
+    """
+    specs = [spec for spec in specs if spec.column in df.columns]
+    unknown = {spec.kind for spec in specs} - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown feature kinds: {sorted(unknown)}")
+    columns = list(dict.fromkeys(spec.column for spec in specs))
+    if not columns:
+        return pd.DataFrame(index=df.index)
+    values = df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+    position = {column: i for i, column in enumerate(columns)}
+    kernels = WindowKernels(values)
+
+    outputs = {}
+    # Returns of zero prices are inf / NaN like pandas, without a warning per column
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for spec in specs:
+            outputs[spec.name] = kernels.block(spec.kind, spec.window)[:, position[spec.column]]
+    return pd.DataFrame(outputs, index=df.index)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Time the registry engine on a grid of candidate features.")
+    parser.add_argument("--rows", type=int, default=2557, help="rows of synthetic prices (default: 2017-2024 daily)")
+    parser.add_argument("--columns", type=int, default=10, help="synthetic source columns")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (args.rows, args.columns)), axis=0)),
+                          columns=[f"P{i}" for i in range(args.columns)])
+    specs = candidate_features(prices.columns)
+    began = time.perf_counter()
+    features = compute_features(prices, specs)
+    logging.info(f"{features.shape[1]} candidate features over {args.rows} rows in {time.perf_counter() - began:.3f}s")
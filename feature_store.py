@@ -0,0 +1,112 @@
+"""
+Versioned Feature Store
+One materialized feature collection, published atomically; train/test are views over it
+"""
+
+import logging
+from datetime import datetime, timezone
+
+
+# Feature store collection read by MLP_model.fetch_data
+FEATURE_STORE = "feature_engineering"
+
+# Collection holding the published version of each store
+META_COLLECTION = "feature_store_meta"
+
+# Test window (Feb-Mar 2024); everything before TEST_START is training data
+TEST_START = datetime(2024, 2, 1)
+TEST_END = datetime(2024, 3, 31)
+
+# Train/test membership as filters over the store
+TRAIN_QUERY = {"Date": {"$lt": TEST_START}}
+TEST_QUERY = {"Date": {"$gte": TEST_START, "$lte": TEST_END}}
+SPLIT_VIEWS = {"train_data": TRAIN_QUERY, "test_data": TEST_QUERY}
+
+
+def _new_version():
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+# Function to Get the Published Version of a Store
+def current_version(storage, name=FEATURE_STORE):
+    """
+    Returns the version string of the last publish of `name`, or None if it was never published.
+    """
+    for doc in storage.find(META_COLLECTION, query={"Name": name}, fields=["Version"]):
+        return doc.get("Version")
+    return None
+
+
+# Function to Get the Write Counter of a Collection
+def write_count(storage, name):
+    """
+    Returns how many upserts changed stored documents of `name` in place (see record_write), 0 if none.
+    """
+    for doc in storage.find(META_COLLECTION, query={"Name": name}, fields=["Writes"]):
+        return doc.get("Writes") or 0
+    return 0
+
+
+# Function to Count an In-Place Write to a Collection
+def record_write(storage, name):
+    """
+    Bumps the write counter of `name` after an upsert modified stored documents, so caches whose
+    count and latest Date did not change still reload it (MongoDB collections written through
+    bulk_writer.bulk_upsert are counted there).
+    """
+    if name != META_COLLECTION:
+        storage.upsert_many(META_COLLECTION, [{"Name": name, "Writes": write_count(storage, name) + 1}],
+                            keys=("Name",))
+
+
+# Function to Publish a New Version of the Feature Store
+def publish_features(storage, df, name=FEATURE_STORE):
+    """
+    Writes the feature table once and swaps it in atomically.
+    Args:
+        - storage: StorageBackend (MongoDB writes a staging collection and renames it over the
+          store; SQLite replaces it in one transaction)
+        - df: Feature DataFrame (one row per Date)
+        - name: Feature store collection name
+
+    Returns:
+        - Version string of the published table.
+    """
+    version = _new_version()
+    rows = storage.replace_collection(name, df.to_dict("records"))
+
+    storage.upsert_many(META_COLLECTION, [{
+        "Name": name, "Version": version, "Rows": rows,
+        "Published_At": datetime.now(timezone.utc).replace(tzinfo=None),
+    }], keys=("Name",))
+
+    # Train/test are views over the store instead of two more copies of the same rows
+    for view, query in SPLIT_VIEWS.items():
+        storage.create_view(view, name, query)
+
+    logging.info(f"Published {rows} rows to '{name}' (version {version}).")
+    return version
+
+
+# Function to Record an In-Place Update of the Feature Store
+def touch_version(storage, name=FEATURE_STORE, added=0):
+    """
+    Gives the store a new version after rows were upserted into it (see incremental_features),
+    so caches stamped with the old version reload it.
+    Args:
+        - storage: StorageBackend
+        - name: Feature store collection name
+        - added: Number of rows added by the update
+
+    Returns:
+        - New version string.
+    """
+    rows = 0
+    for doc in storage.find(META_COLLECTION, query={"Name": name}, fields=["Rows"]):
+        rows = doc.get("Rows") or 0
+    version = _new_version()
+    storage.upsert_many(META_COLLECTION, [{
+        "Name": name, "Version": version, "Rows": rows + added,
+        "Updated_At": datetime.now(timezone.utc).replace(tzinfo=None),
+    }], keys=("Name",))
+    return version
@@ -0,0 +1,118 @@
+"""
+Import-Time Budget Check
+Imports each pipeline entry point in a fresh interpreter with `python -X importtime` and fails if
+it pulls in a plotting library or the MongoDB driver, if the project's own modules do real
+work at import time (connections, downloads, pipelines) instead of only defining functions, or
+if importing it configures logging (installs handlers on the root logger).
+
+Usage: python import_budget.py [--project-ms 100] [--total-ms MS]  (also run by tests/test_import_budget.py)
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# Entry points that must import cheaply (training-only / library use)
+ENTRY_POINTS = ["main", "MLP_model", "preprocess_feature", "data_exploration", "feature_store",
+                "storage_backend", "data_cache", "feature_registry", "memory_report", "incremental_features",
+                "streaming", "news_daily", "panel_features", "intraday_store", "schema_setup"]
+
+# Modules whose job is setting up the database: they may load the MongoDB driver
+DATABASE_MODULES = {"schema_setup"}
+
+# Budget for the full import, third-party libraries included, in ms (pandas alone takes ~0.5 s,
+# scikit-learn another second; IMPORT_BUDGET_SCALE loosens every budget on slow machines)
+BUDGET_SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+TOTAL_BUDGET_MS = {"main": 3000, "MLP_model": 3000, "feature_store": 250}
+DEFAULT_TOTAL_MS = 1500
+PROJECT_MS = 100
+
+# Packages that only plotting paths or actual database access may load
+DEFERRED_PACKAGES = {"matplotlib", "plotly", "seaborn", "pymongo", "mongoDB_setup", "dotenv"}
+
+# Project modules (their own import time should be only function definitions)
+PROJECT_MODULES = {path.stem for path in PROJECT_ROOT.glob("*.py")}
+
+
+# Function to Measure the Imports of One Module
+def measure_imports(module):
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+    Args:
+        - module: Module name
+
+    Returns:
+        - List of (name, self_us, cumulative_us) for every module imported, and the number of
+          handlers on the root logger after the import.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import {module}, logging; print(len(logging.getLogger().handlers))"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports, int(result.stdout.split()[-1])
+
+
+# Function to Get the Total Import Budget of an Entry Point
+def total_budget(module):
+    """Returns the full-import budget of an entry point in ms (scaled by IMPORT_BUDGET_SCALE)."""
+    return TOTAL_BUDGET_MS.get(module, DEFAULT_TOTAL_MS) * BUDGET_SCALE
+
+
+# Function to Check One Entry Point against the Budget
+def check_module(module, project_ms=PROJECT_MS, total_ms=None):
+    """
+    Returns a list of budget violations for one entry point (empty when it is within budget).
+    total_ms: budget of the full import (default: total_budget(module); 0 = off)
+    """
+    total_ms = total_budget(module) if total_ms is None else total_ms
+    imports, root_handlers = measure_imports(module)
+    names = {name.split(".")[0] for name, _, _ in imports}
+    total = next(cumulative for name, _, cumulative in imports if name == module) / 1000
+    own = sum(self_us for name, self_us, _ in imports if name.split(".")[0] in PROJECT_MODULES) / 1000
+
+    print(f"{module:<20} total {total:8.1f} ms   project modules {own:6.1f} ms")
+
+    deferred = set() if module in DATABASE_MODULES else DEFERRED_PACKAGES & names
+    problems = [f"{module} imports {package} at import time" for package in sorted(deferred)]
+    if root_handlers:
+        problems.append(f"{module} configures logging at import time ({root_handlers} root logger handlers; "
+                        f"call logging.basicConfig under `if __name__ == \"__main__\":`)")
+    if own > project_ms:
+        problems.append(f"{module}: project modules took {own:.1f} ms to import (budget {project_ms} ms)")
+    if total_ms and total > total_ms:
+        problems.append(f"{module}: import took {total:.1f} ms (budget {total_ms} ms)")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the pipeline modules.")
+    parser.add_argument("--project-ms", type=float, default=PROJECT_MS,
+                        help="budget for the self time of the project's own modules, per entry point")
+    parser.add_argument("--total-ms", type=float, default=None,
+                        help="budget for the full import, third-party libraries included "
+                             "(default: TOTAL_BUDGET_MS per entry point, 0 = off)")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    args = parser.parse_args()
+
+    problems = []
+    for module in args.modules:
+        problems += check_module(module, args.project_ms, args.total_ms)
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,249 @@
+"""
+Incremental Feature Engine
+Extends the feature store day by day from persisted rolling state (window buffer, running sums and
+sums of squares): each new day costs O(window) work, however long the stored history is
+"""
+
+import argparse
+import logging
+import math
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from storage_backend import get_storage
+from feature_store import FEATURE_STORE, current_version, touch_version
+from feature_registry import normalization_params
+from preprocess_feature import TOP10_STOCK_NAMES, clean_dataframe, load_sources, pivot_top10
+from trading_calendar import densify
+
+
+# Collection holding the rolling state of each feature store
+STATE_COLLECTION = "feature_state"
+
+# Windows of build_features, in calendar-day rows
+WINDOW = 30
+SHORT_WINDOW = 7
+LAGS = (1, 3, 7)
+HORIZON = 7
+
+# Columns computed from the Adj_Close history rather than read from the sources
+DERIVED = ["Rolling_Mean_7", "Rolling_Mean_30", "Rolling_Volatility_30"] + [f"Lag_{lag}" for lag in LAGS]
+TARGETS = ["Future_Return_7", "Price_Direction"]
+
+
+class RollingState:
+    """
+    Everything the next feature row depends on:
+        - the last WINDOW calendar days (Date, Adj_Close) and the running sums over them
+        - the raw source values of the last row, carried forward on days without new observations
+        - the Normalized_* parameters fitted by the last full build (frozen until the next one)
+    """
+
+    def __init__(self, dates, closes, last_row, normalization, version=None):
+        self.dates = deque((pd.Timestamp(date) for date in dates), maxlen=WINDOW)
+        self.closes = deque((float(close) for close in closes), maxlen=WINDOW)
+        self.last_row = dict(last_row)
+        self.normalization = {feature: tuple(params) for feature, params in normalization.items()}
+        self.version = version
+        # The stored sums are recomputed from the buffer on load, which clears floating-point drift
+        window = list(self.closes)
+        self.sum_short = sum(window[-SHORT_WINDOW:])
+        self.sum_long = sum(window)
+        self.sumsq_long = sum(close * close for close in window)
+
+    @classmethod
+    def from_table(cls, table, version=None):
+        """Builds the state from a published feature table (its last WINDOW rows and normalization)."""
+        table = table.sort_values("Date")
+        tail = table.tail(WINDOW)
+        raw_columns = [col for col in table.columns
+                       if col != "Date" and not col.startswith("Normalized_") and col not in DERIVED + TARGETS]
+        last_row = {col: _plain(value) for col, value in table[raw_columns].iloc[-1].items()}
+        normalized = [col for col in table.columns if col.startswith("Normalized_")]
+        return cls(tail["Date"], tail["Adj_Close"], last_row, normalization_params(table, normalized), version)
+
+    @classmethod
+    def from_doc(cls, doc):
+        return cls(doc["Dates"], doc["Closes"], doc["Last_Row"], doc["Normalization"], doc.get("Version"))
+
+    def to_doc(self, name):
+        return {
+            "Name": name, "Version": self.version,
+            "Dates": [date.to_pydatetime() for date in self.dates], "Closes": list(self.closes),
+            "Sum_7": self.sum_short, "Sum_30": self.sum_long, "Sum_Squares_30": self.sumsq_long,
+            "Last_Row": self.last_row,
+            "Normalization": {feature: list(params) for feature, params in self.normalization.items()},
+            "Updated_At": datetime.now(timezone.utc).replace(tzinfo=None),
+        }
+
+    @property
+    def last_date(self):
+        return self.dates[-1]
+
+    def push(self, date, close):
+        """
+        Appends one calendar day, updating the running sums in O(1).
+        Returns:
+            - Dictionary of the derived features of the day (as build_features computes them)
+            - (date, Future_Return_7) of the row HORIZON days earlier, now known, or None
+        """
+        close = float(close)
+        if len(self.closes) >= SHORT_WINDOW:
+            self.sum_short -= self.closes[-SHORT_WINDOW]
+        if len(self.closes) == WINDOW:
+            self.sum_long -= self.closes[0]
+            self.sumsq_long -= self.closes[0] * self.closes[0]
+        self.dates.append(pd.Timestamp(date))
+        self.closes.append(close)
+        self.sum_short += close
+        self.sum_long += close
+        self.sumsq_long += close * close
+
+        count = len(self.closes)
+        full = count >= WINDOW
+        # Sample standard deviation (ddof=1, like pandas rolling std) from the sums of squares
+        variance = max(self.sumsq_long - self.sum_long ** 2 / WINDOW, 0.0) / (WINDOW - 1) if full else 0.0
+        features = {
+            "Rolling_Mean_7": self.sum_short / SHORT_WINDOW if count >= SHORT_WINDOW else 0.0,
+            "Rolling_Mean_30": self.sum_long / WINDOW if full else 0.0,
+            "Rolling_Volatility_30": math.sqrt(variance),
+        }
+        for lag in LAGS:
+            features[f"Lag_{lag}"] = self.closes[-1 - lag] if count > lag else 0.0
+
+        target = None
+        if count > HORIZON:
+            base = self.closes[-1 - HORIZON]
+            target = (self.dates[-1 - HORIZON], (close - base) / base)
+        return features, target
+
+
+def _plain(value):
+    """Converts numpy scalars to Python values so the state can be stored."""
+    return value.item() if hasattr(value, "item") else value
+
+
+# Function to Load the Rolling State of the Feature Store
+def load_state(storage, name=FEATURE_STORE):
+    """
+    Returns the persisted RollingState of `name`. After a full publish (new version) the state is
+    rebuilt once from the published table.
+    """
+    version = current_version(storage, name)
+    if version is None:
+        raise RuntimeError(f"Feature store '{name}' was never published, run preprocess_feature.py first.")
+    for doc in storage.find(STATE_COLLECTION, query={"Name": name}):
+        if doc.get("Version") == version:
+            return RollingState.from_doc(doc)
+
+    logging.info(f"Building the rolling state of '{name}' (version {version}) from the published table...")
+    return RollingState.from_table(storage.read_frame(name), version)
+
+
+# Function to Save the Rolling State
+def save_state(storage, state, name=FEATURE_STORE):
+    storage.upsert_many(STATE_COLLECTION, [state.to_doc(name)], keys=("Name",))
+
+
+# Function to Assemble the Raw Rows of the New Days
+def new_raw_rows(storage, state, end_date=None, tickers=TOP10_STOCK_NAMES):
+    """
+    Reads only the source documents after the last stored day and densifies them to calendar days,
+    continuing from the last stored row (as-of: each day takes the last known value of every column).
+    Returns:
+        - DataFrame with one row per new day, up to the last S&P 500 session read (empty if none)
+    """
+    start = state.last_date + pd.Timedelta(days=1)
+    end = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp.now().normalize()
+    if start > end:
+        return pd.DataFrame()
+
+    sp500_data, macroeco_data, news_data, top10_data = load_sources(storage, start, end, tickers)
+    sp500_data = clean_dataframe(sp500_data, "S&P 500")
+    if sp500_data.empty:
+        return pd.DataFrame()
+
+    frames = [sp500_data, clean_dataframe(macroeco_data, "Macroeco")]
+    news_data = clean_dataframe(news_data, "News")
+    if "Avg_News_Sentiment" in news_data.columns:
+        frames.append(news_data[["Date", "Avg_News_Sentiment"]])
+    top10_data = clean_dataframe(top10_data, "Top 10 Stocks")
+    if not top10_data.empty:
+        frames.append(pivot_top10(top10_data, tickers))
+
+    observed = None
+    for frame in frames:
+        if not frame.empty:
+            observed = frame if observed is None else observed.merge(frame, on="Date", how="outer")
+
+    # The last stored row seeds the fill, so a new day never looks ahead for a missing value
+    columns = ["Date"] + list(state.last_row)
+    seed = pd.DataFrame([{"Date": state.last_date, **state.last_row}])
+    observed = observed.reindex(columns=columns)
+    rows = densify(pd.concat([seed, observed], ignore_index=True), state.last_date, sp500_data["Date"].max())
+    if "Return" in rows.columns:
+        rows.loc[~rows["Date"].isin(sp500_data["Date"]), "Return"] = 0
+    return rows[rows["Date"] > state.last_date][columns].reset_index(drop=True)
+
+
+# Function to Extend the Feature Store with the New Days
+def update_features(storage=None, end_date=None, name=FEATURE_STORE):
+    """
+    Computes the feature rows of the days after the last stored one, upserts them on Date and
+    backfills Future_Return_7 / Price_Direction of the rows whose 7-day-ahead price became known
+    (rows added here keep an empty target until then).
+    Args:
+        - storage: StorageBackend (default: the configured backend)
+        - end_date: Last day to add (default: today)
+        - name: Feature store collection name
+
+    Returns:
+        - Summary dictionary (added rows, backfilled targets, last date, seconds)
+    """
+    storage = storage if storage is not None else get_storage()
+    started = time.perf_counter()
+    state = load_state(storage, name)
+    raw = new_raw_rows(storage, state, end_date)
+    if raw.empty:
+        logging.info(f"'{name}' is up to date ({state.last_date:%Y-%m-%d}).")
+        return {"added": 0, "backfilled": 0, "last_date": state.last_date, "seconds": time.perf_counter() - started}
+
+    rows, targets = {}, {}
+    for record in raw.to_dict("records"):
+        date = pd.Timestamp(record["Date"])
+        features, target = state.push(date, record["Adj_Close"])
+        row = {**record, "Date": date.to_pydatetime(), **features, "Future_Return_7": None, "Price_Direction": None}
+        for feature, (column, mean, std) in state.normalization.items():
+            # StandardScaler leaves a zero-variance column unscaled
+            row[feature] = (record[column] - mean) / (std or 1.0)
+        rows[date] = row
+        state.last_row = {col: _plain(record[col]) for col in state.last_row}
+
+        if target is not None:
+            target_date, value = target
+            known = {"Future_Return_7": value, "Price_Direction": int(value > 0)}
+            if target_date in rows:
+                rows[target_date].update(known)
+            else:
+                targets[target_date] = {"Date": target_date.to_pydatetime(), **known}
+
+    storage.upsert_many(name, list(targets.values()) + list(rows.values()), keys=("Date",))
+    state.version = touch_version(storage, name, added=len(rows))
+    save_state(storage, state, name)
+
+    summary = {"added": len(rows), "backfilled": len(targets), "last_date": state.last_date,
+               "seconds": time.perf_counter() - started}
+    logging.info(f"Added {summary['added']} rows to '{name}' up to {state.last_date:%Y-%m-%d}, "
+                 f"backfilled {summary['backfilled']} targets in {summary['seconds']:.2f}s.")
+    return summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Append the new days to the feature store from the rolling state.")
+    parser.add_argument("--end", help="last day to add (YYYY-MM-DD, default: today)")
+    args = parser.parse_args()
+    update_features(end_date=args.end)
@@ -0,0 +1,259 @@
+"""
+Compact Intraday Bar Store
+Minute bars as compressed columnar blocks: one Parquet file per (ticker, month), one row group per
+(ticker, day), float32 prices and integer time / volume columns; the reader resamples on the fly
+"""
+
+import argparse
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+# Store location (override with the INTRADAY_DIR environment variable)
+INTRADAY_DIR = Path(os.getenv("INTRADAY_DIR", "data/intraday"))
+
+# Session open in exchange time (09:30 New York): intraday bars are anchored here
+SESSION_OPEN_MINUTE = 9 * 60 + 30
+
+# Stored columns and their on-disk types (the ticker and month are in the file path)
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+BLOCK_DTYPES = {"Day": "int8", "Minute": "int16", "Open": "float32", "High": "float32",
+                "Low": "float32", "Close": "float32", "Volume": "int64"}
+COMPRESSION = "zstd"
+
+# Collection the document-per-bar side of the benchmark writes to (dropped after the run)
+BENCHMARK_COLLECTION = "benchmark_intraday"
+
+
+class IntradayStore:
+    """
+    Minute bars under <root>/<TICKER>/<YYYY-MM>.parquet. Each file holds one row group per trading
+    day (Day = day of month, Minute = minutes since midnight exchange time), so a date-range read
+    only decompresses the days it needs.
+    """
+
+    def __init__(self, root=INTRADAY_DIR):
+        self.root = Path(root)
+
+    def _path(self, ticker, month):
+        return self.root / ticker / f"{month:%Y-%m}.parquet"
+
+    def write(self, bars):
+        """
+        Stores minute bars, replacing days that are already stored.
+        Args:
+            - bars: Long DataFrame with Time (exchange time, naive), Ticker, Open, High, Low, Close, Volume
+
+        Returns:
+            - Number of bars written
+        """
+        if bars.empty:
+            return 0
+        bars = bars.assign(Time=pd.to_datetime(bars["Time"]))
+        bars = bars.drop_duplicates(subset=["Ticker", "Time"], keep="last")
+        bars["Month"] = bars["Time"].dt.to_period("M").dt.to_timestamp()
+        written = 0
+        for (ticker, month), group in bars.groupby(["Ticker", "Month"], sort=False):
+            block = to_block(group)
+            path = self._path(ticker, month)
+            if path.exists():
+                stored = pd.read_parquet(path)
+                block = pd.concat([stored[~stored["Day"].isin(block["Day"].unique())], block], ignore_index=True)
+            self._write_file(path, block)
+            written += len(group)
+        return written
+
+    def _write_file(self, path, block):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        block = block.sort_values(["Day", "Minute"], kind="stable").reset_index(drop=True)
+        table = pa.Table.from_pandas(block, preserve_index=False)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with pq.ParquetWriter(tmp, table.schema, compression=COMPRESSION) as writer:
+            # One row group per day: the Day statistics let readers skip whole days
+            bounds = np.flatnonzero(np.diff(block["Day"].to_numpy())) + 1
+            for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(block)]):
+                writer.write_table(table.slice(start, stop - start))
+        os.replace(tmp, path)
+
+    def tickers(self):
+        return sorted(path.name for path in self.root.iterdir() if path.is_dir()) if self.root.exists() else []
+
+    def read(self, tickers, start, end, bar="1min", fields=None):
+        """
+        Reads bars of the given tickers for start <= day <= end, resampled to `bar`.
+        Args:
+            - tickers: Ticker or list of tickers
+            - start, end: First and last day (inclusive)
+            - bar: Bar size ("1min", "5min", "30min", "1h", "1D", ...); intraday bars are anchored
+              at the 09:30 session open, "1D" gives one bar per session
+            - fields: Optional subset of Open, High, Low, Close, Volume
+
+        Returns:
+            - Long DataFrame with Time, Ticker and the fields
+        """
+        import pyarrow.parquet as pq
+
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        fields = list(fields or PRICE_COLUMNS + ["Volume"])
+        columns = ["Day", "Minute"] + [col for col in ("Open", "High", "Low", "Close", "Volume") if col in fields]
+        frames = []
+        for ticker in tickers:
+            for month in pd.period_range(start, end, freq="M").to_timestamp():
+                path = self._path(ticker, month)
+                if not path.exists():
+                    continue
+                first = start.day if month == start.replace(day=1) else 1
+                last = end.day if month == end.replace(day=1) else 31
+                block = pq.read_table(path, columns=columns,
+                                      filters=[("Day", ">=", first), ("Day", "<=", last)]).to_pandas()
+                if block.empty:
+                    continue
+                block["Ticker"] = ticker
+                block["Month"] = month
+                frames.append(block)
+        if not frames:
+            return pd.DataFrame(columns=["Time", "Ticker"] + fields)
+        return resample(pd.concat(frames, ignore_index=True), bar)[["Time", "Ticker"] + fields]
+
+
+# Function to Convert Bars to the Stored Block Layout
+def to_block(bars):
+    """Returns the compact columns (Day, Minute, float32 prices, integer volume) of one ticker-month."""
+    times = pd.to_datetime(bars["Time"])
+    block = pd.DataFrame({
+        "Day": times.dt.day.to_numpy(),
+        "Minute": (times.dt.hour * 60 + times.dt.minute).to_numpy(),
+        **{col: bars[col].to_numpy() for col in PRICE_COLUMNS},
+        "Volume": bars["Volume"].fillna(0).to_numpy(),
+    })
+    return block.astype(BLOCK_DTYPES)
+
+
+# Function to Resample Stored Blocks to Any Bar Size
+def resample(blocks, bar="1min"):
+    """
+    Aggregates minute rows (Ticker, Month, Day, Minute, fields) to `bar` bars, vectorized:
+    open = first, high = max, low = min, close = last, volume = sum per (ticker, day, bucket).
+    """
+    size = pd.Timedelta(bar)
+    days = blocks["Month"] + pd.to_timedelta(blocks["Day"].astype("int64") - 1, unit="D")
+    minutes = blocks["Minute"].astype("int64")
+    if size >= pd.Timedelta(days=1):
+        bucket_start = pd.Series(0, index=blocks.index)   # daily bars are labelled by their day
+    else:
+        step = max(int(size / pd.Timedelta(minutes=1)), 1)
+        bucket_start = SESSION_OPEN_MINUTE + ((minutes - SESSION_OPEN_MINUTE) // step) * step
+    blocks = blocks.assign(Time=days + pd.to_timedelta(bucket_start, unit="m"), _order=minutes)
+    if size == pd.Timedelta(minutes=1):
+        return blocks.drop(columns=["Month", "Day", "Minute", "_order"]).sort_values(["Ticker", "Time"], ignore_index=True)
+
+    agg = {col: how for col, how in (("Open", "first"), ("High", "max"), ("Low", "min"),
+                                     ("Close", "last"), ("Volume", "sum")) if col in blocks.columns}
+    blocks = blocks.sort_values(["Ticker", "Time", "_order"], kind="stable")
+    return blocks.groupby(["Ticker", "Time"], sort=True, as_index=False).agg(agg)
+
+
+# Function to Generate Synthetic Minute Bars
+def synthetic_bars(tickers, start, end, seed=42):
+    """Deterministic random-walk minute bars (390 per session) for tests and benchmarks."""
+    from trading_calendar import sessions
+
+    rng = np.random.default_rng(seed)
+    days = sessions(start, end)
+    offsets = pd.to_timedelta(SESSION_OPEN_MINUTE + np.arange(390), unit="m")
+    times = (days.values[:, None] + offsets.values[None, :]).ravel()
+    frames = []
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0008, len(times))))
+        frames.append(pd.DataFrame({
+            "Time": times, "Ticker": ticker, "Open": close * (1 + rng.normal(0, 0.0002, len(times))),
+            "High": close * 1.0005, "Low": close * 0.9995, "Close": close,
+            "Volume": rng.integers(100, 50_000, len(times)),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+# Function to Compare the Block Store with Document-per-Bar Storage
+def benchmark(store, storage=None, tickers=10, days=21):
+    """
+    Writes the same synthetic minute bars to the block store and (with a StorageBackend) as one
+    document per bar, then reports bytes on disk / per bar and full-read times. The document
+    collection (BENCHMARK_COLLECTION) is dropped again afterwards.
+    """
+    names = [f"T{i:03d}" for i in range(tickers)]
+    start = pd.Timestamp("2024-01-02")
+    bars = synthetic_bars(names, start, start + pd.Timedelta(days=int(days * 1.5)))
+    results = {"bars": len(bars)}
+
+    began = time.perf_counter()
+    store.write(bars)
+    results["block_write_s"] = time.perf_counter() - began
+    results["block_bytes"] = sum(path.stat().st_size for path in store.root.rglob("*.parquet"))
+    began = time.perf_counter()
+    minute = store.read(names, start, bars["Time"].max())
+    results["block_read_s"] = time.perf_counter() - began
+    began = time.perf_counter()
+    store.read(names, start, bars["Time"].max(), bar="30min")
+    results["block_read_30min_s"] = time.perf_counter() - began
+    assert len(minute) == len(bars)
+
+    if storage is not None:
+        documents = bars.rename(columns={"Time": "Date"}).to_dict("records")
+        try:
+            began = time.perf_counter()
+            storage.replace_collection(BENCHMARK_COLLECTION, documents)
+            results["document_write_s"] = time.perf_counter() - began
+            began = time.perf_counter()
+            storage.read_frame(BENCHMARK_COLLECTION)
+            results["document_read_s"] = time.perf_counter() - began
+        finally:
+            # Throwaway data: never left behind in the configured (production) database
+            storage.drop_collection(BENCHMARK_COLLECTION)
+
+    print(f"{results['bars']:,} minute bars: {results['block_bytes'] / results['bars']:.1f} bytes/bar on disk, "
+          f"read {results['bars'] / results['block_read_s']:,.0f} bars/s "
+          f"(30min resample {results['block_read_30min_s']:.2f}s)")
+    if storage is not None:
+        print(f"Document per bar ({type(storage).__name__}): read {results['bars'] / results['document_read_s']:,.0f} bars/s "
+              f"({results['document_read_s'] / results['block_read_s']:.0f}x slower)")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Intraday bar store utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("import", help="store minute bars from a long CSV/Parquet file (Time, Ticker, OHLCV)")
+    load.add_argument("path")
+    read = sub.add_parser("read", help="print resampled bars")
+    read.add_argument("ticker")
+    read.add_argument("start")
+    read.add_argument("end")
+    read.add_argument("--bar", default="5min")
+    bench = sub.add_parser("bench", help="compare the block store with document-per-bar storage")
+    bench.add_argument("--tickers", type=int, default=10)
+    bench.add_argument("--days", type=int, default=21)
+    bench.add_argument("--documents", action="store_true", help="also time the configured storage backend")
+    args = parser.parse_args()
+
+    store = IntradayStore()
+    if args.command == "import":
+        reader = pd.read_parquet if args.path.endswith(".parquet") else pd.read_csv
+        logging.info(f"Stored {store.write(reader(args.path)):,} bars under {store.root}")
+    elif args.command == "read":
+        print(store.read(args.ticker, args.start, args.end, bar=args.bar).to_string(index=False))
+    else:
+        import tempfile
+        from storage_backend import get_storage
+
+        with tempfile.TemporaryDirectory() as tmp:
+            benchmark(IntradayStore(tmp), get_storage() if args.documents else None, args.tickers, args.days)
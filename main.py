@@ -1,63 +1,60 @@
-from data_exploration import visualize_data
+import argparse
 import logging
+import pandas as pd
 from MLP_model import (
-    fetch_data, handle_missing_features, split_data,
-    standardize_data, train_mlp, evaluate_model, plot_performance
+    FEATURES, TARGET, fetch_train_test, handle_missing_features,
+    MODEL_PATH, standardize_data, train_mlp, evaluate_model, plot_performance, save_model
 )
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def main():
+def main(train_start=None, train_only=False, model_path=None):
     """
     Runs the full pipeline for data exploration, ML model training,
     and evaluation of the S&P 500 prediction model.
+    Args:
+        - train_start: Optional first training date; only that window is read from MongoDB
+        - train_only: Skip data exploration and plots (plotting libraries are never imported)
+        - model_path: Optional file to save the trained model bundle to (used by streaming.py)
     """
     logging.info("Starting the Pipeline for S&P 500 Prediction")
 
-    # Step 1: Fetch Data - already acquired and stored on MongnoDB
-    data = fetch_data()
+    # Step 1: Fetch Data - already acquired and stored on MongnoDB (model columns only,
+    # train and test windows selected by the server)
+    train_data, test_data = fetch_train_test(FEATURES + ["Date", TARGET], train_start=train_start)
 
     # Step 2: Perform Data Exploration & Visualization
-    logging.info("Running Data Exploration & Visualization")
-    visualize_data()
-    logging.info("Data Exploration Completed!")
+    if not train_only:
+        from data_exploration import visualize_data
 
-    # Step 3: Preprocessinf and feature engineering - Define Features & Target
-    FEATURES = [
-        "Normalized_SP500_Adj_Close", "Normalized_GDP", "Normalized_Inflation",
-        "Normalized_Interest_Rate", "Normalized_AAPL_Adj_Close", "Normalized_MSFT_Adj_Close",
-        "Normalized_AMZN_Adj_Close", "Normalized_NVDA_Adj_Close", "Normalized_GOOGL_Adj_Close",
-        "Normalized_GOOG_Adj_Close", "Normalized_TSLA_Adj_Close", "Normalized_BRK-B_Adj_Close",
-        "Normalized_META_Adj_Close", "Normalized_XOM_Adj_Close", "Rolling_Mean_7",
-        "Rolling_Mean_30", "Rolling_Volatility_30", "Lag_1", "Lag_3", "Lag_7",
-        "Normalized_Avg_News_Sentiment"
-    ]
-    TARGET = "Price_Direction"
+        logging.info("Running Data Exploration & Visualization")
+        visualize_data()
+        logging.info("Data Exploration Completed!")
+
+    # Step 3: Preprocessinf and feature engineering - Features & Target are defined in MLP_model
 
     # Step 4: Handle Missing Features
     logging.info("Handling Missing Features...")
-    data = handle_missing_features(data, FEATURES)
-    data.dropna(inplace=True)  # Remove any remaining NaN values
+    train_data = handle_missing_features(train_data, FEATURES).dropna()  # Remove any remaining NaN values
+    test_data = handle_missing_features(test_data, FEATURES).dropna()
     logging.info("Missing Features Handled!")
 
-    # Step 5: Split Data into Train & Test
+    # Step 5: Split Data into Features & Target
     logging.info("Splitting Data into Train & Test Sets...")
-    train_data, test_data = split_data(data)
-    
     X_train, y_train = train_data[FEATURES], train_data[TARGET]
     X_test, y_test = test_data[FEATURES], test_data[TARGET]
     logging.info("Data Splitting Completed!")
 
     # Step 6: Standardize Data
     logging.info("Standardizing Data...")
-    X_train, X_test = standardize_data(X_train, X_test)
+    X_train, X_test, scaler = standardize_data(X_train, X_test, return_scaler=True)
     logging.info("Data Standardization Completed!")
 
     # Step 7: Train MLP Model
     logging.info("Training MLP Model...")
     mlp_model = train_mlp(X_train, y_train)
     logging.info("Model Training Completed!")
+    if model_path is not None:
+        save_model(mlp_model, scaler, model_path)
 
     # Step 8: Evaluate Model Performance
     logging.info("Evaluating Model...")
@@ -67,12 +64,22 @@ def main():
     logging.info("Model Evaluation Completed!")
 
     # Step 9: Plot Performance Metrics
-    logging.info("Plotting Model Performance...")
-    plot_performance(mlp_model, train_acc, test_acc, train_loss, test_loss)
-    logging.info("Performance Visualization Completed!")
+    if not train_only:
+        logging.info("Plotting Model Performance...")
+        plot_performance(mlp_model, train_acc, test_acc, train_loss, test_loss)
+        logging.info("Performance Visualization Completed!")
 
     logging.info("Pipeline Execution Completed Successfully!")
 
 # Run the Pipeline from python main.py
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="S&P 500 prediction pipeline.")
+    parser.add_argument("--train-start", type=pd.Timestamp, default=None,
+                        help="first training date (YYYY-MM-DD); earlier rows are not read")
+    parser.add_argument("--train-only", action="store_true",
+                        help="skip data exploration and plots, only train and evaluate the model")
+    parser.add_argument("--save-model", nargs="?", const=str(MODEL_PATH), default=None,
+                        help=f"save the trained model bundle (default file: {MODEL_PATH})")
+    args = parser.parse_args()
+    main(train_start=args.train_start, train_only=args.train_only, model_path=args.save_model)
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+DataFrame Memory Report
+Downcasts frames to compact dtypes (float32 / small ints / category) and records the bytes per
+column and the resident memory of the process (current, change since the previous step and lifetime
+peak) after each step of a pipeline
+"""
+
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource  # peak RSS (not available on Windows)
+except ImportError:
+    resource = None
+
+
+# Object columns become category when at most this share of their values is distinct
+CATEGORY_RATIO = 0.5
+
+# float32 keeps ~7 significant digits; larger magnitudes stay float64
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+# Function to Read the Current RSS of the Process
+def current_rss():
+    """Returns the resident set size of the process in bytes now (None without /proc, e.g. macOS / Windows)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+# Function to Read the Peak RSS of the Process
+def peak_rss():
+    """
+    Returns the lifetime peak resident set size of the process in bytes (the high-water mark since it
+    started, never lower than an earlier call; None where resource is unavailable).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Function to Downcast a Frame to Compact dtypes
+def compact_frame(df, keep=("Date",)):
+    """
+    Downcasts the columns of df in place, where no value changes beyond float32 rounding:
+    float64 -> float32 (unless a value is out of float32 range), integers -> the smallest integer
+    type holding them (e.g. Price_Direction -> int8), and repetitive object columns (Ticker,
+    keywords) -> category.
+    Args:
+        - df: DataFrame, modified in place
+        - keep: Columns left as they are
+
+    Returns:
+        - df
+    """
+    for name in df.columns:
+        if name in keep:
+            continue
+        column = df[name]
+        if column.dtype == np.float64:
+            values = column.to_numpy()
+            if not (np.abs(values[np.isfinite(values)]) > FLOAT32_MAX).any():
+                df[name] = values.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+            df[name] = pd.to_numeric(column, downcast="integer")
+        elif column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) == "string":
+            if column.nunique(dropna=True) <= CATEGORY_RATIO * len(column):
+                df[name] = column.astype("category")
+    return df
+
+
+# Function to Widen Compact Float Columns Back to float64
+def widen_floats(df):
+    """
+    Returns a copy of df whose float32 columns are float64 again, for writing: each value goes through
+    its shortest decimal form, so a price read as 4783.45 is stored as 4783.45 and not as the float32
+    rounding 4783.4501953125. The compact frame itself is left as it is.
+    """
+    narrow = [name for name in df.columns if df[name].dtype == np.float32]
+    if not narrow:
+        return df
+    return df.assign(**{name: df[name].to_numpy().astype(str).astype(np.float64) for name in narrow})
+
+
+class MemoryReport:
+    """
+    Per-step memory of a pipeline: call step(name, frame) after each stage to record the bytes of
+    every column of its frame, the current RSS of the process, its change since the previous step
+    (or since the report was created) and the lifetime peak RSS of the process so far.
+    """
+
+    def __init__(self, title="pipeline"):
+        self.title = title
+        self.steps = []
+        self.columns = []
+        self._started = time.perf_counter()
+        self._rss = current_rss()
+
+    def step(self, name, df=None):
+        """Records one stage (df: the frame it produced, if any)."""
+        usage = df.memory_usage(deep=True, index=True) if df is not None else pd.Series(dtype="int64")
+        rss = current_rss()
+        for column, size in usage.items():
+            dtype = "index" if column == "Index" else str(df[column].dtype)
+            self.columns.append({"Step": name, "Column": column, "Dtype": dtype, "Bytes": int(size)})
+        self.steps.append({
+            "Step": name,
+            "Rows": len(df) if df is not None else None,
+            "Columns": df.shape[1] if df is not None else None,
+            "Frame_Bytes": int(usage.sum()),
+            "RSS": rss,
+            "RSS_Delta": rss - self._rss if rss is not None and self._rss is not None else None,
+            "Process_Peak_RSS": peak_rss(),
+            "Seconds": time.perf_counter() - self._started,
+        })
+        self._rss = rss
+        logging.info(f"[{self.title}] {name}: frame {_megabytes(int(usage.sum()))}, "
+                     f"RSS {_megabytes(rss)} ({_megabytes(self.steps[-1]['RSS_Delta'], signed=True)}), "
+                     f"process peak {_megabytes(self.steps[-1]['Process_Peak_RSS'])}")
+        return df
+
+    def summary(self):
+        """Returns one row per step (rows, columns, frame bytes, RSS, RSS change, process peak RSS, seconds since start)."""
+        return pd.DataFrame(self.steps)
+
+    def column_bytes(self, step=None):
+        """Returns the bytes and dtype of every column (of one step, or of all of them)."""
+        columns = pd.DataFrame(self.columns, columns=["Step", "Column", "Dtype", "Bytes"])
+        return columns[columns["Step"] == step] if step is not None else columns
+
+    def write(self, path):
+        """Writes the per-column report to a CSV file (the step columns repeated per column row)."""
+        report = self.column_bytes().merge(self.summary(), on="Step", how="left")
+        report.to_csv(path, index=False)
+        logging.info(f"Memory report written to {path}")
+        return path
+
+
+def _megabytes(size, signed=False):
+    if size is None:
+        return "n/a"
+    return f"{size / 2 ** 20:+.1f} MB" if signed else f"{size / 2 ** 20:.1f} MB"
+
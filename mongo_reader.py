@@ -0,0 +1,252 @@
+"""
+Streaming MongoDB Reader
+Builds typed NumPy columns batch by batch instead of materializing the full cursor as dicts, and
+decodes mixed representations (string dates, Extended JSON numbers) in bulk
+"""
+
+import logging
+from datetime import datetime
+from itertools import islice
+from operator import methodcaller
+
+import numpy as np
+import pandas as pd
+
+
+# Number of documents pulled from the cursor per batch
+DEFAULT_BATCH_SIZE = 10_000
+
+
+# Python types of the values a column can hold without falling back to object
+_DATETIME_TYPES = {datetime, pd.Timestamp}
+_INTEGER_TYPES = {int, np.int32, np.int64}
+_NUMBER_TYPES = _INTEGER_TYPES | {float, np.float32, np.float64}
+
+# MongoDB Extended JSON number wrappers (e.g. {"$numberDouble": "1.5"} from a JSON import)
+NUMBER_WRAPPERS = ("$numberDouble", "$numberDecimal", "$numberLong", "$numberInt")
+
+
+# Function to Pick a NumPy dtype for a Column
+def _column_dtype(values):
+    """Chooses the dtype of a column from the set of value types in one batch (collected by a C-level map)."""
+    kinds = set(map(type, values))
+    missing = type(None) in kinds
+    kinds.discard(type(None))
+    if not kinds:
+        return None
+    if kinds <= _DATETIME_TYPES:
+        return np.dtype("datetime64[ns]")
+    if kinds <= _INTEGER_TYPES and not missing:
+        return np.dtype("int64")
+    if kinds <= _NUMBER_TYPES:
+        return np.dtype("float64")
+    return np.dtype(object)
+
+
+# Function to Decode a Column of Numbers in Bulk
+def decode_numbers(values, dtype="float64"):
+    """
+    Converts numbers, numeric strings and Extended JSON wrappers ({"$numberDouble": "1.5"}) to a
+    float array without a Python call per row: value types are mapped with C-level map(), wrappers
+    are unwrapped with methodcaller and all payloads are parsed at once by pd.to_numeric.
+    Args:
+        - values: Sequence / object array of values
+        - dtype: Output dtype (float64 or float32)
+
+    Returns:
+        - NumPy array (unparseable values are NaN)
+    """
+    values = np.asarray(values, dtype=object)
+    types = np.fromiter(map(type, values), dtype=object, count=len(values))
+    wrapped = types == dict
+    if wrapped.any():
+        values = values.copy()
+        documents = values[wrapped]
+        payload = np.full(len(documents), None, dtype=object)
+        for key in NUMBER_WRAPPERS:
+            found = np.fromiter(map(methodcaller("get", key), documents), dtype=object, count=len(documents))
+            payload = np.where(payload == None, found, payload)  # noqa: E711 (element-wise None test)
+        values[wrapped] = payload
+    return pd.to_numeric(pd.Series(values, copy=False), errors="coerce").to_numpy(dtype=dtype)
+
+
+# Function to Decode the Mixed Columns of a Loaded Frame
+def decode_frame(df, date_col="Date", numeric=()):
+    """
+    Normalizes the representations of object columns once, in bulk: the date column (BSON dates
+    mixed with 'YYYY-MM-DD' strings) becomes datetime64, and columns holding Extended JSON number
+    wrappers (plus the `numeric` columns, e.g. prices stored as strings) become float64.
+    """
+    for name in df.columns:
+        if df[name].dtype != object:
+            continue
+        values = df[name].to_numpy()
+        if name == date_col:
+            df[name] = pd.to_datetime(values, errors="coerce", format="ISO8601")
+            continue
+        kinds = set(map(type, values))
+        if name in numeric or (dict in kinds and _has_wrapper(values)):
+            df[name] = decode_numbers(values)
+    return df
+
+
+def _has_wrapper(values):
+    for value in values:
+        if isinstance(value, dict):
+            return any(key in value for key in NUMBER_WRAPPERS)
+    return False
+
+
+# Function to Convert a List of Values into a 1-D Array
+def _to_array(values, dtype):
+    """Converts values to a 1-D array. Object columns are filled element-wise so lists/dicts stay scalars."""
+    if dtype == object:
+        array = np.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            array[i] = value
+        return array
+    return np.asarray(values, dtype=dtype)
+
+
+# Function to Write One Batch of Values into a Column Array
+def _fill(column, start, values):
+    """Copies values into column[start:], widening the dtype if the batch does not fit."""
+    end = start + len(values)
+    try:
+        column[start:end] = _to_array(values, column.dtype)
+        return column
+    except (TypeError, ValueError, OverflowError):
+        # e.g. a None in an int column or a string in a numeric column
+        widened = column.astype(float if column.dtype.kind == "i" else object)
+        try:
+            widened[start:end] = _to_array(values, widened.dtype)
+        except (TypeError, ValueError):
+            widened = widened.astype(object)
+            widened[start:end] = _to_array(values, object)
+        return widened
+
+
+# Function to Build a DataFrame from an Iterable of Documents
+def frame_from_documents(documents, fields=None, total=None, batch_size=DEFAULT_BATCH_SIZE, date_col="Date"):
+    """
+    Streams documents into typed NumPy columns, one batch at a time.
+    Args:
+        - documents: Iterable of dicts (e.g. a pymongo cursor)
+        - fields: Columns to keep (None keeps every field seen)
+        - total: Number of documents if known, so columns are allocated once at their final size
+        - batch_size: Number of documents converted per batch
+        - date_col: Column parsed to datetime64 at the end
+
+    Returns:
+        - Pandas DataFrame (mixed date / Extended JSON number columns decoded, see decode_frame).
+          Fields that never appear in any document are left out.
+    """
+    columns = {}
+    chunks = {}
+    filled = 0
+    iterator = iter(documents)
+
+    while True:
+        # Never read past `total`, so documents inserted mid-read cannot overflow the columns
+        size = batch_size if total is None else min(batch_size, total - filled)
+        batch = list(islice(iterator, size)) if size > 0 else []
+        if not batch:
+            break
+
+        names = fields if fields is not None else list(dict.fromkeys(k for doc in batch for k in doc))
+        for name in names:
+            known = name in columns or name in chunks
+            if not known and all(name not in doc for doc in batch):
+                continue
+            values = [doc.get(name) for doc in batch]
+
+            if total is None:
+                # Unknown size: keep one array per batch and concatenate at the end
+                if not known:
+                    chunks[name] = [np.full(filled, None, dtype=object)] if filled else []
+                chunks[name].append(_to_array(values, _column_dtype(values) or object))
+                continue
+
+            if not known:
+                # Allocate once at the final size; rows before the first sighting stay missing
+                columns[name] = np.empty(total, dtype=_column_dtype(values) or object)
+                if filled:
+                    columns[name] = _fill(columns[name], 0, [None] * filled)
+            columns[name] = _fill(columns[name], filled, values)
+
+        # Fields missing from a whole batch still need placeholder rows
+        for name in (chunks if total is None else columns):
+            if fields is None and name not in names:
+                if total is None:
+                    chunks[name].append(np.full(len(batch), None, dtype=object))
+                else:
+                    columns[name] = _fill(columns[name], filled, [None] * len(batch))
+
+        filled += len(batch)
+
+    if total is None:
+        columns = {name: (np.concatenate(parts) if len(parts) > 1 else parts[0]) for name, parts in chunks.items()}
+    elif filled < total:
+        # Collection shrank while reading
+        columns = {name: column[:filled] for name, column in columns.items()}
+
+    order = fields if fields is not None else list(columns)
+    df = pd.DataFrame({name: columns[name] for name in order if name in columns}, copy=False)
+    return decode_frame(df, date_col)
+
+
+# Function to Build a Date-Range Filter
+def date_range_query(query=None, start=None, end=None, date_col="Date"):
+    """
+    Adds inclusive start/end bounds on the date field to a MongoDB-style filter.
+    A date condition already in the filter is kept: bounds on other operators are merged into it,
+    anything else (an equality, or the same operator) is combined with the range through $and.
+    """
+    query = dict(query or {})
+    date_range = {}
+    if start is not None:
+        date_range["$gte"] = start
+    if end is not None:
+        date_range["$lte"] = end
+    if not date_range:
+        return query
+    condition = query.get(date_col)
+    if condition is None:
+        query[date_col] = date_range
+    elif (isinstance(condition, dict) and all(op.startswith("$") for op in condition)
+          and not set(condition) & set(date_range)):
+        query[date_col] = {**condition, **date_range}
+    else:
+        query = {"$and": [query, {date_col: date_range}]}
+    return query
+
+
+# Function to Read a Collection with a Projection and Date Range
+def read_frame(collection, fields=None, start=None, end=None, date_col="Date", query=None,
+               batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Reads a MongoDB collection into a typed DataFrame without building a list of dicts.
+    Args:
+        - collection: pymongo Collection
+        - fields: List of fields to project (None returns every field except `_id`)
+        - start, end: Optional inclusive bounds on the date field
+        - date_col: Name of the date field
+        - query: Extra filter combined with the date range (see date_range_query)
+        - batch_size: Cursor batch size and conversion batch size
+
+    Returns:
+        - Pandas DataFrame
+    """
+    query = date_range_query(query, start, end, date_col)
+
+    projection = {"_id": 0}
+    if fields is not None:
+        projection.update({field: 1 for field in fields})
+
+    total = collection.count_documents(query)
+    logging.info(f"Streaming {total} documents from '{collection.name}'...")
+    cursor = collection.find(query, projection, batch_size=batch_size)
+    try:
+        return frame_from_documents(cursor, fields, total=total, batch_size=batch_size, date_col=date_col)
+    finally:
+        cursor.close()
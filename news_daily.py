@@ -0,0 +1,103 @@
+"""
+Daily News Sentiment
+Aggregates the flat sentiment fields of news_data into one small document per day (and per day and
+keyword) with an aggregation pipeline that $merges into news_daily, so consumers never read articles
+"""
+
+import argparse
+import logging
+
+import pandas as pd
+
+from storage_backend import MongoBackend, date_range_query, get_storage
+
+
+# Pre-aggregated collections (one document per Date / per Keyword and Date)
+NEWS_DAILY = "news_daily"
+NEWS_DAILY_KEYWORDS = "news_daily_keywords"
+
+# Daily fields and how they aggregate the flat article fields written at ingest
+# (Avg_News_Sentiment = mean of the title/abstract compound average, as build_features used it)
+DAILY_FIELDS = {
+    "Avg_News_Sentiment": {"$avg": "$Sentiment_Compound"},
+    "Title_Sentiment": {"$avg": "$Title_Compound"},
+    "Abstract_Sentiment": {"$avg": "$Abstract_Compound"},
+    "Avg_Positive_Sentiment": {"$avg": "$Title_Pos"},
+    "Avg_Negative_Sentiment": {"$avg": "$Title_Neg"},
+    "Articles": {"$sum": 1},
+}
+
+
+# Function to Build the Daily Aggregation Pipeline
+def daily_pipeline(start=None, end=None, by_keyword=False):
+    """
+    Returns the pipeline that recomputes the days in [start, end] (all days by default) and merges
+    them into news_daily (or news_daily_keywords, one document per keyword and day).
+    """
+    match = date_range_query({"Sentiment_Compound": {"$exists": True}}, start, end)
+    pipeline = [{"$match": match}]
+    if by_keyword:
+        pipeline.append({"$unwind": "$SearchKeywords"})
+        group_id, keys = {"Date": "$Date", "Keyword": "$SearchKeywords"}, ["Keyword", "Date"]
+        project = {"_id": 0, "Date": "$_id.Date", "Keyword": "$_id.Keyword"}
+    else:
+        group_id, keys = "$Date", ["Date"]
+        project = {"_id": 0, "Date": "$_id"}
+    pipeline += [
+        {"$group": {"_id": group_id, **DAILY_FIELDS}},
+        {"$project": {**project, **{field: 1 for field in DAILY_FIELDS}}},
+        {"$merge": {"into": NEWS_DAILY_KEYWORDS if by_keyword else NEWS_DAILY, "on": keys,
+                    "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+    return pipeline
+
+
+# Function to Refresh the Daily Sentiment Collections
+def refresh_news_daily(storage=None, start=None, end=None, by_keyword=True):
+    """
+    Recomputes the daily documents of the days in [start, end] from news_data (all days by default).
+    On MongoDB the pipeline runs on the server and $merges its output, so no article leaves the
+    database; the embedded backend evaluates the same pipeline.
+    Args:
+        - storage: StorageBackend (default: the configured backend)
+        - start, end: Optional date range of the articles that changed
+        - by_keyword: Also refresh the per-keyword collection
+
+    Returns:
+        - Number of daily documents in news_daily afterwards
+    """
+    storage = storage if storage is not None else get_storage()
+    if isinstance(storage, MongoBackend):
+        # $merge needs the unique index on its "on" fields
+        from schema_setup import ensure_collection
+
+        for name in (NEWS_DAILY, NEWS_DAILY_KEYWORDS):
+            ensure_collection(storage.db, name)
+
+    storage.aggregate("news_data", daily_pipeline(start, end))
+    if by_keyword:
+        storage.aggregate("news_data", daily_pipeline(start, end, by_keyword=True))
+    days = storage.count(NEWS_DAILY)
+    logging.info(f"Refreshed '{NEWS_DAILY}' ({days} days)" + (f" for {start} - {end}." if start or end else "."))
+    return days
+
+
+# Function to Load the Daily Sentiment
+def load_news_daily(storage, fields=None, start=None, end=None, keyword=None):
+    """Reads the daily sentiment (of one keyword, or of all articles) as a DataFrame sorted by Date."""
+    name, query = (NEWS_DAILY_KEYWORDS, {"Keyword": keyword}) if keyword else (NEWS_DAILY, None)
+    daily = storage.read_frame(name, fields=fields, query=query,
+                               start=pd.Timestamp(start) if start is not None else None,
+                               end=pd.Timestamp(end) if end is not None else None)
+    return daily.sort_values("Date").reset_index(drop=True) if "Date" in daily.columns else daily
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Rebuild the daily news sentiment collections from news_data.")
+    parser.add_argument("--start", help="first day to recompute (default: all days)")
+    parser.add_argument("--end", help="last day to recompute")
+    parser.add_argument("--no-keywords", action="store_true", help="skip the per-keyword collection")
+    args = parser.parse_args()
+    refresh_news_daily(start=args.start and pd.Timestamp(args.start), end=args.end and pd.Timestamp(args.end),
+                       by_keyword=not args.no_keywords)
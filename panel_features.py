@@ -0,0 +1,169 @@
+"""
+Panel Technical Features
+Builds a dense dates x tickers price matrix from Top10_stocks and computes returns, rolling stats,
+lags and cross-sectional ranks for every ticker at once with the feature registry kernels
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage_backend import get_storage
+from feature_registry import FeatureSpec, WindowKernels
+from mongo_reader import decode_numbers
+from preprocess_feature import START_DATE, END_DATE
+from trading_calendar import sessions
+
+
+# Collection the long (Date, Ticker) panel features are published to
+PANEL_COLLECTION = "panel_features"
+
+# Panel features; column is the matrix they are computed from ("Price" = Adj Close, "Return" = daily
+# return) or, for kind "rank", the panel feature ranked across tickers each day. Windows are sessions.
+PANEL_REGISTRY = [
+    FeatureSpec("Return_1", "return", "Price", 1),
+    FeatureSpec("Return_5", "return", "Price", 5),
+    FeatureSpec("Return_21", "return", "Price", 21),
+    FeatureSpec("Rolling_Mean_21", "rolling_mean", "Price", 21),
+    FeatureSpec("Rolling_Volatility_21", "rolling_std", "Return", 21),
+    FeatureSpec("Price_Z_63", "zscore", "Price", 63),
+    FeatureSpec("High_252", "rolling_max", "Price", 252),
+    FeatureSpec("Lag_1", "lag", "Price", 1),
+    FeatureSpec("Lag_5", "lag", "Price", 5),
+    FeatureSpec("Rank_Return_5", "rank", "Return_5"),
+    FeatureSpec("Rank_Return_21", "rank", "Return_21"),
+    FeatureSpec("Rank_Volatility_21", "rank", "Rolling_Volatility_21"),
+]
+
+
+# Function to Load the Price Matrix
+def load_price_matrix(storage, tickers=None, start_date=START_DATE, end_date=END_DATE, calendar_days=False):
+    """
+    Reads Adj Close of the tickers (default: every ticker stored) as one dates x tickers matrix.
+    Args:
+        - storage: StorageBackend
+        - tickers: Optional list of tickers
+        - start_date, end_date: Inclusive date range
+        - calendar_days: One row per calendar day (as the feature table) instead of per session
+
+    Returns:
+        - float64 DataFrame indexed by Date, one column per ticker; a day a ticker did not trade takes
+          its previous price (NaN before its first one)
+    """
+    query = {"Ticker": {"$in": list(tickers)}} if tickers else None
+    prices = storage.read_frame("Top10_stocks", fields=["Date", "Ticker", "Adj Close"], query=query,
+                                start=pd.Timestamp(start_date), end=pd.Timestamp(end_date))
+    if prices.empty:
+        return pd.DataFrame()
+    if prices["Adj Close"].dtype == object:
+        prices["Adj Close"] = decode_numbers(prices["Adj Close"].to_numpy())
+    matrix = prices.pivot_table(index="Date", columns="Ticker", values="Adj Close", aggfunc="last")
+    matrix.columns.name = None
+
+    days = pd.date_range(start_date, end_date, freq="D", name="Date") if calendar_days else sessions(start_date, end_date)
+    # As-of fill onto the common index: a missing bar takes the ticker's previous price
+    return matrix.reindex(matrix.index.union(days)).ffill().reindex(days)
+
+
+# Function to Compute the Panel Features
+def compute_panel(prices, specs=PANEL_REGISTRY):
+    """
+    Computes every panel feature for all tickers at once: one WindowKernels pass per source matrix
+    (window sums, strided min/max and shifts over the whole dates x tickers array) plus one
+    vectorized cross-sectional rank per ranked feature.
+    Args:
+        - prices: dates x tickers price matrix (see load_price_matrix)
+        - specs: Panel FeatureSpecs
+
+    Returns:
+        - Dictionary {feature name: dates x tickers DataFrame}
+    """
+    values = prices.to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price = WindowKernels(values)
+        kernels = {"Price": price, "Return": WindowKernels(price.block("return", 1))}
+
+        features = {}
+        for spec in specs:
+            if spec.kind == "rank":
+                # Percentile rank across the tickers that have a value that day (1 = highest)
+                features[spec.name] = features[spec.column].rank(axis=1, pct=True)
+            else:
+                block = kernels[spec.column].block(spec.kind, spec.window)
+                features[spec.name] = pd.DataFrame(block, index=prices.index, columns=prices.columns)
+    return features
+
+
+# Function to Stack the Panel into Long Rows
+def panel_to_long(features, dtype="float64"):
+    """
+    Returns one row per (Date, Ticker) with a column per feature (rows with no price are dropped).
+    dtype="float32" halves the frame for in-memory use; the published collection keeps float64.
+    """
+    first = next(iter(features.values()))
+    long = pd.DataFrame({
+        "Date": np.repeat(first.index.values, first.shape[1]),
+        "Ticker": np.tile(first.columns.values, first.shape[0]),
+        **{name: frame.to_numpy(dtype=dtype).ravel() for name, frame in features.items()},
+    })
+    return long.dropna(subset=list(features), how="all").reset_index(drop=True)
+
+
+# Function to Build and Publish the Panel Features
+def run_panel(storage=None, tickers=None, start_date=START_DATE, end_date=END_DATE, calendar_days=False):
+    """
+    Builds the panel features of the stored tickers and replaces the panel_features collection.
+    Returns:
+        - Long DataFrame (Date, Ticker, features)
+    """
+    storage = storage if storage is not None else get_storage()
+    prices = load_price_matrix(storage, tickers, start_date, end_date, calendar_days)
+    if prices.empty:
+        logging.warning("No prices in 'Top10_stocks' for the panel.")
+        return pd.DataFrame()
+    began = time.perf_counter()
+    long = panel_to_long(compute_panel(prices))
+    logging.info(f"Computed {len(PANEL_REGISTRY)} features for {prices.shape[1]} tickers x {prices.shape[0]} days "
+                 f"in {time.perf_counter() - began:.2f}s")
+    rows = storage.replace_collection(PANEL_COLLECTION, long.to_dict("records"))
+    logging.info(f"Published {rows} rows to '{PANEL_COLLECTION}'.")
+    return long
+
+
+# Function to Time the Panel for One and Many Tickers
+def benchmark(tickers=500, days=1800, seed=42):
+    """Computes the panel for 1 ticker and for `tickers` tickers on synthetic prices and prints both times."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2017-04-03", periods=days, name="Date")
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.015, (days, tickers)), axis=0)),
+                          index=index, columns=[f"T{i:03d}" for i in range(tickers)])
+    results = {}
+    for label, matrix in (("one", prices.iloc[:, :1]), ("panel", prices)):
+        began = time.perf_counter()
+        panel_to_long(compute_panel(matrix))
+        results[label] = time.perf_counter() - began
+    print(f"1 ticker: {results['one'] * 1000:.1f} ms, {tickers} tickers: {results['panel'] * 1000:.1f} ms "
+          f"({results['panel'] / results['one']:.1f}x for {tickers}x the tickers)")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Build per-ticker panel features (returns, rolling stats, lags, ranks).")
+    parser.add_argument("--tickers-file", help="tickers to include (default: every ticker in Top10_stocks)")
+    parser.add_argument("--start", default=START_DATE)
+    parser.add_argument("--end", default=END_DATE)
+    parser.add_argument("--calendar-days", action="store_true", help="one row per calendar day instead of per session")
+    parser.add_argument("--bench", type=int, metavar="TICKERS", help="time synthetic prices for this many tickers instead")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+    else:
+        from acquisition_storage.price_engine import load_tickers
+
+        tickers = load_tickers(args.tickers_file) if args.tickers_file else None
+        run_panel(tickers=tickers, start_date=args.start, end_date=args.end, calendar_days=args.calendar_days)
@@ -1,17 +1,35 @@
+import argparse
+import logging
+
 import pandas as pd
 import numpy as np
-from pymongo import MongoClient
-from sklearn.preprocessing import StandardScaler
-from mongoDB_setup import connect_mongo
-
-# Connect to MongoDB
-db = connect_mongo()
+from storage_backend import get_storage
+from mongo_reader import decode_numbers
+from memory_report import MemoryReport, compact_frame, widen_floats
+from feature_store import publish_features
+from trading_calendar import densify
+from feature_registry import TOP10_STOCK_NAMES, compute_features, default_registry
 
-# Load Data from MongoDB
-sp500_data = pd.DataFrame(list(db["sp500_data"].find()))
-macroeco_data = pd.DataFrame(list(db["macroeco"].find()))
-news_data = pd.DataFrame(list(db["news_data"].find()))
-top10_data = pd.DataFrame(list(db["Top10_stocks"].find()))
+# Ensure continous date range
+START_DATE = "2017-04-01"
+END_DATE = "2024-03-31"
+
+
+# Function to load the source collections
+def load_sources(storage, start_date=START_DATE, end_date=END_DATE, tickers=TOP10_STOCK_NAMES):
+    """
+    Loads Data from MongoDB (streamed, only the fields used below, date range and tickers filtered by the server).
+    News is read from the daily sentiment collection (news_daily.py), one small document per day.
+    Returns:
+        - sp500_data, macroeco_data, news_data (daily), top10_data DataFrames
+    """
+    window = {"start": pd.Timestamp(start_date), "end": pd.Timestamp(end_date)}
+    sp500_data = storage.read_frame("sp500_data", **window)
+    macroeco_data = storage.read_frame("macroeco", **window)
+    news_data = storage.read_frame("news_daily", fields=["Date", "Avg_News_Sentiment"], **window)
+    top10_data = storage.read_frame("Top10_stocks", fields=["Date", "Ticker", "Adj Close"],
+                                    query={"Ticker": {"$in": list(tickers)}}, **window)
+    return sp500_data, macroeco_data, news_data, top10_data
 
 # Function to clean datasets
 def clean_dataframe(df, name, date_col="Date"):
@@ -33,137 +51,171 @@ def clean_dataframe(df, name, date_col="Date"):
     df.sort_values(by=date_col, inplace=True)
     return df
 
-# Clean all Datasets
-sp500_data = clean_dataframe(sp500_data, "S&P 500")
-macroeco_data = clean_dataframe(macroeco_data, "Macroeco")
-news_data = clean_dataframe(news_data, "News")
-top10_data = clean_dataframe(top10_data, "Top 10 Stocks")
-
-# Ensure continous date range
-start_date = "2017-04-01"
-end_date = "2024-03-31"
-date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-
 # Reindex All Datasets to Ensure a Continuous Time Series
-def reindex_dataframe(df, name):
-    """Reindexes dataframe to include all dates in the range."""
-    df = df.set_index("Date").reindex(date_range).reset_index().rename(columns={'index': 'Date'})
-    df.ffill(inplace=True)
-    df.bfill(inplace=True)
+def reindex_dataframe(df, name, date_range, zero_fill=()):
+    """
+    Densifies a dataframe to every date in the range: each day takes the last known row
+    (as-of, e.g. the previous trading session), the first days the first row.
+    Columns in `zero_fill` (per-period values such as returns) are 0 on the added days.
+    """
+    if df.empty:
+        df = pd.DataFrame({"Date": date_range})
+    else:
+        df = densify(df, date_range[0], date_range[-1], zero_fill=zero_fill)
     df.fillna(0, inplace=True)
     print(f" {name} reindexed and missing values filled!")
     return df
 
-sp500_data = reindex_dataframe(sp500_data, "S&P 500")
-macroeco_data = reindex_dataframe(macroeco_data, "Macroeco")
-
-# Extract sentiment - +ve or -ve from news data
-if "Sentiment" in news_data.columns:
-    news_data['Date'] = pd.to_datetime(news_data['Date'])
-
-    def extract_sentiment(sentiment, key):
-        """Extracts compound sentiment from Title or Abstract."""
-        if isinstance(sentiment, dict):
-            return sentiment.get(key, {}).get("compound", 0)
-        return 0
-
-    news_data['Title_Sentiment'] = news_data['Sentiment'].apply(lambda x: extract_sentiment(x, "TitleSentiment"))
-    news_data['Abstract_Sentiment'] = news_data['Sentiment'].apply(lambda x: extract_sentiment(x, "AbstractSentiment"))
-
-    # Compute Total Sentiment Score - added feature
-    news_sentiment = news_data.groupby("Date", as_index=False).agg({
-        'Title_Sentiment': 'mean',
-        'Abstract_Sentiment': 'mean'
-    })
-    news_sentiment['Avg_News_Sentiment'] = (news_sentiment['Title_Sentiment'] + news_sentiment['Abstract_Sentiment']) / 2
-    news_sentiment = news_sentiment[['Date', 'Avg_News_Sentiment']]
-    news_sentiment = reindex_dataframe(news_sentiment, "News Sentiment")
-else:
-    print("News data missing! Adding default.")
-    news_sentiment = pd.DataFrame({"Date": date_range, "Avg_News_Sentiment": 0})
-
-# Fix Top 10 Stocks 'Adj Close' Prices
-top10_stock_names = ["AAPL", "MSFT", "AMZN", "NVDA", "GOOGL", "GOOG", "TSLA", "BRK-B", "META", "XOM"]
-
-# Extract "Adj Close" Values from MongoDB JSON
-def extract_adj_close(value):
-    """Extracts Adj Close from MongoDB nested structure"""
-    if isinstance(value, dict) and "$numberDouble" in value:
-        return float(value["$numberDouble"])
-    return value  
-
-top10_data["Adj Close"] = top10_data["Adj Close"].apply(extract_adj_close)
+# Compute the daily news sentiment
+def build_news_sentiment(news_daily, date_range):
+    """Densifies the daily news sentiment to the date range (0 when news data is missing)."""
+    if "Avg_News_Sentiment" not in news_daily.columns:
+        print("News data missing! Adding default. (Run news_daily.py to aggregate news_data.)")
+        return pd.DataFrame({"Date": date_range, "Avg_News_Sentiment": 0})
+    return reindex_dataframe(news_daily[["Date", "Avg_News_Sentiment"]], "News Sentiment", date_range)
 
 # Pivot operation to get stock prices per ticker
-top10_pivot = top10_data.pivot(index="Date", columns="Ticker", values="Adj Close").reset_index()
-
-# Ensure ALL 10 STOCKS ARE PRESENT
-missing_stocks = [ticker for ticker in top10_stock_names if ticker not in top10_pivot.columns]
-for ticker in missing_stocks:
-    print(f" {ticker} is missing! Adding empty column.")
-    top10_pivot[ticker] = np.nan  # Add missing tickers as NaN for proper filling
-
-# Rename columns for clarity
-top10_pivot.rename(columns={ticker: f"{ticker}_Adj_Close" for ticker in top10_stock_names}, inplace=True)
-
-# Merge with main dataset (Include News & Macro Data)
-combined_data = sp500_data.merge(macroeco_data, on="Date", how="left")
-combined_data = combined_data.merge(news_sentiment, on="Date", how="left")
-combined_data = combined_data.merge(top10_pivot, on="Date", how="left")
-
-# Fill Missing Values
-combined_data.ffill(inplace=True)
-combined_data.bfill(inplace=True)
-
-# Normalize Data
-scaler = StandardScaler()
-to_normalize = ["Adj_Close", "GDP", "Inflation", "Interest_Rate", "Avg_News_Sentiment"] + [f"{ticker}_Adj_Close" for ticker in top10_stock_names]
-
-for feature in to_normalize:
-    if feature in combined_data.columns:
-        combined_data[f"Normalized_{feature}"] = scaler.fit_transform(combined_data[[feature]])
-
-# Add Normalized S&P 500 Adj Close
-combined_data["Normalized_SP500_Adj_Close"] = scaler.fit_transform(combined_data[["Adj_Close"]])
-
-# Feature Engineering
-print("\ Performing Feature Engineering...")
-
-# Rolling Features
-combined_data['Rolling_Mean_7'] = combined_data['Adj_Close'].rolling(window=7).mean().fillna(0)
-combined_data['Rolling_Mean_30'] = combined_data['Adj_Close'].rolling(window=30).mean().fillna(0)
-combined_data['Rolling_Volatility_30'] = combined_data['Adj_Close'].rolling(window=30).std().fillna(0)
-
-# Lag Features
-combined_data['Lag_1'] = combined_data['Adj_Close'].shift(1).fillna(0)
-combined_data['Lag_3'] = combined_data['Adj_Close'].shift(3).fillna(0)
-combined_data['Lag_7'] = combined_data['Adj_Close'].shift(7).fillna(0)
-
-# Target Features
-combined_data['Future_Return_7'] = ((combined_data['Adj_Close'].shift(-7) - combined_data['Adj_Close']) / combined_data['Adj_Close']).fillna(0)
-combined_data['Price_Direction'] = (combined_data['Future_Return_7'] > 0).astype(int)
-
-# Split Data into Training & Testing (Test Data: 1st Feb 2024 - 31st Mar 2024)
-train_data = combined_data[combined_data["Date"] < "2024-02-01"]
-test_data = combined_data[(combined_data["Date"] >= "2024-02-01") & (combined_data["Date"] <= "2024-03-31")]
-
-# Drop `_id` Columns Before Saving
-train_data.drop(columns=['_id'], errors='ignore', inplace=True)
-test_data.drop(columns=['_id'], errors='ignore', inplace=True)
-
-# Xlxs for verification
-#train_data.to_excel("train_data.xlsx", index=False)
-#test_data.to_excel("test_data.xlsx", index=False)
-
-# Save Back to MongoDB
-db["feature_engineering"].delete_many({})
-db["feature_engineering"].insert_many(combined_data.to_dict("records"))
-
-
-# Save to MongoDB
-db["train_data"].delete_many({})
-db["test_data"].delete_many({})
-db["train_data"].insert_many(train_data.to_dict("records"))
-db["test_data"].insert_many(test_data.to_dict("records"))
-
-print("Training & Testing Data Ready! ")
+def pivot_top10(top10_data, tickers=TOP10_STOCK_NAMES):
+    """Pivots the top-10 prices to one '<Ticker>_Adj_Close' column per stock."""
+    if top10_data["Adj Close"].dtype == object:
+        # Left over Extended JSON / string prices, decoded in one bulk pass (see mongo_reader.decode_numbers)
+        top10_data["Adj Close"] = decode_numbers(top10_data["Adj Close"].to_numpy())
+    top10_pivot = top10_data.pivot(index="Date", columns="Ticker", values="Adj Close").reset_index()
+
+    # Ensure ALL 10 STOCKS ARE PRESENT
+    missing_stocks = [ticker for ticker in tickers if ticker not in top10_pivot.columns]
+    for ticker in missing_stocks:
+        print(f" {ticker} is missing! Adding empty column.")
+        top10_pivot[ticker] = np.nan  # Add missing tickers as NaN for proper filling
+
+    # Rename columns for clarity
+    top10_pivot.rename(columns={ticker: f"{ticker}_Adj_Close" for ticker in tickers}, inplace=True)
+    top10_pivot.columns.name = None
+    return top10_pivot
+
+# Align the sources on the S&P 500 dates in one allocation
+def align_sources(base, frames):
+    """
+    Left-joins frames onto the Date column of base like a chain of merges, but gathers the aligned
+    columns first and builds the combined frame once (a merge chain copies the growing frame per merge).
+    """
+    dates = pd.Index(base["Date"])
+    columns = {name: base[name].to_numpy() for name in base.columns}
+    for frame in frames:
+        if frame.empty:
+            continue
+        aligned = frame.set_index("Date").reindex(dates)
+        columns.update({name: aligned[name].to_numpy() for name in aligned.columns if name not in columns})
+    return pd.DataFrame(columns, copy=False)
+
+# Merge, fill, normalize and engineer the model features
+def build_features(sp500_data, macroeco_data, news_sentiment, top10_pivot, tickers=TOP10_STOCK_NAMES,
+                   compact=False, report=None):
+    """
+    Builds the feature table (one row per day) from the reindexed sources.
+    compact: float32 / int8 columns and a single-allocation merge (see memory_report.compact_frame).
+    report: Optional MemoryReport recording each step.
+    """
+    report = report if report is not None else MemoryReport("build_features")
+    if compact:
+        combined_data = compact_frame(align_sources(sp500_data, [macroeco_data, news_sentiment, top10_pivot]))
+    else:
+        # Merge with main dataset (Include News & Macro Data)
+        combined_data = sp500_data.merge(macroeco_data, on="Date", how="left")
+        combined_data = combined_data.merge(news_sentiment, on="Date", how="left")
+        combined_data = combined_data.merge(top10_pivot, on="Date", how="left")
+    report.step("merge", combined_data)
+
+    # Fill Missing Values
+    combined_data.ffill(inplace=True)
+    combined_data.bfill(inplace=True)
+    report.step("fill", combined_data)
+
+    # Declared features (see feature_registry): standardized inputs, rolling stats, lags and the
+    # 7-day-ahead return, computed in one vectorized pass
+    print("\ Performing Feature Engineering...")
+    registry = default_registry(tickers)
+    # Compact inputs are widened through their decimal form first, so the features match the default build
+    features = compute_features(widen_floats(combined_data) if compact else combined_data, registry)
+    windowed = [spec.name for spec in registry if spec.kind != "standardize" and spec.name in features.columns]
+    features[windowed] = features[windowed].fillna(0)
+    if compact:
+        compact_frame(features)
+    report.step("features", features)
+    combined_data = pd.concat([combined_data, features], axis=1)
+
+    # Target Features
+    combined_data['Price_Direction'] = (combined_data['Future_Return_7'] > 0).astype("int8" if compact else int)
+
+    # Drop `_id` Columns Before Saving
+    combined_data.drop(columns=['_id'], errors='ignore', inplace=True)
+    report.step("combined_data", combined_data)
+    return combined_data
+
+
+# Run the whole preprocessing pipeline
+def run_preprocessing(storage=None, start_date=START_DATE, end_date=END_DATE, compact=False, report=None):
+    """
+    Loads the acquired data, builds the features and publishes the feature store.
+    Args:
+        - storage: StorageBackend (default: the configured backend, MongoDB or the local SQLite file)
+        - start_date, end_date: Continuous daily range of the feature table
+        - compact: Downcast the sources and features to float32 / int8 / category in memory
+          (float columns are published as float64, see memory_report.widen_floats)
+        - report: Optional MemoryReport (bytes per column and RSS after each step)
+
+    Returns:
+        - The feature DataFrame
+    """
+    storage = storage if storage is not None else get_storage()
+    report = report if report is not None else MemoryReport("preprocessing")
+    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
+
+    sp500_data, macroeco_data, news_data, top10_data = load_sources(storage, start_date, end_date)
+    if compact:
+        for frame in (sp500_data, macroeco_data, news_data, top10_data):
+            compact_frame(frame)
+    report.step("load Top10_stocks", top10_data)
+
+    # Clean all Datasets
+    sp500_data = clean_dataframe(sp500_data, "S&P 500")
+    macroeco_data = clean_dataframe(macroeco_data, "Macroeco")
+    news_data = clean_dataframe(news_data, "News")
+    top10_data = clean_dataframe(top10_data, "Top 10 Stocks")
+
+    # Prices are stored per trading session: weekends and holidays take the previous session
+    sp500_data = reindex_dataframe(sp500_data, "S&P 500", date_range, zero_fill=["Return"])
+    macroeco_data = reindex_dataframe(macroeco_data, "Macroeco", date_range)
+    news_sentiment = build_news_sentiment(news_data, date_range)
+    top10_pivot = pivot_top10(top10_data)
+    if not top10_pivot.empty:
+        top10_pivot = densify(top10_pivot, date_range[0], date_range[-1])
+    report.step("reindex", top10_pivot)
+
+    combined_data = build_features(sp500_data, macroeco_data, news_sentiment, top10_pivot,
+                                   compact=compact, report=report)
+
+    # Xlxs for verification
+    #combined_data.to_excel("feature_engineering.xlsx", index=False)
+
+    # Publish the feature store once; train_data / test_data are views over it
+    # (Test Data: 1st Feb 2024 - 31st Mar 2024, see feature_store.SPLIT_VIEWS)
+    # Compact dtypes are for memory only: the store keeps float64 like the default build
+    publish_features(storage, widen_floats(combined_data) if compact else combined_data)
+
+    print("Training & Testing Data Ready! ")
+    return combined_data
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Build and publish the feature table.")
+    parser.add_argument("--compact", action="store_true", help="float32 / int8 / category columns (about half the memory)")
+    parser.add_argument("--memory-report", metavar="CSV", help="write bytes per column and the RSS (current, change, process peak) per step to a CSV file")
+    args = parser.parse_args()
+
+    report = MemoryReport("preprocessing")
+    run_preprocessing(compact=args.compact, report=report)
+    print(report.summary().to_string(index=False))
+    if args.memory_report:
+        report.write(args.memory_report)
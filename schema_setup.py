@@ -0,0 +1,251 @@
+"""
+Schema & Index Bootstrap for the Sp500 Database
+Gives every collection a canonical datetime `Date` field and the indexes its loaders filter on
+"""
+
+import logging
+
+from pymongo import ASCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+from mongoDB_setup import connect_mongo
+from mongo_reader import NUMBER_WRAPPERS
+
+
+# Collection layout: indexes per collection, and whether a new collection is created as a
+# MongoDB time-series collection. Time-series only fits append-only series without unique
+# keys (the top-10 prices and feature tables are upserted/replaced, so they stay regular).
+COLLECTION_SCHEMAS = {
+    "sp500_data": {
+        "timeseries": {"timeField": "Date", "granularity": "hours"},
+        "indexes": [([("Date", ASCENDING)], {})],
+    },
+    "macroeco": {
+        "timeseries": {"timeField": "Date", "granularity": "hours"},
+        "indexes": [([("Date", ASCENDING)], {})],
+    },
+    "Top10_stocks": {
+        # Fields stored as native doubles (older JSON imports wrote {"$numberDouble": ...} / strings)
+        "numeric": ["Open", "High", "Low", "Close", "Adj Close", "Volume"],
+        "indexes": [
+            ([("Ticker", ASCENDING), ("Date", ASCENDING)], {"unique": True}),
+            ([("Date", ASCENDING)], {}),
+        ],
+    },
+    "news_data": {
+        "indexes": [
+            # One document per article; repeat sightings under other keywords extend SearchKeywords
+            ([("URL", ASCENDING)], {"unique": True, "partialFilterExpression": {"URL": {"$type": "string"}}}),
+            ([("Date", ASCENDING)], {}),
+            ([("SearchKeywords", ASCENDING), ("Date", ASCENDING)], {}),
+        ],
+    },
+    # Pre-aggregated daily sentiment, maintained by news_daily.py ($merge on these keys)
+    "news_daily": {"indexes": [([("Date", ASCENDING)], {"unique": True})]},
+    "news_daily_keywords": {"indexes": [([("Keyword", ASCENDING), ("Date", ASCENDING)], {"unique": True})]},
+    # One row per day: the incremental feature engine upserts on Date
+    "feature_engineering": {"indexes": [([("Date", ASCENDING)], {"unique": True})]},
+    "feature_store_meta": {"indexes": [([("Name", ASCENDING)], {"unique": True})]},
+    "feature_state": {"indexes": [([("Name", ASCENDING)], {"unique": True})]},
+    "panel_features": {
+        "indexes": [
+            ([("Ticker", ASCENDING), ("Date", ASCENDING)], {"unique": True}),
+            ([("Date", ASCENDING)], {}),
+        ],
+    },
+    "acquisition_checkpoints": {
+        "indexes": [([("Source", ASCENDING), ("Kind", ASCENDING), ("Key", ASCENDING),
+                      ("Shard", ASCENDING), ("Page", ASCENDING)], {"unique": True})],
+    },
+}
+
+
+# Function to Get the Indexes of a Collection
+def collection_indexes(name):
+    """Returns the (keys, options) index list of a collection (a Date index unless configured)."""
+    return COLLECTION_SCHEMAS.get(name, {"indexes": [([("Date", ASCENDING)], {})]})["indexes"]
+
+
+# Function to Create a Collection with its Layout
+def ensure_collection(db, name):
+    """
+    Creates a collection (as time-series where configured) if it does not exist, and builds its indexes.
+    Args:
+        - db: pymongo Database
+        - name: Collection name
+
+    Returns:
+        - The pymongo Collection
+    """
+    schema = COLLECTION_SCHEMAS.get(name, {})
+
+    if name not in db.list_collection_names():
+        options = {"timeseries": schema["timeseries"]} if "timeseries" in schema else {}
+        try:
+            db.create_collection(name, **options)
+            logging.info(f"Created collection '{name}'" + (" (time-series)" if options else ""))
+        except (CollectionInvalid, OperationFailure) as e:
+            # Already created concurrently, or time-series not supported by this server
+            logging.warning(f"Could not create '{name}' with {options or 'defaults'}: {e}")
+
+    collection = db[name]
+    for keys, options in collection_indexes(name):
+        try:
+            collection.create_index(keys, **options)
+        except OperationFailure as e:
+            logging.warning(f"Could not create index {keys} on '{name}': {e}")
+    return collection
+
+
+# Function to Convert String Dates into Native BSON Dates
+def canonicalize_dates(db, name, date_col="Date"):
+    """
+    Rewrites 'YYYY-MM-DD' string dates as BSON datetimes, server side.
+    Args:
+        - db: pymongo Database
+        - name: Collection name
+        - date_col: Name of the date field
+
+    Returns:
+        - Number of documents converted
+    """
+    options = db[name].options()
+    if options.get("timeseries", {}).get("timeField") == date_col:
+        return 0  # the time field of a time-series collection is always a BSON date
+
+    try:
+        result = db[name].update_many(
+            {date_col: {"$type": "string"}},
+            [{"$set": {date_col: {"$dateFromString": {"dateString": f"${date_col}", "onError": f"${date_col}"}}}}],
+        )
+    except OperationFailure as e:
+        # e.g. a string and a datetime copy of the same (Ticker, Date) colliding on a unique index
+        logging.error(f"Could not convert string dates in '{name}': {e}")
+        return 0
+    if result.modified_count:
+        logging.info(f"Converted {result.modified_count} string dates to datetime in '{name}'")
+    return result.modified_count
+
+
+# Function to Rewrite Wrapped Numbers as Native Doubles
+def canonicalize_numbers(db, name, fields=None):
+    """
+    Rewrites Extended JSON number wrappers ({"$numberDouble": "1.5"}) and numeric strings in the
+    numeric fields of a collection as BSON doubles, server side, so loaders read native numbers.
+    Args:
+        - db: pymongo Database
+        - name: Collection name
+        - fields: Fields to convert (default: the "numeric" fields of its schema)
+
+    Returns:
+        - Number of documents converted
+    """
+    fields = fields if fields is not None else COLLECTION_SCHEMAS.get(name, {}).get("numeric", [])
+    if not fields:
+        return 0
+
+    converted = {}
+    for field in fields:
+        value = {"$getField": {"field": field, "input": "$$ROOT"}}
+        payload = {"$ifNull": [
+            *[{"$getField": {"field": {"$literal": wrapper}, "input": value}} for wrapper in NUMBER_WRAPPERS],
+            value,
+        ]}
+        # Values that do not parse are left as they are
+        decoded = {"$convert": {"input": payload, "to": "double", "onError": value, "onNull": value}}
+        converted[field] = {"$cond": [{"$in": [{"$type": value}, ["object", "string"]]}, decoded, value]}
+
+    try:
+        result = db[name].update_many(
+            {"$or": [{field: {"$type": ["object", "string"]}} for field in fields]},
+            [{"$replaceWith": {"$setField": {"field": field, "input": "$$ROOT", "value": converted[field]}}}
+             for field in fields],
+        )
+    except OperationFailure as e:
+        # $getField / $setField need MongoDB 5.0
+        logging.error(f"Could not convert wrapped numbers in '{name}': {e}")
+        return 0
+    if result.modified_count:
+        logging.info(f"Converted wrapped numbers to doubles in {result.modified_count} documents of '{name}'")
+    return result.modified_count
+
+
+# Function to Merge Duplicate News Articles
+def dedupe_news(db, name="news_data"):
+    """
+    Collapses news documents sharing a URL into one (keywords merged into SearchKeywords),
+    so the unique URL index can be built on data stored before it existed.
+    Returns:
+        - Number of duplicate documents removed
+    """
+    collection = db[name]
+    # Older documents only have the single SearchKeyword
+    collection.update_many({"SearchKeywords": {"$exists": False}, "SearchKeyword": {"$exists": True}},
+                           [{"$set": {"SearchKeywords": ["$SearchKeyword"]}}])
+
+    duplicates = collection.aggregate([
+        {"$match": {"URL": {"$type": "string"}}},
+        {"$group": {"_id": "$URL", "ids": {"$push": "$_id"}, "keywords": {"$push": "$SearchKeywords"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ], allowDiskUse=True)
+
+    removed = 0
+    for group in duplicates:
+        keep, *drop = group["ids"]
+        keywords = sorted({keyword for keywords in group["keywords"] for keyword in keywords or [] if keyword})
+        collection.update_one({"_id": keep}, {"$addToSet": {"SearchKeywords": {"$each": keywords}}})
+        removed += collection.delete_many({"_id": {"$in": drop}}).deleted_count
+    if removed:
+        logging.info(f"Merged {removed} duplicate articles in '{name}'")
+    return removed
+
+
+# Function to Flatten Nested Sentiment Scores
+def flatten_news_sentiment(db, name="news_data"):
+    """
+    Copies the nested Sentiment scores of older articles into the flat numeric fields written at
+    ingest (Title_/Abstract_ Compound, Pos, Neg and Sentiment_Compound), server side.
+    Returns:
+        - Number of documents updated
+    """
+    scores = {}
+    for prefix, nested in (("Title", "TitleSentiment"), ("Abstract", "AbstractSentiment")):
+        for key in ("compound", "pos", "neg"):
+            scores[f"{prefix}_{key.capitalize()}"] = {"$ifNull": [f"$Sentiment.{nested}.{key}", 0.0]}
+    result = db[name].update_many(
+        {"Sentiment_Compound": {"$exists": False}, "Sentiment": {"$type": "object"}},
+        [{"$set": scores},
+         {"$set": {"Sentiment_Compound": {"$divide": [{"$add": ["$Title_Compound", "$Abstract_Compound"]}, 2]}}}],
+    )
+    if result.modified_count:
+        logging.info(f"Flattened the sentiment of {result.modified_count} articles in '{name}'")
+    return result.modified_count
+
+
+# Function to Bootstrap the Whole Database
+def ensure_schema(db=None):
+    """
+    Bootstraps every known collection: layout, canonical dates and numbers, then indexes.
+    """
+    db = db if db is not None else connect_mongo()
+    for name in COLLECTION_SCHEMAS:
+        if name in db.list_collection_names():
+            canonicalize_dates(db, name)
+            canonicalize_numbers(db, name)
+            if name == "news_data":
+                dedupe_news(db, name)
+                flatten_news_sentiment(db, name)
+        ensure_collection(db, name)
+
+    # Daily sentiment of every stored article (later ingests refresh only the days they change)
+    if "news_data" in db.list_collection_names():
+        from storage_backend import MongoBackend
+        from news_daily import refresh_news_daily
+
+        refresh_news_daily(MongoBackend(db))
+    logging.info("Schema and indexes are up to date.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    ensure_schema()
@@ -0,0 +1,669 @@
+"""
+Pluggable Storage Backends
+MongoDB for production and an embedded SQLite file so the pipeline can run offline / in CI
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from feature_store import record_write
+from mongo_reader import DEFAULT_BATCH_SIZE, date_range_query, frame_from_documents
+
+
+# Backend selection (override with environment variables)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")        # "mongo" or "sqlite"
+STORAGE_PATH = os.getenv("STORAGE_PATH", "local_store.sqlite")  # SQLite file for the embedded backend
+
+# Collections used by the pipeline (copied by `python storage_backend.py snapshot`)
+PIPELINE_COLLECTIONS = ["sp500_data", "macroeco", "news_data", "news_daily", "news_daily_keywords", "Top10_stocks",
+                        "feature_engineering"]
+
+
+class StorageBackend:
+    """
+    Interface shared by every storage backend.
+    Collections hold schemaless documents (dicts) with a `Date` field used for range queries.
+    """
+
+    def find(self, name, start=None, end=None, query=None, fields=None, date_col="Date",
+             batch_size=DEFAULT_BATCH_SIZE):
+        """Yields documents of a collection, filtered by date range and query, without `_id`."""
+        raise NotImplementedError
+
+    def count(self, name, query=None):
+        """Returns the number of documents matching the query."""
+        raise NotImplementedError
+
+    def latest(self, name, date_col="Date", query=None):
+        """Returns the largest value of the date field, or None for an empty collection."""
+        raise NotImplementedError
+
+    def insert_many(self, name, documents, batch_size=DEFAULT_BATCH_SIZE):
+        """Appends documents. Returns the number inserted."""
+        raise NotImplementedError
+
+    def upsert_many(self, name, documents, keys, batch_size=DEFAULT_BATCH_SIZE):
+        """Inserts or updates ($set) documents matched on `keys`. Returns a summary dictionary."""
+        raise NotImplementedError
+
+    def replace_collection(self, name, documents):
+        """Replaces the whole content of a collection. Returns the number of documents written."""
+        raise NotImplementedError
+
+    def aggregate(self, name, pipeline):
+        """Runs a MongoDB-style aggregation pipeline and returns the result documents."""
+        raise NotImplementedError
+
+    def create_view(self, name, source, query):
+        """(Re)defines `name` as a read-only view of the documents of `source` matching `query`."""
+        raise NotImplementedError
+
+    def drop_collection(self, name):
+        """Deletes a collection or view (no-op if it does not exist)."""
+        raise NotImplementedError
+
+    def read_frame(self, name, fields=None, start=None, end=None, query=None, date_col="Date",
+                   batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Reads a collection into a typed DataFrame (streamed in batches, see mongo_reader).
+        Args:
+            - name: Collection name
+            - fields: Optional list of fields to project
+            - start, end: Optional inclusive bounds on the date field
+            - query: Extra MongoDB-style filter
+            - date_col: Name of the date field
+
+        Returns:
+            - Pandas DataFrame
+        """
+        full_query = date_range_query(query, start, end, date_col)
+        total = self.count(name, full_query)
+        documents = self.find(name, query=full_query, fields=fields, date_col=date_col, batch_size=batch_size)
+        return frame_from_documents(documents, fields, total=total, batch_size=batch_size, date_col=date_col)
+
+
+class MongoBackend(StorageBackend):
+    """Storage backend on a MongoDB database (the shared pooled client from mongoDB_setup)."""
+
+    def __init__(self, db=None):
+        if db is None:
+            from mongoDB_setup import connect_mongo
+            db = connect_mongo()
+        self.db = db
+
+    def find(self, name, start=None, end=None, query=None, fields=None, date_col="Date",
+             batch_size=DEFAULT_BATCH_SIZE):
+        projection = {"_id": 0}
+        if fields is not None:
+            projection.update({field: 1 for field in fields})
+        cursor = self.db[name].find(date_range_query(query, start, end, date_col), projection, batch_size=batch_size)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+    def count(self, name, query=None):
+        return self.db[name].count_documents(query or {})
+
+    def latest(self, name, date_col="Date", query=None):
+        doc = self.db[name].find_one(query or {}, {date_col: 1, "_id": 0}, sort=[(date_col, -1)])
+        return doc.get(date_col) if doc else None
+
+    def insert_many(self, name, documents, batch_size=DEFAULT_BATCH_SIZE):
+        from bulk_writer import bulk_insert
+        return bulk_insert(self.db[name], documents, batch_size)["inserted"]
+
+    def upsert_many(self, name, documents, keys, batch_size=DEFAULT_BATCH_SIZE):
+        from bulk_writer import bulk_upsert
+        return bulk_upsert(self.db[name], documents, keys, batch_size)
+
+    def replace_collection(self, name, documents):
+        # Build the new content (and its indexes) in a staging collection, then rename it over the
+        # target: the rename is atomic, so readers see either the old or the new content, never a
+        # half-written or empty collection
+        from bulk_writer import bulk_insert
+        from schema_setup import collection_indexes
+
+        staging_name = f"{name}__staging"
+        self.db.drop_collection(staging_name)
+        self.db.create_collection(staging_name)
+        staging = self.db[staging_name]
+        written = bulk_insert(staging, documents)["inserted"]
+        # Indexes are built once on the full staging data and move with the rename
+        for keys, options in collection_indexes(name):
+            staging.create_index(keys, **options)
+        staging.rename(name, dropTarget=True)
+        return written
+
+    def aggregate(self, name, pipeline):
+        return list(self.db[name].aggregate(pipeline, allowDiskUse=True))
+
+    def create_view(self, name, source, query):
+        self.db.drop_collection(name)  # drops a view or an old materialized copy alike
+        self.db.create_collection(name, viewOn=source, pipeline=[{"$match": query}])
+
+    def drop_collection(self, name):
+        self.db.drop_collection(name)
+
+
+# Function to Encode Values for JSON Storage
+def _encode(value):
+    """JSON fallback for datetimes and NumPy scalars."""
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return {"$date": pd.Timestamp(value).isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store value of type {type(value).__name__}")
+
+
+# Function to Decode Values from JSON Storage
+def _decode(obj):
+    """json object_hook restoring datetimes written by _encode."""
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+# Function to Normalize a Date Value for the Indexed Date Column
+def _date_key(value):
+    """Maps datetimes and 'YYYY-MM-DD' strings to one sortable ISO string."""
+    if value is None:
+        return None
+    try:
+        return pd.Timestamp(value).isoformat()
+    except (ValueError, TypeError):
+        return str(value)
+
+
+# Function to Evaluate a MongoDB-Style Filter on One Document
+_COMPARATORS = {
+    "$gt": lambda a, b: a > b, "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b, "$lte": lambda a, b: a <= b,
+    "$ne": lambda a, b: a != b, "$eq": lambda a, b: a == b,
+    "$in": lambda a, b: a in b, "$nin": lambda a, b: a not in b,
+}
+
+
+def _matches(doc, query, date_col="Date"):
+    """Supports equality and $gt/$gte/$lt/$lte/$ne/$eq/$in/$nin/$exists on top-level fields, and $and."""
+    for field, condition in query.items():
+        if field == "$and":
+            if not all(_matches(doc, part, date_col) for part in condition):
+                return False
+            continue
+        value = doc.get(field)
+        if field == date_col:
+            value = _date_key(value)
+        if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+            for op, operand in condition.items():
+                if op == "$exists":
+                    if (field in doc) != bool(operand):
+                        return False
+                    continue
+                if field == date_col:
+                    operand = [_date_key(v) for v in operand] if op in ("$in", "$nin") else _date_key(operand)
+                if value is None and op in ("$gt", "$gte", "$lt", "$lte"):
+                    return False
+                try:
+                    if not _COMPARATORS[op](value, operand):
+                        return False
+                except TypeError:
+                    return False
+        else:
+            expected = _date_key(condition) if field == date_col else condition
+            if value != expected:
+                return False
+    return True
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Embedded storage backend: one SQLite table per collection, documents stored as JSON
+    with an indexed, normalized date column (so string and datetime dates compare alike).
+    """
+
+    def __init__(self, path=STORAGE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Key fields registered by upsert_many act like a unique index on the collection
+        self._conn.execute("CREATE TABLE IF NOT EXISTS _collection_keys (name TEXT PRIMARY KEY, keys TEXT NOT NULL)")
+        self._keys = {name: tuple(json.loads(keys)) for name, keys in self._conn.execute("SELECT name, keys FROM _collection_keys")}
+        self._tables = set()
+
+    def _table(self, name):
+        """Creates the table for a collection on first use and returns its quoted name."""
+        table = '"' + name.replace('"', '""') + '"'
+        if name not in self._tables:
+            with self._lock:
+                if self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = ?", (name,)).fetchone():
+                    self._tables.add(name)
+                    return table
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    "(id INTEGER PRIMARY KEY, date TEXT, key TEXT UNIQUE, doc TEXT NOT NULL)"
+                )
+                index = '"' + f"idx_{name}_date".replace('"', '""') + '"'
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {table} (date)")
+            self._tables.add(name)
+        return table
+
+    @staticmethod
+    def _where(query):
+        """
+        Translates the Date part of a filter into SQL on the indexed date column.
+        Returns:
+            - WHERE clauses, their parameters, and the rest of the filter (checked in Python)
+        """
+        clauses, params = [], []
+        rest = dict(query or {})
+        condition = rest.get("Date")
+        if isinstance(condition, dict):
+            for op, symbol in (("$gte", ">="), ("$gt", ">"), ("$lte", "<="), ("$lt", "<")):
+                if op in condition:
+                    clauses.append(f"date {symbol} ?")
+                    params.append(_date_key(condition[op]))
+            if set(condition) <= {"$gte", "$gt", "$lte", "$lt"}:
+                del rest["Date"]
+        elif condition is not None:
+            clauses.append("date = ?")
+            params.append(_date_key(condition))
+            del rest["Date"]
+        # Every part of an $and must hold: its date conditions narrow the SQL too (the whole
+        # $and is still checked in Python)
+        for part in rest.get("$and", []):
+            part_clauses, part_params, _ = SQLiteBackend._where(part)
+            clauses += part_clauses
+            params += part_params
+        return clauses, params, rest
+
+    def _select(self, name, query, date_col="Date"):
+        """Pushes the date-range part of the filter into SQL; the rest is checked in Python."""
+        sql = f"SELECT doc FROM {self._table(name)}"
+        clauses, params, _ = self._where(query)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return sql + " ORDER BY id", params
+
+    def find(self, name, start=None, end=None, query=None, fields=None, date_col="Date",
+             batch_size=DEFAULT_BATCH_SIZE):
+        query = date_range_query(query, start, end, date_col)
+        sql, params = self._select(name, query, date_col)
+        cursor = self._conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for (raw,) in rows:
+                doc = json.loads(raw, object_hook=_decode)
+                if query and not _matches(doc, query, date_col):
+                    continue
+                if fields is not None:
+                    doc = {field: doc[field] for field in fields if field in doc}
+                yield doc
+
+    def count(self, name, query=None):
+        clauses, params, rest = self._where(query)
+        if not rest:
+            where = " WHERE " + " AND ".join(clauses) if clauses else ""
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self._table(name)}{where}", params).fetchone()[0]
+        return sum(1 for _ in self.find(name, query=query))
+
+    def latest(self, name, date_col="Date", query=None):
+        clauses, params, rest = self._where(query)
+        if date_col == "Date":
+            order = "date"
+        else:
+            # Other date fields are not indexed, but SQLite still sorts them on their stored ISO strings
+            path = '$."' + date_col.replace("'", "''") + '"'
+            order = f"COALESCE(json_extract(doc, '{path}.\"$date\"'), json_extract(doc, '{path}'))"
+        clauses = clauses + [f"{order} IS NOT NULL"]
+        sql = f"SELECT doc FROM {self._table(name)} WHERE {' AND '.join(clauses)} ORDER BY {order} DESC"
+        # Newest first: the first document matching the rest of the filter holds the latest date
+        for (raw,) in self._conn.execute(sql if rest else sql + " LIMIT 1", params):
+            doc = json.loads(raw, object_hook=_decode)
+            if not rest or _matches(doc, rest, date_col):
+                return doc.get(date_col)
+        return None
+
+    @staticmethod
+    def _key(doc, keys):
+        """Serializes the key fields of a document (dates normalized like the date column)."""
+        values = [_date_key(doc.get(k)) if k == "Date" else doc.get(k) for k in keys]
+        return json.dumps(values, default=_encode, separators=(",", ":"))
+
+    def _rows(self, name, documents):
+        """Serializes documents into (date, key, doc) rows."""
+        keys = self._keys.get(name)
+        for doc in documents:
+            doc = {k: v for k, v in doc.items() if k != "_id"}
+            key = self._key(doc, keys) if keys else None
+            yield _date_key(doc.get("Date")), key, json.dumps(doc, default=_encode)
+
+    def _register_keys(self, name, keys):
+        """
+        Records the key fields of a collection and fills the key column of existing rows.
+        Rows sharing a key (inserted before the key existed) are deduplicated first: the last
+        inserted one is kept, like the document a later upsert would have left.
+        """
+        keys = tuple(keys)
+        if self._keys.get(name) == keys:
+            return
+        table = self._table(name)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("INSERT OR REPLACE INTO _collection_keys (name, keys) VALUES (?, ?)", (name, json.dumps(keys)))
+            latest = {}
+            for row_id, doc in self._conn.execute(f"SELECT id, doc FROM {table} ORDER BY id"):
+                latest[self._key(json.loads(doc, object_hook=_decode), keys)] = row_id
+            kept = set(latest.values())
+            duplicates = [(row_id,) for (row_id,) in self._conn.execute(f"SELECT id FROM {table}") if row_id not in kept]
+            if duplicates:
+                logging.warning(f"Removing {len(duplicates)} duplicate {keys} rows of '{name}' (keeping the last of each)")
+                self._conn.executemany(f"DELETE FROM {table} WHERE id = ?", duplicates)
+            # Cleared first so a row taking over another row's previous key does not conflict
+            self._conn.execute(f"UPDATE {table} SET key = NULL")
+            self._conn.executemany(f"UPDATE {table} SET key = ? WHERE id = ?",
+                                   [(key, row_id) for key, row_id in latest.items()])
+        self._keys[name] = keys
+
+    def insert_many(self, name, documents, batch_size=DEFAULT_BATCH_SIZE):
+        table = self._table(name)
+        inserted = 0
+        rows = self._rows(name, documents)
+        with self._lock:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                with self._conn:
+                    self._conn.execute("BEGIN")
+                    before = self._conn.total_changes
+                    # Duplicate keys are skipped, like a unique-index error in an unordered bulk insert
+                    self._conn.executemany(f"INSERT OR IGNORE INTO {table} (date, key, doc) VALUES (?, ?, ?)", batch)
+                    inserted += self._conn.total_changes - before
+        return inserted
+
+    def upsert_many(self, name, documents, keys, batch_size=DEFAULT_BATCH_SIZE):
+        self._register_keys(name, keys)
+        table = self._table(name)
+        summary = {"batches": 0, "upserted": 0, "modified": 0, "errors": 0, "seconds": 0.0}
+        documents = iter(documents)
+        with self._lock:
+            while True:
+                batch = [{k: v for k, v in doc.items() if k != "_id"} for doc in islice(documents, batch_size)]
+                if not batch:
+                    break
+                start = time.perf_counter()
+                batch_keys = [self._key(doc, keys) for doc in batch]
+                with self._conn:
+                    self._conn.execute("BEGIN")
+                    stored = dict(self._conn.execute(
+                        f"SELECT key, doc FROM {table} WHERE key IN (SELECT value FROM json_each(?))",
+                        (json.dumps(batch_keys),)))
+                    merged = {key: json.loads(doc, object_hook=_decode) for key, doc in stored.items()}
+                    # $set semantics: each top-level field is replaced as a whole (None stores null,
+                    # a nested document replaces the stored one) and untouched fields are kept
+                    for key, doc in zip(batch_keys, batch):
+                        merged[key] = {**merged.get(key, {}), **doc}
+                    rows = [(_date_key(merged[key].get("Date")), key, json.dumps(merged[key], default=_encode))
+                            for key in dict.fromkeys(batch_keys)]
+                    self._conn.executemany(
+                        f"INSERT INTO {table} (date, key, doc) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET date = excluded.date, doc = excluded.doc",
+                        rows,
+                    )
+                summary["batches"] += 1
+                summary["upserted"] += len(merged) - len(stored)
+                # Like MongoDB's nModified: stored documents the upsert actually changed
+                summary["modified"] += sum(1 for _, key, doc in rows if key in stored and stored[key] != doc)
+                summary["seconds"] += time.perf_counter() - start
+        if summary["modified"]:
+            record_write(self, name)
+        return summary
+
+    def replace_collection(self, name, documents):
+        table = self._table(name)
+        rows = list(self._rows(name, documents))
+        # Single transaction: readers see either the old or the new content, never an empty table
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(f"DELETE FROM {table}")
+            self._conn.executemany(f"INSERT OR IGNORE INTO {table} (date, key, doc) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def aggregate(self, name, pipeline):
+        pipeline = list(pipeline)
+        merge = pipeline.pop()["$merge"] if pipeline and "$merge" in pipeline[-1] else None
+        # A leading $match is pushed down, so only the matching documents are decoded
+        query = pipeline[0]["$match"] if pipeline and "$match" in pipeline[0] else None
+        results = run_pipeline(self.find(name, query=query), pipeline)
+        if merge is None:
+            return results
+        # $merge: upsert the results into the target, matched on its "on" fields
+        keys = merge.get("on", "_id")
+        self.upsert_many(merge["into"], results, keys=(keys,) if isinstance(keys, str) else tuple(keys))
+        return []
+
+    def create_view(self, name, source, query, date_col="Date"):
+        # SQL views cannot take bound parameters, so only date bounds (normalized ISO strings) are supported
+        if set(query) - {date_col}:
+            raise NotImplementedError("SQLite views only support filters on the date field")
+        select_sql, params = self._select(source, query, date_col)
+        for param in params:
+            select_sql = select_sql.replace("?", "'" + str(param).replace("'", "''") + "'", 1)
+        select_sql = select_sql.replace("SELECT doc", "SELECT id, date, key, doc", 1)
+        view = '"' + name.replace('"', '""') + '"'
+        with self._lock:
+            kind = self._conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+            if kind:
+                self._conn.execute(f"DROP {'VIEW' if kind[0] == 'view' else 'TABLE'} {view}")
+            self._conn.execute(f"CREATE VIEW {view} AS {select_sql}")
+        self._tables.add(name)
+
+    def drop_collection(self, name):
+        table = '"' + name.replace('"', '""') + '"'
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            kind = self._conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+            if kind:
+                self._conn.execute(f"DROP {'VIEW' if kind[0] == 'view' else 'TABLE'} {table}")
+            self._conn.execute("DELETE FROM _collection_keys WHERE name = ?", (name,))
+        self._tables.discard(name)
+        self._keys.pop(name, None)
+
+
+# Aggregation Pipeline Evaluation for the Embedded Backend
+def _resolve(doc, expression):
+    """Evaluates '$field' references and constants."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = doc
+        for part in expression[1:].split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+    if isinstance(expression, dict):
+        return {k: _resolve(doc, v) for k, v in expression.items()}
+    return expression
+
+
+def _group(documents, spec):
+    """$group with $sum/$avg/$min/$max/$first/$last/$push/$addToSet accumulators."""
+    groups = {}
+    for doc in documents:
+        group_id = _resolve(doc, spec["_id"])
+        key = json.dumps(group_id, default=_encode, sort_keys=True)
+        state = groups.setdefault(key, {"_id": group_id, "_values": {}})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, expression), = accumulator.items()
+            state["_values"].setdefault(field, (op, []))[1].append(_resolve(doc, expression))
+
+    results = []
+    for state in groups.values():
+        out = {"_id": state["_id"]}
+        for field, (op, values) in state["_values"].items():
+            numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+            present = [v for v in values if v is not None]
+            if op == "$sum":
+                out[field] = sum(numbers)
+            elif op == "$avg":
+                out[field] = sum(numbers) / len(numbers) if numbers else None
+            elif op == "$min":
+                out[field] = min(present) if present else None
+            elif op == "$max":
+                out[field] = max(present) if present else None
+            elif op == "$first":
+                out[field] = values[0] if values else None
+            elif op == "$last":
+                out[field] = values[-1] if values else None
+            elif op == "$push":
+                out[field] = values
+            elif op == "$addToSet":
+                out[field] = list(dict.fromkeys(json.dumps(v, default=_encode) for v in values))
+                out[field] = [json.loads(v, object_hook=_decode) for v in out[field]]
+            else:
+                raise NotImplementedError(f"Accumulator {op} is not supported by the embedded backend")
+        results.append(out)
+    return results
+
+
+def run_pipeline(documents, pipeline):
+    """
+    Evaluates the subset of MongoDB aggregation used by the project on an iterable of documents.
+    Supported stages: $match, $project, $addFields/$set, $unwind, $group, $sort, $skip, $limit, $count
+    ($merge is applied by SQLiteBackend.aggregate).
+    """
+    documents = list(documents)
+    for stage in pipeline:
+        (op, spec), = stage.items()
+        if op == "$match":
+            documents = [doc for doc in documents if _matches(doc, spec)]
+        elif op == "$project":
+            include = {k: v for k, v in spec.items() if not (v is False or v == 0)}
+            keep_id = "_id" not in spec
+            projected = []
+            for doc in documents:
+                out = {"_id": doc["_id"]} if keep_id and "_id" in doc else {}
+                for field, value in include.items():
+                    if value is True or value == 1:
+                        if field in doc:
+                            out[field] = doc[field]
+                    else:
+                        out[field] = _resolve(doc, value)
+                projected.append(out)
+            documents = projected
+        elif op in ("$addFields", "$set"):
+            documents = [{**doc, **{k: _resolve(doc, v) for k, v in spec.items()}} for doc in documents]
+        elif op == "$unwind":
+            # One document per array element; documents without elements are dropped (MongoDB default)
+            field = (spec["path"] if isinstance(spec, dict) else spec)[1:]
+            documents = [{**doc, field: value} for doc in documents
+                         for value in (doc.get(field) if isinstance(doc.get(field), list) else
+                                       [doc[field]] if doc.get(field) is not None else [])]
+        elif op == "$group":
+            documents = _group(documents, spec)
+        elif op == "$sort":
+            for field, direction in reversed(list(spec.items())):
+                documents.sort(key=lambda d: (d.get(field) is not None, _date_key(d.get(field)) if field == "Date" else d.get(field)),
+                               reverse=direction < 0)
+        elif op == "$skip":
+            documents = documents[spec:]
+        elif op == "$limit":
+            documents = documents[:spec]
+        elif op == "$count":
+            documents = [{spec: len(documents)}]
+        else:
+            raise NotImplementedError(f"Stage {op} is not supported by the embedded backend")
+    return documents
+
+
+# Function to Get the Configured Backend
+_storage = None
+
+
+def get_storage():
+    """
+    Returns the process-wide storage backend selected by STORAGE_BACKEND ("mongo" or "sqlite").
+    """
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "sqlite":
+            logging.info(f"Using embedded SQLite storage at {STORAGE_PATH}")
+            _storage = SQLiteBackend(STORAGE_PATH)
+        elif STORAGE_BACKEND == "mongo":
+            _storage = MongoBackend()
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}' (expected 'mongo' or 'sqlite').")
+    return _storage
+
+
+# Function to Copy Collections between Backends
+def snapshot(source, target, names=PIPELINE_COLLECTIONS):
+    """Copies collections from one backend to another (e.g. Atlas -> local SQLite file)."""
+    for name in names:
+        written = target.replace_collection(name, source.find(name))
+        logging.info(f"Copied {written} documents of '{name}'")
+
+
+# Function to Measure Backend Throughput
+def benchmark(storage, rows=100_000, seed=42):
+    """
+    Writes and reads a synthetic daily price collection and reports documents per second.
+    The same seed and row count give the same workload on every backend.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1990-01-01", periods=rows, freq="D")
+    prices = 100 + rng.standard_normal(rows).cumsum()
+    documents = [{"Date": d.to_pydatetime(), "Ticker": "BENCH", "Adj_Close": float(p)} for d, p in zip(dates, prices)]
+    name = "benchmark_prices"
+    results = {}
+
+    start = time.perf_counter()
+    storage.replace_collection(name, documents)
+    results["replace_collection"] = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    storage.upsert_many(name, documents[: rows // 10], keys=("Ticker", "Date"))
+    results["upsert_many"] = (rows // 10) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    frame = storage.read_frame(name)
+    results["read_frame"] = len(frame) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    window = storage.read_frame(name, start=dates[rows // 2], end=dates[rows // 2 + 365])
+    results["read_frame_1y_range"] = len(window) / (time.perf_counter() - start)
+
+    for operation, rate in results.items():
+        print(f"{type(storage).__name__:>14} {operation:<22} {rate:>12,.0f} docs/s")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Storage backend utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("snapshot", help="copy the pipeline collections from MongoDB into the SQLite file")
+    bench = sub.add_parser("bench", help="measure throughput of the configured backend")
+    bench.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        snapshot(MongoBackend(), SQLiteBackend(STORAGE_PATH))
+    else:
+        benchmark(get_storage(), rows=args.rows)
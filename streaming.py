@@ -0,0 +1,278 @@
+"""
+Streaming Bar Ingestion and Live MLP Inference
+Consumes bars for ^GSPC and the tracked tickers from a pluggable source, updates the model features
+incrementally, predicts the price direction as each bar closes and appends the bars to storage
+"""
+
+import argparse
+import logging
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from storage_backend import get_storage
+from data_cache import load_collection
+from feature_store import FEATURE_STORE
+from incremental_features import load_state
+from preprocess_feature import TOP10_STOCK_NAMES
+from trading_calendar import is_session
+
+
+# Index ticker and the price field the features are built from
+SP500_TICKER = "^GSPC"
+PRICE_FIELD = "Adj Close"
+
+# Longest look-back of the streaming features (Rolling_*_30), in calendar days
+WINDOW = 30
+
+# Collection the live predictions are appended to
+PREDICTIONS_COLLECTION = "predictions"
+
+
+class BarSource:
+    """
+    Interface of a bar source.
+    stream() yields lists of bars that closed at the same time; a bar is a dictionary with
+    Date (close time), Ticker, Open, High, Low, Close, Adj Close and Volume.
+    """
+
+    def stream(self):
+        raise NotImplementedError
+
+
+class ReplaySource(BarSource):
+    """
+    Replays recorded bars from a long CSV/Parquet file or DataFrame (Date, Ticker, price fields).
+    speed: 1 replays in real time, 60 a minute per second, 0 as fast as possible.
+    """
+
+    def __init__(self, bars, speed=0):
+        if not isinstance(bars, pd.DataFrame):
+            reader = pd.read_parquet if str(bars).endswith(".parquet") else pd.read_csv
+            bars = reader(bars)
+        bars = bars.assign(Date=pd.to_datetime(bars["Date"])).sort_values(["Date", "Ticker"], kind="stable")
+        if PRICE_FIELD not in bars.columns:
+            bars[PRICE_FIELD] = bars["Close"]
+        self.bars = bars
+        self.speed = speed
+
+    def stream(self):
+        previous = None
+        for close_time, group in self.bars.groupby("Date", sort=True):
+            if self.speed and previous is not None:
+                time.sleep((close_time - previous).total_seconds() / self.speed)
+            previous = close_time
+            yield group.to_dict("records")
+
+
+class PollingSource(BarSource):
+    """
+    Polls a price_engine PriceSource (default yfinance) every `interval` seconds and yields the
+    latest daily bar of every ticker whose price changed since the last poll.
+    """
+
+    def __init__(self, tickers, source=None, interval=60, max_polls=None):
+        self.tickers = list(tickers)
+        self.source = source
+        self.interval = interval
+        self.max_polls = max_polls
+
+    def stream(self):
+        from acquisition_storage.price_engine import YFinanceSource
+
+        source = self.source or YFinanceSource()
+        seen, polls = {}, 0
+        while self.max_polls is None or polls < self.max_polls:
+            today = pd.Timestamp.today().normalize()
+            prices = source.fetch(self.tickers, (today - pd.Timedelta(days=7)).strftime("%Y-%m-%d"),
+                                  (today + pd.Timedelta(days=1)).strftime("%Y-%m-%d"))
+            latest = prices.sort_values("Date").groupby("Ticker").tail(1)
+            bars = [bar for bar in latest.to_dict("records")
+                    if seen.get(bar["Ticker"]) != (bar["Date"], bar[PRICE_FIELD])]
+            seen.update({bar["Ticker"]: (bar["Date"], bar[PRICE_FIELD]) for bar in bars})
+            if bars:
+                yield bars
+            polls += 1
+            time.sleep(self.interval)
+
+
+class StreamingFeatures:
+    """
+    Model features of the latest day, updated per bar without recomputing the history:
+    the S&P 500 closes of the last WINDOW calendar days (as-of filled, today's value replaced
+    by each new bar) plus the latest value of every other input column.
+    Normalized_* features use the mean / std persisted with the rolling state of the feature store
+    (fitted by the last full build, like the incremental engine).
+    """
+
+    def __init__(self, features, history, normalization):
+        self.features = list(features)
+        self.normalization = normalization
+        self.closes = deque(history["Adj_Close"].tolist()[-WINDOW:], maxlen=WINDOW)
+        self.day = pd.Timestamp(history["Date"].iloc[-1]).normalize()
+        self.latest = history.iloc[-1].to_dict()
+
+    def update(self, bar):
+        """Applies one bar (the index moves the close series, tickers their latest price)."""
+        value = bar.get(PRICE_FIELD, bar["Close"])
+        if bar["Ticker"] != SP500_TICKER:
+            self.latest[f"{bar['Ticker']}_Adj_Close"] = value
+            return
+        day = pd.Timestamp(bar["Date"]).normalize()
+        if day > self.day:
+            # Calendar days without a bar (weekends, holidays) carry the last close
+            for _ in range(min((day - self.day).days - 1, WINDOW)):
+                self.closes.append(self.closes[-1])
+            self.closes.append(value)
+            self.day = day
+        else:
+            self.closes[-1] = value
+        self.latest["Adj_Close"] = value
+
+    def vector(self):
+        """Returns the feature row (1 x features) in model input order."""
+        closes = np.fromiter(self.closes, dtype=float)
+        derived = {
+            "Rolling_Mean_7": closes[-7:].mean() if len(closes) >= 7 else 0.0,
+            "Rolling_Mean_30": closes[-30:].mean() if len(closes) >= 30 else 0.0,
+            "Rolling_Volatility_30": closes[-30:].std(ddof=1) if len(closes) >= 30 else 0.0,
+            "Lag_1": closes[-2] if len(closes) > 1 else 0.0,
+            "Lag_3": closes[-4] if len(closes) > 3 else 0.0,
+            "Lag_7": closes[-8] if len(closes) > 7 else 0.0,
+        }
+        row = []
+        for feature in self.features:
+            if feature in derived:
+                row.append(derived[feature])
+            elif feature in self.normalization:
+                column, mean, std = self.normalization[feature]
+                row.append((self.latest.get(column, mean) - mean) / std if std else 0.0)
+            else:
+                row.append(self.latest.get(feature, 0.0))
+        return np.array([row], dtype=float)
+
+
+class StreamingPredictor:
+    """
+    Runs the stream: every bar group updates the features and is scored by the model right away;
+    the last bar of each (ticker, day) and the predictions are written when the day is complete.
+    """
+
+    def __init__(self, bundle, storage=None, tickers=TOP10_STOCK_NAMES):
+        self.storage = storage if storage is not None else get_storage()
+        self.model, self.scaler = bundle["model"], bundle["scaler"]
+        self.tickers = set(tickers)
+
+        # Warm start from the published feature table (last WINDOW days) and its persisted normalization
+        raw_columns = ["Date", "Adj_Close", "GDP", "Inflation", "Interest_Rate", "Avg_News_Sentiment"]
+        raw_columns += [f"{ticker}_Adj_Close" for ticker in tickers]
+        table = load_collection(self.storage, FEATURE_STORE, fields=raw_columns).sort_values("Date")
+        if table.empty:
+            raise RuntimeError(f"Feature store '{FEATURE_STORE}' is empty, run preprocess_feature.py first.")
+        self.state = StreamingFeatures(bundle["features"], table, load_state(self.storage).normalization)
+
+        self.pending = {}          # (ticker, day) -> last bar of the day
+        self.predictions = []
+        self.last_close = table["Adj_Close"].iloc[-1]
+        self.latencies = []
+
+    def on_bars(self, bars, received=None):
+        """Scores one group of bars. Returns the prediction dictionary (or None without relevant bars)."""
+        received = received if received is not None else time.perf_counter()
+        bars = [bar for bar in bars if bar["Ticker"] == SP500_TICKER or bar["Ticker"] in self.tickers]
+        if not bars:
+            return None
+        close_time = max(pd.Timestamp(bar["Date"]) for bar in bars)
+        self._flush_completed(close_time.normalize())
+        for bar in bars:
+            self.state.update(bar)
+            self.pending[(bar["Ticker"], pd.Timestamp(bar["Date"]).normalize())] = bar
+
+        # Same transform as the fitted StandardScaler, without its per-call input validation
+        scaled = (self.state.vector() - self.scaler.mean_) / self.scaler.scale_
+        probability = float(self.model.predict_proba(scaled)[0, 1])
+        latency_ms = (time.perf_counter() - received) * 1000
+        self.latencies.append(latency_ms)
+        prediction = {"Date": close_time.normalize().to_pydatetime(), "Bar_Time": close_time.to_pydatetime(),
+                      "Probability_Up": probability, "Price_Direction": int(probability > 0.5),
+                      "Latency_ms": latency_ms}
+        self.predictions.append(prediction)
+        return prediction
+
+    def _flush_completed(self, current_day):
+        """Writes the bars of the days before `current_day` (and their predictions)."""
+        done = sorted(key for key in self.pending if key[1] < current_day)
+        if not done:
+            return
+        index_docs, ticker_docs = [], []
+        for ticker, day in done:
+            bar = self.pending.pop((ticker, day))
+            fields = {field: bar.get(field) for field in ("Open", "High", "Low", "Close", "Volume")}
+            if ticker == SP500_TICKER:
+                close = bar.get(PRICE_FIELD, bar["Close"])
+                index_docs.append(dict(fields, Date=day.to_pydatetime(), Adj_Close=close,
+                                       Return=close / self.last_close - 1))
+                self.last_close = close
+            else:
+                ticker_docs.append(dict(fields, Date=day.to_pydatetime(), Ticker=ticker,
+                                        **{PRICE_FIELD: bar.get(PRICE_FIELD, bar["Close"])}))
+
+        # Days already stored (e.g. a replay over old data) are not appended twice
+        stored_until = self.storage.latest("sp500_data")
+        index_docs = [doc for doc in index_docs if stored_until is None or doc["Date"] > stored_until]
+        index_docs = [doc for doc, session in zip(index_docs, is_session([doc["Date"] for doc in index_docs])) if session]
+        if index_docs:
+            self.storage.insert_many("sp500_data", index_docs)
+        if ticker_docs:
+            self.storage.upsert_many("Top10_stocks", ticker_docs, keys=("Ticker", "Date"))
+        final = [p for p in self.predictions if p["Date"] < current_day]
+        if final:
+            self.storage.insert_many(PREDICTIONS_COLLECTION, final)
+            self.predictions = [p for p in self.predictions if p["Date"] >= current_day]
+
+    def close(self):
+        """Writes everything still buffered. Returns the latency summary in milliseconds."""
+        self._flush_completed(pd.Timestamp.max.normalize())
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {"bars": len(self.latencies), "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)), "max_ms": float(latencies.max())}
+
+
+# Function to Run a Stream until the Source Ends
+def run_stream(source, bundle, storage=None, tickers=TOP10_STOCK_NAMES):
+    """
+    Consumes a BarSource with a StreamingPredictor.
+    Returns:
+        - Latency summary (bars, p50_ms, p95_ms, max_ms)
+    """
+    predictor = StreamingPredictor(bundle, storage, tickers)
+    try:
+        for bars in source.stream():
+            prediction = predictor.on_bars(bars, received=time.perf_counter())
+            if prediction is not None:
+                logging.info(f"{prediction['Bar_Time']:%Y-%m-%d %H:%M} P(up)={prediction['Probability_Up']:.3f} "
+                             f"in {prediction['Latency_ms']:.2f} ms")
+    finally:
+        summary = predictor.close()
+    logging.info(f"{summary['bars']} bar groups scored: p50 {summary['p50_ms']:.2f} ms, "
+                 f"p95 {summary['p95_ms']:.2f} ms, max {summary['max_ms']:.2f} ms")
+    return summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Stream bars into storage and predict the S&P 500 direction live.")
+    parser.add_argument("--replay", default=None, help="replay bars from a long CSV/Parquet file (Date, Ticker, prices)")
+    parser.add_argument("--speed", type=float, default=0, help="replay speed (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--interval", type=float, default=60, help="polling interval in seconds (live mode)")
+    parser.add_argument("--model", default=None, help="model bundle written by main.py --save-model")
+    args = parser.parse_args()
+
+    from MLP_model import MODEL_PATH, load_model
+
+    bundle = load_model(args.model or MODEL_PATH)
+    tickers = [SP500_TICKER] + TOP10_STOCK_NAMES
+    source = ReplaySource(args.replay, args.speed) if args.replay else PollingSource(tickers, interval=args.interval)
+    run_stream(source, bundle)
@@ -0,0 +1,44 @@
+"""
+Shared Test Fixtures
+Puts the project root on sys.path (the modules are run as flat scripts) and provides the storage
+backends every backend test runs against
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage_backend import MongoBackend, SQLiteBackend  # noqa: E402
+
+
+# A real server to run the Mongo tests against (default: mongomock, in memory)
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI")
+
+
+def _mongo_db():
+    if MONGO_TEST_URI:
+        import pymongo
+
+        client = pymongo.MongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=2000)
+        client.drop_database("sp500_test")
+        return client["sp500_test"]
+    mongomock = pytest.importorskip("mongomock")
+    return mongomock.MongoClient()["sp500_test"]
+
+
+@pytest.fixture(params=["sqlite", "mongo"])
+def storage(request, tmp_path):
+    """Each backend test runs once on the embedded SQLite backend and once on MongoDB."""
+    if request.param == "sqlite":
+        yield SQLiteBackend(str(tmp_path / "store.sqlite"))
+    else:
+        yield MongoBackend(_mongo_db())
+
+
+def requires_server(storage):
+    """Skips operations mongomock does not implement ($merge, views) unless MONGO_TEST_URI is set."""
+    if isinstance(storage, MongoBackend) and not MONGO_TEST_URI:
+        pytest.skip("needs a MongoDB server (set MONGO_TEST_URI)")
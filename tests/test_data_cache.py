@@ -0,0 +1,44 @@
+"""
+Parquet Cache Tests
+load_collection serves the cache only while the stamp of the collection is unchanged
+"""
+
+from datetime import datetime
+
+import pytest
+
+import data_cache
+from data_cache import load_collection
+
+
+PRICES = [{"Date": datetime(2024, 1, day), "Ticker": "AAPL", "Adj Close": 100.0 + day} for day in range(1, 11)]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(data_cache, "CACHE_DIR", tmp_path / "cache")
+
+
+def test_appended_rows_refresh_the_cache(storage):
+    storage.upsert_many("Top10_stocks", PRICES[:8], keys=("Ticker", "Date"))
+    assert len(load_collection(storage, "Top10_stocks")) == 8
+
+    storage.upsert_many("Top10_stocks", PRICES, keys=("Ticker", "Date"))
+    assert load_collection(storage, "Top10_stocks")["Adj Close"].tolist() == [doc["Adj Close"] for doc in PRICES]
+
+
+def test_in_place_upsert_invalidates_the_cache(storage):
+    storage.upsert_many("Top10_stocks", PRICES, keys=("Ticker", "Date"))
+    load_collection(storage, "Top10_stocks")
+
+    # A re-upserted lookback row with a revised price: same count, same latest Date
+    storage.upsert_many("Top10_stocks", [dict(PRICES[7], **{"Adj Close": 1.0})], keys=("Ticker", "Date"))
+    frame = load_collection(storage, "Top10_stocks")
+    assert frame.loc[frame["Date"] == datetime(2024, 1, 8), "Adj Close"].tolist() == [1.0]
+
+
+def test_unchanged_upsert_keeps_the_cache(storage):
+    storage.upsert_many("Top10_stocks", PRICES, keys=("Ticker", "Date"))
+    stamp = data_cache.collection_stamp(storage, "Top10_stocks")
+    storage.upsert_many("Top10_stocks", PRICES[-3:], keys=("Ticker", "Date"))
+    assert data_cache.collection_stamp(storage, "Top10_stocks") == stamp
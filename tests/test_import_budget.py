@@ -0,0 +1,13 @@
+"""
+Import-Time Budget Tests
+Every entry point imports within its budget and without the deferred packages (see import_budget.py)
+"""
+
+import pytest
+
+from import_budget import ENTRY_POINTS, check_module
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_entry_point_within_import_budget(module):
+    assert check_module(module) == []
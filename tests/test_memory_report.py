@@ -0,0 +1,26 @@
+"""
+Memory Report Tests
+Records steps of a MemoryReport around known allocations
+"""
+
+import numpy as np
+import pytest
+
+from memory_report import MemoryReport, current_rss
+
+
+def test_steps_record_the_rss_change():
+    if current_rss() is None:
+        pytest.skip("needs /proc/self/statm")
+    report = MemoryReport("test")
+    block = np.ones(64 * 2 ** 20 // 8)
+    report.step("allocate")
+    del block
+    report.step("free")
+
+    summary = report.summary().set_index("Step")
+    # The freed block lowers the current RSS; the process peak keeps the high-water mark
+    assert summary.loc["allocate", "RSS_Delta"] > 48 * 2 ** 20
+    assert summary.loc["free", "RSS_Delta"] < -48 * 2 ** 20
+    assert summary.loc["free", "Process_Peak_RSS"] >= summary.loc["allocate", "Process_Peak_RSS"]
+    assert summary.loc["free", "Process_Peak_RSS"] > summary.loc["free", "RSS"]
@@ -0,0 +1,153 @@
+"""
+NY Times Crawler Tests
+Runs acquisition_storage.nyt_crawler against the local stub server (quota, 429s and fake articles)
+"""
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from acquisition_storage import nyt_crawler
+from acquisition_storage.http_cache import ResponseCache
+from acquisition_storage.nyt_crawler import PAGE_CEILING, fetch_page, run_crawl, split_window
+from acquisition_storage.nyt_stub_server import fake_articles, start_stub_server
+from acquisition_storage.rate_limit import TokenBucket
+from acquisition_storage.sentiment_ingest import NewsIngestor, SentimentScorer
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch, tmp_path):
+    """Every request reaches the stub (no on-disk response cache between tests)."""
+    monkeypatch.setattr(nyt_crawler, "default_cache", ResponseCache(tmp_path, enabled=False))
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**settings):
+        server, base_url = start_stub_server(**settings)
+        servers.append(server)
+        return server.state, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _fetch(base_url, max_retries, rate=1000.0):
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            return await fetch_page(session, TokenBucket(rate, 1), "Inflation", "20230101", "20230131",
+                                    max_retries=max_retries, base_url=base_url)
+    return asyncio.run(run())
+
+
+def test_token_bucket_paces_requests():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.perf_counter()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.perf_counter() - started
+    # The first token is available at once, the next five arrive every 50 ms
+    assert asyncio.run(run()) >= 0.24
+
+
+def test_429_storm_gives_up_after_bounded_retries(stub):
+    state, base_url = stub(rpm=0, retry_after=0)
+    # More retries than the recursion limit: a retry loop, not recursion, so the stack does not grow
+    assert _fetch(base_url, max_retries=1200) is None
+    assert state.requests == state.throttled == 1201
+
+
+def test_429_retry_after_pauses_the_bucket(stub):
+    state, base_url = stub(rpm=0, retry_after=1)
+    started = time.perf_counter()
+    assert _fetch(base_url, max_retries=1) is None
+    assert state.requests == 2 and time.perf_counter() - started >= 0.95
+
+
+def test_crawl_is_paced_by_the_quota(stub):
+    state, base_url = stub(hits=37)
+    pages = []
+    summary = run_crawl(["Inflation", "Economy"], "20230101", "20230131",
+                        lambda keyword, page, docs, unit: pages.append((keyword, page, len(docs))),
+                        concurrency=4, requests_per_minute=600, burst=1, base_url=base_url)
+    # 37 hits = 4 pages per keyword, one request each, at 10 requests per second
+    assert state.requests == 8 and state.throttled == 0
+    assert sorted(pages) == sorted((keyword, page, 10 if page < 3 else 7)
+                                   for keyword in ("Inflation", "Economy") for page in range(4))
+    assert summary["hits"] == 74 and summary["seconds"] >= 0.65
+
+
+def test_throttled_pages_are_retried_and_stored(stub):
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient()["sp500_test"]["news_data"]
+    ingestor = NewsIngestor(collection, SentimentScorer(workers=1), flush_size=20)
+    state, base_url = stub(hits=45, rpm=4, period=1.0)
+    run_crawl(["Inflation", "Economy"], "20230101", "20230131",
+              lambda keyword, page, docs, unit: ingestor.add_async(keyword, docs, unit),
+              concurrency=4, requests_per_minute=6000, burst=4, base_url=base_url)
+    ingestor.flush()
+    # The client bursts past the server quota: the 429s are retried until every article is fetched
+    assert state.throttled > 0
+    assert state.requests == 10 + state.throttled
+    assert collection.count_documents({}) == 90
+    assert collection.count_documents({"SearchKeywords": "Economy", "Sentiment_Compound": {"$exists": True}}) == 45
+
+
+class SlowScorer(SentimentScorer):
+    """Scores like SentimentScorer, after blocking for `delay` seconds (a large batch)."""
+
+    def __init__(self, delay):
+        super().__init__(workers=1)
+        self.delay = delay
+
+    def score(self, texts):
+        time.sleep(self.delay)
+        return super().score(texts)
+
+
+def test_flush_runs_off_the_event_loop():
+    mongomock = pytest.importorskip("mongomock")
+    ingestor = NewsIngestor(mongomock.MongoClient()["sp500_test"]["news_data"], SlowScorer(0.5), flush_size=10)
+    docs = fake_articles("Inflation", "20230101", "20230131", 0, 10)
+
+    async def run():
+        ticks = []
+
+        async def ticker():
+            for _ in range(10):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.03)
+        await ingestor.add_async("Inflation", docs)
+        await task
+        return ticks
+
+    ticks = asyncio.run(run())
+    # Other coroutines keep running while the buffer is scored and written
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.25
+    assert ingestor.summary["new"] == 10 and not ingestor.pending
+
+
+def test_windows_over_the_page_ceiling_are_sharded(stub):
+    state, base_url = stub(hits_per_day=3)
+    summary = run_crawl(["Economy"], "20170401", "20180331", lambda *args: None, pages=2,
+                        requests_per_minute=60000, burst=10, base_url=base_url)
+    # 365 days x 3 = 1095 hits > PAGE_CEILING: split into 2 shards, each probed and paged (2 pages)
+    assert 365 * 3 > PAGE_CEILING
+    assert summary["splits"] == 1 and summary["shards"] == 2
+    assert state.requests == 1 + 2 * 2
+
+
+def test_split_window_covers_the_range_without_overlap():
+    shards = split_window("20240101", "20240110", 3)
+    assert shards == [("20240101", "20240103"), ("20240104", "20240106"), ("20240107", "20240110")]
+    assert split_window("20240101", "20240102", 5) == [("20240101", "20240101"), ("20240102", "20240102")]
@@ -0,0 +1,28 @@
+"""
+Panel Feature Tests
+Builds panel_features from FixtureSource prices on each storage backend and reads the published rows back
+"""
+
+import numpy as np
+
+from acquisition_storage.price_engine import FixtureSource
+from panel_features import PANEL_COLLECTION, PANEL_REGISTRY, compute_panel, load_price_matrix, panel_to_long, run_panel
+
+
+NAMES = [spec.name for spec in PANEL_REGISTRY]
+
+
+def test_published_features_keep_float64(storage):
+    prices = FixtureSource().fetch(["AAPL", "MSFT", "XOM"], "2023-01-01", "2024-01-01")
+    storage.insert_many("Top10_stocks", prices.to_dict("records"))
+
+    long = run_panel(storage, start_date="2023-01-01", end_date="2023-12-31")
+    features = compute_panel(load_price_matrix(storage, start_date="2023-01-01", end_date="2023-12-31"))
+    published = storage.read_frame(PANEL_COLLECTION).sort_values(["Date", "Ticker"]).reset_index(drop=True)
+
+    assert (long[NAMES].dtypes == "float64").all()
+    assert published["Date"].tolist() == long["Date"].tolist()
+    # The kernel output is stored as computed, not rounded through float32
+    np.testing.assert_array_equal(published[NAMES].to_numpy(dtype="float64"), long[NAMES].to_numpy())
+    compact = panel_to_long(features, dtype="float32")
+    assert not np.allclose(compact["Return_1"].astype("float64"), long["Return_1"], rtol=1e-12, atol=0, equal_nan=True)
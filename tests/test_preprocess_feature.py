@@ -0,0 +1,51 @@
+"""
+Preprocessing Tests
+Runs preprocess_feature on synthetic sources, with and without --compact, on each storage backend
+"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import requires_server
+from feature_store import FEATURE_STORE
+from preprocess_feature import TOP10_STOCK_NAMES, run_preprocessing
+
+
+START, END = "2024-01-01", "2024-03-31"
+
+
+def _store_sources(storage):
+    sessions = pd.bdate_range(START, END)
+    steps = np.arange(len(sessions))
+    storage.insert_many("sp500_data", pd.DataFrame({
+        "Date": sessions, "Adj_Close": np.round(4700 + 13.37 * np.sin(steps), 2), "Return": 0.0}).to_dict("records"))
+    storage.insert_many("macroeco", pd.DataFrame({
+        "Date": pd.date_range(START, END, freq="MS"), "GDP": [27956.998, 27956.998, 28269.174],
+        "Inflation": [3.1, 3.2, 3.5], "Interest_Rate": [5.33, 5.33, 5.33]}).to_dict("records"))
+    storage.insert_many("news_daily", pd.DataFrame({
+        "Date": sessions, "Avg_News_Sentiment": np.round(np.cos(steps) / 3, 4)}).to_dict("records"))
+    storage.insert_many("Top10_stocks", [
+        {"Date": day, "Ticker": ticker, "Adj Close": round(100 + 7.1 * i + 0.37 * n, 2)}
+        for i, ticker in enumerate(TOP10_STOCK_NAMES) for n, day in enumerate(sessions)])
+
+
+def test_compact_run_publishes_the_default_values(storage):
+    requires_server(storage)
+    _store_sources(storage)
+    run_preprocessing(storage, START, END)
+    default = storage.read_frame(FEATURE_STORE).sort_values("Date").reset_index(drop=True)
+
+    compact = run_preprocessing(storage, START, END, compact=True)
+    published = storage.read_frame(FEATURE_STORE).sort_values("Date").reset_index(drop=True)
+
+    # float32 in memory, float64 in the store
+    assert (compact.dtypes == np.float32).any()
+    assert list(published.columns) == list(default.columns)
+    floats = [name for name in default.columns if default[name].dtype == np.float64]
+    assert (published[floats].dtypes == np.float64).all()
+    # Source values are stored as read, not as their float32 rounding; computed ones to float32 precision
+    raw = ["Adj_Close", "GDP", "Inflation", "Interest_Rate", "Avg_News_Sentiment"]
+    raw += [f"{ticker}_Adj_Close" for ticker in TOP10_STOCK_NAMES]
+    pd.testing.assert_frame_equal(published[["Date"] + raw], default[["Date"] + raw], check_exact=True)
+    np.testing.assert_allclose(published[floats].to_numpy(), default[floats].to_numpy(), rtol=1e-6, atol=1e-6)
+    assert published["Price_Direction"].tolist() == default["Price_Direction"].tolist()
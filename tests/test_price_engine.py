@@ -0,0 +1,167 @@
+"""
+Price Engine Tests
+Runs acquisition_storage.price_engine on FixtureSource prices (no yfinance) and a mongomock collection
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import watermark
+from acquisition_storage.checkpoint import CheckpointStore
+from acquisition_storage.price_engine import PRICE_FIELDS, FixtureSource, PriceSource, acquire_prices, wide_to_long
+from schema_setup import ensure_collection
+from trading_calendar import sessions
+
+mongomock = pytest.importorskip("mongomock")
+
+
+class RecordingSource(PriceSource):
+    """FixtureSource that records every request, drops `absent` tickers and fails chunks holding `broken`."""
+
+    def __init__(self, source=None, absent=(), broken=()):
+        self.source = source or FixtureSource()
+        self.absent, self.broken = set(absent), set(broken)
+        self.calls = []
+
+    def fetch(self, tickers, start, end):
+        self.calls.append((list(tickers), start, end))
+        if self.broken & set(tickers):
+            raise ConnectionError("download failed")
+        prices = self.source.fetch([ticker for ticker in tickers if ticker not in self.absent], start, end)
+        return prices.reset_index(drop=True)
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()["sp500_test"]
+
+
+@pytest.fixture
+def collection(db):
+    return ensure_collection(db, "Top10_stocks")
+
+
+def _wide(tickers, dates):
+    values = np.arange(len(dates) * len(tickers) * len(PRICE_FIELDS), dtype=float)
+    columns = pd.MultiIndex.from_product([PRICE_FIELDS, tickers])
+    return pd.DataFrame(values.reshape(len(dates), -1), index=pd.DatetimeIndex(dates, name="Date"), columns=columns)
+
+
+def test_wide_to_long_single_ticker_flat_columns():
+    dates = pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"])
+    wide = _wide(["AAPL"], dates).droplevel(1, axis=1)
+    wide.iloc[1] = np.nan
+
+    long = wide_to_long(wide, ["AAPL"])
+    assert list(long.columns) == ["Date", "Ticker"] + PRICE_FIELDS
+    assert long["Ticker"].tolist() == ["AAPL", "AAPL"]
+    assert long["Date"].tolist() == [dates[0], dates[2]]
+    assert long["Close"].tolist() == wide["Close"].dropna().tolist()
+
+
+def test_wide_to_long_multiindex_columns():
+    dates = pd.to_datetime(["2024-01-02", "2024-01-03"]).tz_localize("America/New_York")
+    wide = _wide(["AAPL", "MSFT"], dates)
+    # A ticker without data on a day is dropped, the other one is kept
+    wide.loc[dates[1], (slice(None), "MSFT")] = np.nan
+
+    long = wide_to_long(wide, ["AAPL", "MSFT"])
+    assert list(zip(long["Ticker"], long["Date"].dt.strftime("%Y-%m-%d"))) == [
+        ("AAPL", "2024-01-02"), ("MSFT", "2024-01-02"), ("AAPL", "2024-01-03")]
+    assert long["Date"].dt.tz is None
+    assert long.loc[1, "Volume"] == wide[("Volume", "MSFT")].iloc[0]
+
+
+def test_wide_to_long_empty_download():
+    long = wide_to_long(pd.DataFrame(), ["AAPL"])
+    assert long.empty and list(long.columns) == ["Date", "Ticker"] + PRICE_FIELDS
+
+
+def test_chunks_and_stores_every_ticker(collection):
+    tickers = [f"T{i}" for i in range(7)]
+    source = RecordingSource()
+    summary = acquire_prices(collection, tickers, "2024-01-01", "2024-02-01", source=source, chunk_size=3, max_workers=2)
+
+    days = len(sessions("2024-01-01", "2024-01-31"))
+    assert sorted(len(chunk) for chunk, _, _ in source.calls) == [1, 3, 3]
+    assert sorted(sum((chunk for chunk, _, _ in source.calls), [])) == tickers
+    assert summary["rows"] == summary["upserted"] == collection.count_documents({}) == 7 * days
+    assert summary["missing"] == [] and summary["errors"] == 0
+
+    # A second run upserts the same (Ticker, Date) keys: nothing new, nothing modified
+    again = acquire_prices(collection, tickers, "2024-01-01", "2024-02-01", source=RecordingSource(), chunk_size=3)
+    assert again["upserted"] == again["modified"] == 0
+    assert collection.count_documents({}) == 7 * days
+
+
+def test_summary_lists_missing_tickers(collection):
+    source = RecordingSource(absent={"NODATA"}, broken={"DOWN"})
+    summary = acquire_prices(collection, ["AAPL", "NODATA", "MSFT", "DOWN"], "2024-01-01", "2024-01-15",
+                             source=source, chunk_size=2)
+
+    # NODATA returned no rows; DOWN's chunk (with MSFT) failed to download
+    assert sorted(summary["missing"]) == ["DOWN", "MSFT", "NODATA"]
+    assert collection.distinct("Ticker") == ["AAPL"]
+
+
+def test_checkpoints_skip_stored_tickers(db, collection):
+    checkpoints = CheckpointStore(db, "yfinance")
+    first = RecordingSource(broken={"DOWN"})
+    acquire_prices(collection, ["AAPL", "MSFT", "DOWN"], "2024-01-01", "2024-01-15", source=first,
+                   chunk_size=1, checkpoints=checkpoints)
+
+    # The resumed run only fetches the ticker whose chunk failed
+    resumed = RecordingSource()
+    summary = acquire_prices(collection, ["AAPL", "MSFT", "DOWN"], "2024-01-01", "2024-01-15", source=resumed,
+                             chunk_size=1, checkpoints=CheckpointStore(db, "yfinance").load())
+    assert summary["skipped"] == 2
+    assert [chunk for chunk, _, _ in resumed.calls] == [["DOWN"]]
+    assert sorted(collection.distinct("Ticker")) == ["AAPL", "DOWN", "MSFT"]
+
+
+def test_incremental_upserts_the_lookback_rows(collection, monkeypatch, tmp_path):
+    prices = FixtureSource().fetch(["AAPL", "MSFT"], "2024-01-01", "2024-03-01")
+    stored = prices[prices["Date"] < "2024-02-01"]
+    acquire_prices(collection, ["AAPL", "MSFT"], "2024-01-01", "2024-02-01",
+                   source=FixtureSource(_fixture_file(tmp_path, "stored.csv", stored)))
+
+    # A price revised inside the lookback week, and new sessions after the watermark
+    revised = prices.copy()
+    revised_row = (revised["Ticker"] == "AAPL") & (revised["Date"] == "2024-01-29")
+    revised.loc[revised_row, "Close"] = 1.0
+    monkeypatch.setattr(watermark, "open_end_date", lambda: "2024-03-01")
+    source = RecordingSource(FixtureSource(_fixture_file(tmp_path, "revised.csv", revised)))
+    summary = acquire_prices(collection, ["AAPL", "MSFT"], "2024-01-01", None, source=source, incremental=True)
+
+    # Both tickers end on 2024-01-31: one request from a week before that
+    assert [(start, end) for _, start, end in source.calls] == [("2024-01-24", "2024-03-01")]
+    assert summary["modified"] == 1
+    assert collection.find_one({"Ticker": "AAPL", "Date": pd.Timestamp("2024-01-29")})["Close"] == 1.0
+    assert collection.count_documents({}) == len(prices)
+
+
+def test_incremental_resume_keeps_the_planned_windows(db, collection, monkeypatch, tmp_path):
+    prices = FixtureSource().fetch(["AAPL", "MSFT", "DOWN"], "2024-01-01", "2024-03-01")
+    source = FixtureSource(_fixture_file(tmp_path, "prices.csv", prices))
+    acquire_prices(collection, ["AAPL", "MSFT", "DOWN"], "2024-01-01", "2024-02-01", source=source)
+
+    # Interrupted incremental run: AAPL and MSFT are stored (their watermarks move), DOWN is not
+    monkeypatch.setattr(watermark, "open_end_date", lambda: "2024-02-20")
+    first = RecordingSource(source, broken={"DOWN"})
+    acquire_prices(collection, ["AAPL", "MSFT", "DOWN"], "2024-01-01", None, source=first, incremental=True,
+                   chunk_size=1, checkpoints=CheckpointStore(db, "yfinance"))
+
+    # Resumed the next day: only DOWN is fetched, for the window planned by the interrupted run
+    monkeypatch.setattr(watermark, "open_end_date", lambda: "2024-02-21")
+    resumed = RecordingSource(source)
+    summary = acquire_prices(collection, ["AAPL", "MSFT", "DOWN"], "2024-01-01", None, source=resumed,
+                             incremental=True, chunk_size=1, checkpoints=CheckpointStore(db, "yfinance").load())
+    assert summary["skipped"] == 2
+    assert resumed.calls == [(["DOWN"], "2024-01-24", "2024-02-20")]
+
+
+def _fixture_file(tmp_path, name, frame):
+    path = tmp_path / name
+    frame.to_csv(path, index=False)
+    return path
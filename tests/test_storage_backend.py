@@ -0,0 +1,191 @@
+"""
+Storage Backend Tests
+The same behaviour is expected from SQLiteBackend and MongoBackend (mongomock, or a server via MONGO_TEST_URI)
+"""
+
+from datetime import datetime
+
+import pandas as pd
+
+from conftest import requires_server
+from storage_backend import SQLiteBackend, date_range_query
+
+
+PRICES = [
+    {"Date": datetime(2024, 1, day), "Ticker": ticker, "Adj Close": 100.0 + day + offset, "Volume": day}
+    for day in range(1, 11) for ticker, offset in (("AAPL", 0.0), ("MSFT", 50.0))
+]
+
+
+def _dates(documents):
+    return sorted(doc["Date"] for doc in documents)
+
+
+def test_find_filters_date_range_and_projects_fields(storage):
+    storage.insert_many("prices", PRICES)
+    docs = list(storage.find("prices", start=datetime(2024, 1, 3), end=datetime(2024, 1, 5),
+                             query={"Ticker": "AAPL"}, fields=["Date", "Adj Close"]))
+    assert _dates(docs) == [datetime(2024, 1, day) for day in (3, 4, 5)]
+    assert all(set(doc) == {"Date", "Adj Close"} for doc in docs)
+
+
+def test_query_operators(storage):
+    storage.insert_many("prices", PRICES + [{"Date": datetime(2024, 2, 1), "Ticker": "XOM"}])
+    assert storage.count("prices", {"Ticker": {"$in": ["AAPL", "XOM"]}}) == 11
+    assert storage.count("prices", {"Ticker": {"$nin": ["AAPL"]}}) == 11
+    assert storage.count("prices", {"Ticker": {"$ne": "AAPL"}}) == 11
+    assert storage.count("prices", {"Volume": {"$gt": 8}}) == 4
+    assert storage.count("prices", {"Volume": {"$gte": 2, "$lt": 4}}) == 4
+    assert storage.count("prices", {"Adj Close": {"$exists": False}}) == 1
+    # Missing fields never satisfy a range comparison
+    assert storage.count("prices", {"Adj Close": {"$lte": 1000}}) == 20
+
+
+def test_count_and_latest(storage):
+    storage.insert_many("prices", PRICES)
+    assert storage.count("prices") == 20
+    assert storage.count("prices", {"Date": {"$gte": datetime(2024, 1, 9)}}) == 4
+    assert storage.count("prices", {"Date": {"$gte": datetime(2024, 1, 9)}, "Ticker": "MSFT"}) == 2
+    assert storage.latest("prices") == datetime(2024, 1, 10)
+    assert storage.latest("prices", query={"Date": {"$lte": datetime(2024, 1, 4)}, "Ticker": "AAPL"}) == datetime(2024, 1, 4)
+    assert storage.latest("missing") is None
+
+
+def test_latest_of_another_date_field(storage):
+    storage.insert_many("runs", [{"Run": i, "Finished": datetime(2024, 3, i)} for i in (2, 9, 5)])
+    assert storage.latest("runs", date_col="Finished") == datetime(2024, 3, 9)
+    assert storage.latest("runs", date_col="Finished", query={"Run": {"$lt": 9}}) == datetime(2024, 3, 5)
+
+
+def test_upsert_has_set_semantics(storage):
+    storage.upsert_many("features", [
+        {"Date": datetime(2024, 1, 1), "Close": 1.0, "Target": 0.5, "Meta": {"a": 1, "b": 2}},
+    ], keys=("Date",))
+    summary = storage.upsert_many("features", [
+        # None stores null, a nested document replaces the stored one, Close is kept
+        {"Date": datetime(2024, 1, 1), "Target": None, "Meta": {"a": 3}},
+        {"Date": datetime(2024, 1, 2), "Close": 2.0},
+    ], keys=("Date",))
+    assert summary["upserted"] == 1 and summary["modified"] == 1
+
+    docs = {doc["Date"]: doc for doc in storage.find("features")}
+    assert docs[datetime(2024, 1, 1)] == {"Date": datetime(2024, 1, 1), "Close": 1.0, "Target": None, "Meta": {"a": 3}}
+    assert docs[datetime(2024, 1, 2)] == {"Date": datetime(2024, 1, 2), "Close": 2.0}
+
+
+def test_upsert_on_compound_keys_is_idempotent(storage):
+    storage.upsert_many("prices", PRICES, keys=("Ticker", "Date"))
+    storage.upsert_many("prices", [{**doc, "Adj Close": 0.0} for doc in PRICES[:4]], keys=("Ticker", "Date"))
+    assert storage.count("prices") == 20
+    assert storage.count("prices", {"Adj Close": 0.0}) == 4
+
+
+def test_replace_collection(storage):
+    storage.insert_many("features", PRICES)
+    written = storage.replace_collection("features", PRICES[:3])
+    assert written == 3 and storage.count("features") == 3
+
+
+def test_read_frame_is_typed(storage):
+    storage.insert_many("prices", PRICES)
+    frame = storage.read_frame("prices", fields=["Date", "Ticker", "Adj Close"], query={"Ticker": "MSFT"},
+                               start=pd.Timestamp("2024-01-06"))
+    assert list(frame.columns) == ["Date", "Ticker", "Adj Close"]
+    assert str(frame["Date"].dtype) == "datetime64[ns]" and frame["Adj Close"].dtype == "float64"
+    assert len(frame) == 5
+
+
+def test_date_range_keeps_the_date_condition_of_the_query(storage):
+    storage.insert_many("prices", PRICES)
+    # An equality on Date and the start/end range must both hold
+    inside = storage.read_frame("prices", query={"Date": datetime(2024, 1, 5)}, start=datetime(2024, 1, 3),
+                                end=datetime(2024, 1, 8))
+    assert len(inside) == 2
+    assert storage.read_frame("prices", query={"Date": datetime(2024, 1, 9)}, end=datetime(2024, 1, 8)).empty
+    # The same operator on both sides: the tighter bound wins
+    docs = storage.find("prices", query={"Date": {"$gte": datetime(2024, 1, 7)}, "Ticker": "AAPL"},
+                        start=datetime(2024, 1, 4))
+    assert _dates(docs) == [datetime(2024, 1, day) for day in (7, 8, 9, 10)]
+    assert storage.count("prices", date_range_query({"Date": {"$lt": datetime(2024, 1, 4)}}, end=datetime(2024, 1, 2))) == 4
+
+
+def test_aggregate_unwind_group_project(storage):
+    storage.insert_many("news", [
+        {"Date": datetime(2024, 1, 1), "Score": 0.2, "SearchKeywords": ["Fed", "Rates"]},
+        {"Date": datetime(2024, 1, 1), "Score": 0.4, "SearchKeywords": ["Fed"]},
+        {"Date": datetime(2024, 1, 2), "Score": -0.6, "SearchKeywords": []},
+    ])
+    daily = storage.aggregate("news", [
+        {"$group": {"_id": "$Date", "Avg": {"$avg": "$Score"}, "Articles": {"$sum": 1}}},
+        {"$project": {"_id": 0, "Date": "$_id", "Avg": 1, "Articles": 1}},
+        {"$sort": {"Date": 1}},
+    ])
+    assert [(doc["Date"], round(doc["Avg"], 6), doc["Articles"]) for doc in daily] == [
+        (datetime(2024, 1, 1), 0.3, 2), (datetime(2024, 1, 2), -0.6, 1)]
+
+    keywords = storage.aggregate("news", [
+        {"$match": {"Date": {"$lte": datetime(2024, 1, 1)}}},
+        {"$unwind": "$SearchKeywords"},
+        {"$group": {"_id": "$SearchKeywords", "Articles": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ])
+    assert [(doc["_id"], doc["Articles"]) for doc in keywords] == [("Fed", 2), ("Rates", 1)]
+
+
+def test_aggregate_merge_upserts_into_target(storage):
+    requires_server(storage)
+    storage.upsert_many("daily", [{"Date": datetime(2024, 1, 1), "Avg": 9.0, "Extra": 1}], keys=("Date",))
+    if not isinstance(storage, SQLiteBackend):
+        storage.db["daily"].create_index("Date", unique=True)
+    storage.insert_many("news", [{"Date": datetime(2024, 1, day), "Score": float(day)} for day in (1, 1, 2)])
+    storage.aggregate("news", [
+        {"$group": {"_id": "$Date", "Avg": {"$avg": "$Score"}}},
+        {"$project": {"_id": 0, "Date": "$_id", "Avg": 1}},
+        {"$merge": {"into": "daily", "on": "Date", "whenMatched": "merge", "whenNotMatched": "insert"}},
+    ])
+    docs = {doc["Date"]: doc for doc in storage.find("daily")}
+    assert docs[datetime(2024, 1, 1)]["Avg"] == 1.0 and docs[datetime(2024, 1, 1)]["Extra"] == 1
+    assert docs[datetime(2024, 1, 2)]["Avg"] == 2.0
+
+
+def test_create_view_filters_dates(storage):
+    requires_server(storage)
+    storage.insert_many("features", PRICES)
+    storage.create_view("test_data", "features", {"Date": {"$gte": datetime(2024, 1, 9)}})
+    assert _dates(storage.find("test_data")) == [datetime(2024, 1, day) for day in (9, 9, 10, 10)]
+    # Redefining a view replaces it; the view follows its source
+    storage.create_view("test_data", "features", {"Date": {"$gte": datetime(2024, 1, 10)}})
+    storage.insert_many("features", [{"Date": datetime(2024, 1, 11), "Ticker": "AAPL"}])
+    assert _dates(storage.find("test_data")) == [datetime(2024, 1, 10)] * 2 + [datetime(2024, 1, 11)]
+
+
+def test_drop_collection(storage):
+    storage.upsert_many("prices", PRICES, keys=("Ticker", "Date"))
+    storage.drop_collection("prices")
+    storage.drop_collection("never_created")
+    assert storage.count("prices") == 0
+    # A recreated collection starts without the old rows or key
+    storage.insert_many("prices", [{"Date": datetime(2024, 1, 1), "Ticker": "AAPL"} for _ in range(4)])
+    assert storage.count("prices") == 4
+
+
+def test_sqlite_compares_string_and_datetime_dates(tmp_path):
+    storage = SQLiteBackend(str(tmp_path / "store.sqlite"))
+    storage.insert_many("macroeco", [{"Date": "2024-01-02", "GDP": 1.0}, {"Date": datetime(2024, 1, 3), "GDP": 2.0}])
+    assert storage.count("macroeco", {"Date": {"$gte": datetime(2024, 1, 2)}}) == 2
+    assert storage.latest("macroeco") == datetime(2024, 1, 3)
+
+
+def test_sqlite_keying_removes_duplicate_rows(tmp_path):
+    storage = SQLiteBackend(str(tmp_path / "store.sqlite"))
+    day = datetime(2024, 1, 2)
+    # Rows inserted before the collection had a key: the same (Ticker, Date) twice
+    storage.insert_many("prices", [{"Date": day, "Ticker": "AAPL", "Close": 1.0},
+                                   {"Date": day, "Ticker": "AAPL", "Close": 2.0},
+                                   {"Date": day, "Ticker": "MSFT", "Close": 3.0}])
+
+    summary = storage.upsert_many("prices", [{"Date": day, "Ticker": "AAPL", "Volume": 10}], keys=("Ticker", "Date"))
+    assert summary["upserted"] == 0 and summary["modified"] == 1
+    assert storage.count("prices") == 2
+    aapl = list(storage.find("prices", query={"Ticker": "AAPL"}))
+    assert [(doc["Close"], doc["Volume"]) for doc in aapl] == [(2.0, 10)]
@@ -0,0 +1,36 @@
+"""
+Streaming Tests
+Seeds StreamingPredictor from a published feature table on each storage backend
+"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import requires_server
+from feature_registry import normalization_params
+from feature_store import FEATURE_STORE, current_version, publish_features
+from incremental_features import RollingState, save_state
+from streaming import StreamingPredictor
+
+
+def _table(dates, start):
+    closes = start + np.arange(len(dates), dtype=float)
+    return pd.DataFrame({"Date": dates, "Adj_Close": closes, "GDP": closes / 10,
+                         "Normalized_SP500_Adj_Close": 0.0, "Normalized_GDP": 0.0})
+
+
+def test_predictor_uses_the_persisted_normalization(storage):
+    requires_server(storage)
+    published = _table(pd.date_range("2024-01-01", periods=40), 100.0)
+    publish_features(storage, published)
+    state = RollingState.from_table(published, current_version(storage))
+    save_state(storage, state)
+
+    # Days appended by the incremental engine keep the normalization of the last full build
+    storage.insert_many(FEATURE_STORE, _table(pd.date_range("2024-02-10", periods=20), 500.0).to_dict("records"))
+
+    bundle = {"model": None, "scaler": None, "features": ["Normalized_SP500_Adj_Close", "Normalized_GDP", "Lag_1"]}
+    predictor = StreamingPredictor(bundle, storage=storage, tickers=[])
+    assert predictor.state.normalization == state.normalization
+    assert predictor.state.normalization != normalization_params(storage.read_frame(FEATURE_STORE), bundle["features"])
+    assert predictor.last_close == 519.0
@@ -0,0 +1,126 @@
+"""
+NYSE Trading Calendar
+Computes exchange sessions locally (holiday rules, no API) and densifies session-only series to calendar days on demand
+"""
+
+from functools import lru_cache
+
+import pandas as pd
+from pandas.tseries.holiday import (
+    MO, AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay, USMemorialDay, USPresidentsDay,
+    USThanksgivingDay, nearest_workday, sunday_to_monday,
+)
+from pandas.tseries.offsets import DateOffset
+
+
+# One-off closures (national days of mourning, weather, 9/11) since 2000
+SPECIAL_CLOSURES = pd.DatetimeIndex([
+    "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14",
+    "2004-06-11", "2007-01-02", "2012-10-29", "2012-10-30",
+    "2018-12-05", "2025-01-09",
+])
+
+
+class NYSECalendar(AbstractHolidayCalendar):
+    """
+    Regular NYSE holidays. Saturday holidays are observed on Friday and Sunday holidays on Monday,
+    except New Year's Day, which is not made up when it falls on a Saturday.
+    """
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        Holiday("Martin Luther King Jr. Day", month=1, day=1, start_date="1998-01-01", offset=DateOffset(weekday=MO(3))),
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+@lru_cache(maxsize=None)
+def _holidays(first_year, last_year):
+    regular = NYSECalendar().holidays(f"{first_year}-01-01", f"{last_year}-12-31")
+    return regular.union(SPECIAL_CLOSURES[(SPECIAL_CLOSURES.year >= first_year) & (SPECIAL_CLOSURES.year <= last_year)])
+
+
+# Function to List the Exchange Holidays in a Range
+def holidays(start, end):
+    """Returns the weekday closures between start and end (inclusive) as a DatetimeIndex."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    closures = _holidays(start.year, end.year)
+    return closures[(closures >= start.normalize()) & (closures <= end)]
+
+
+# Function to List the Trading Sessions in a Range
+def sessions(start, end):
+    """Returns the NYSE sessions between start and end (inclusive) as a DatetimeIndex named Date."""
+    weekdays = pd.bdate_range(start, end, name="Date")
+    return weekdays[~weekdays.isin(holidays(start, end))]
+
+
+# Function to Flag the Trading Sessions among Dates
+def is_session(dates):
+    """Returns a boolean array: True where the date (any time of day) is an NYSE session."""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+    if dates.empty:
+        return dates.notna()
+    return (dates.weekday < 5) & ~dates.isin(_holidays(dates.min().year, dates.max().year))
+
+
+# Function to Densify a Session-Only Frame to Calendar Days
+def densify(df, start=None, end=None, date_col="Date", by=None, method="ffill", zero_fill=()):
+    """
+    Expands a frame holding trading sessions only to one row per calendar day (per group), vectorized.
+    Each day takes the values of the last session on or before it (as-of); days before the first
+    session take the first one.
+    Args:
+        - df: DataFrame with a date column (and optionally a group column)
+        - start: First calendar day (default: the first date of df)
+        - end: Last calendar day; None stops each group at its own last date
+        - date_col: Name of the date column
+        - by: Optional group column (e.g. "Ticker"), densified independently per group
+        - method: "ffill" (as-of, default) or "bfill" (next session first, the legacy top-10 fill)
+        - zero_fill: Per-period columns (returns, volume) set to 0 on the added days instead of carried
+
+    Returns:
+        - DataFrame with one row per (group,) calendar day
+    """
+    if df.empty:
+        return df
+    keys = [by, date_col] if by else [date_col]
+    df = df.assign(**{date_col: pd.to_datetime(df[date_col])}).drop_duplicates(subset=keys, keep="last")
+    start = pd.Timestamp(start) if start is not None else df[date_col].min()
+    last = df.groupby(by)[date_col].max() if by else None
+    stop = pd.Timestamp(end) if end is not None else df[date_col].max()
+
+    # Fill over the observed dates as well, so a day at `start` can take a session before it
+    dates = pd.date_range(start, stop, freq="D", name=date_col)
+    full_dates = dates.union(pd.DatetimeIndex(df[date_col].unique())).rename(date_col)
+    if by:
+        index = pd.MultiIndex.from_product([last.index, full_dates], names=keys)
+        target = pd.MultiIndex.from_product([last.index, dates], names=keys)
+    else:
+        index, target = full_dates, dates
+
+    observed = df.set_index(keys)
+    filled = observed.reindex(index)
+    grouped = filled.groupby(level=by) if by else filled
+    if method == "bfill":
+        filled = grouped.bfill()
+        filled = (filled.groupby(level=by) if by else filled).ffill()
+    else:
+        filled = grouped.ffill()
+        filled = (filled.groupby(level=by) if by else filled).bfill()
+    filled = filled.reindex(target)
+
+    zero_fill = [col for col in zero_fill if col in filled.columns]
+    if zero_fill:
+        filled.loc[~target.isin(observed.index), zero_fill] = 0
+
+    filled = filled.reset_index()
+    if by and end is None:
+        filled = filled[filled[date_col] <= filled[by].map(last)]
+    return filled.reset_index(drop=True)
@@ -0,0 +1,94 @@
+"""
+Watermarks for Incremental Acquisition
+Finds the latest stored Date of a series so acquisition scripts only fetch the missing tail
+"""
+
+import pandas as pd
+
+
+# Function to Find the Latest Stored Date
+def latest_date(collection, query=None, date_col="Date"):
+    """
+    Returns the latest Date stored in a collection (optionally for one series/ticker).
+    Args:
+        - collection: pymongo Collection
+        - query: Optional filter, e.g. {"Ticker": "AAPL"}
+        - date_col: Name of the date field (stored as datetime or 'YYYY-MM-DD' string)
+
+    Returns:
+        - pandas Timestamp normalized to midnight, or None if nothing is stored yet.
+    """
+    doc = collection.find_one(query or {}, {date_col: 1, "_id": 0}, sort=[(date_col, -1)])
+    if not doc or doc.get(date_col) is None:
+        return None
+    return pd.Timestamp(doc[date_col]).normalize()
+
+
+# Function to Find the Latest Stored Date of Every Series at Once
+def latest_dates(collection, key="Ticker", query=None, date_col="Date"):
+    """
+    Returns the latest Date stored per series in one aggregation (instead of one query per ticker).
+    Args:
+        - collection: pymongo Collection
+        - key: Field identifying the series, e.g. "Ticker"
+        - query: Optional filter, e.g. {"Ticker": {"$in": [...]}}
+        - date_col: Name of the date field
+
+    Returns:
+        - Dictionary {series: Timestamp normalized to midnight}
+    """
+    pipeline = [{"$match": query}] if query else []
+    pipeline.append({"$group": {"_id": f"${key}", "latest": {"$max": f"${date_col}"}}})
+    return {doc["_id"]: pd.Timestamp(doc["latest"]).normalize()
+            for doc in collection.aggregate(pipeline) if doc.get("latest") is not None}
+
+
+# Function to Compute the Download Window for an Incremental Run
+def incremental_window(collection, default_start, lookback_days=7, query=None, date_col="Date"):
+    """
+    Computes where an incremental download should start.
+    Args:
+        - collection: pymongo Collection
+        - default_start: Start date used when nothing is stored yet ('YYYY-MM-DD')
+        - lookback_days: Days re-downloaded before the watermark so fills and returns
+          at the boundary are computed from real data
+        - query: Optional filter for one series/ticker
+        - date_col: Name of the date field
+
+    Returns:
+        - (watermark, fetch_start): watermark is the latest stored Timestamp (or None),
+          fetch_start is a 'YYYY-MM-DD' string.
+    """
+    watermark = latest_date(collection, query, date_col)
+    if watermark is None:
+        return None, default_start
+    fetch_start = watermark - pd.Timedelta(days=lookback_days)
+    return watermark, fetch_start.strftime("%Y-%m-%d")
+
+
+# Function to Keep Only Rows after the Watermark
+def after_watermark(df, watermark, date_col="Date"):
+    """Drops rows on or before the watermark, so only new documents are appended."""
+    if watermark is None:
+        return df
+    return df[pd.to_datetime(df[date_col]) > watermark].copy()
+
+
+# Function to Keep Only Rows whose Date is not Stored Yet
+def unstored_rows(collection, df, query=None, date_col="Date"):
+    """
+    Drops rows whose date is already stored, so re-running a load never duplicates documents
+    (used where a unique index is not available, e.g. time-series collections).
+    """
+    if df.empty:
+        return df
+    dates = pd.to_datetime(df[date_col])
+    query = dict(query or {}, **{date_col: {"$gte": dates.min().to_pydatetime(), "$lte": dates.max().to_pydatetime()}})
+    stored = pd.to_datetime([doc[date_col] for doc in collection.find(query, {date_col: 1, "_id": 0})])
+    return df[~dates.isin(stored)].copy()
+
+
+# Function to Get the Exclusive End Date for an Open-Ended Download
+def open_end_date():
+    """Returns tomorrow as 'YYYY-MM-DD' (yfinance/FRED end dates up to and including today)."""
+    return (pd.Timestamp.today().normalize() + pd.Timedelta(days=1)).strftime("%Y-%m-%d")